@@ -0,0 +1,167 @@
+"""
+Headless KPI export: the dashboard's services without Streamlit or plotly.
+
+    python cli.py export.xlsx                       # JSON to stdout
+    python cli.py export.csv --today 2024-06-30 --out kpis.json
+    python cli.py export.parquet --format csv --out out_dir/
+    python cli.py export.csv --column demand_gen_col="Demand Date"
+
+Emits KPIMetrics, the 24-month trend, the per-property table with its Tower and Type rollups, the
+validation results and the Discrepancies Report rules.
+Parquet input needs pyarrow (or fastparquet) installed.
+"""
+import argparse
+import json
+import sys
+from dataclasses import asdict, replace
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from utils.columns import COLUMN_CANDIDATES, EXTRA_COLUMNS, missing_fields, pick_column, resolve_column_map
+from services.caching import set_cache_backend
+from services.dataset import register_dataset
+from services.ingest import read_export
+from services.compute import compute_kpis, compute_monthly_trend, compute_property_metrics, compute_property_rollups
+from services.validation import run_validations
+from services.discrepancies import run_discrepancy_checks
+
+# Mapping fields the services cannot work without
+REQUIRED_FIELDS = [
+    "booking_col", "reg_date_col", "actual_payment_col", "amount_due_col", "payment_received_col",
+    "total_agreement_col", "budgeted_date_col", "demand_gen_col", "property_name",
+    "application_booking_id", "tax_col", "other_charges",
+]
+
+
+def read_table(path: Path, keep=()) -> pd.DataFrame:
+    """Read a CSV/XLSX/Parquet export and strip header whitespace; CSV/XLSX as the app does at ingest."""
+    suffix = path.suffix.lower()
+    if suffix in (".csv", ".xlsx"):
+        # Only the columns the services can use (plus keep), through the fastest installed reader
+        return read_export(path, keep=keep)
+    if suffix == ".xls":
+        df = pd.read_excel(path)
+    elif suffix in (".parquet", ".pq"):
+        df = pd.read_parquet(path)
+    else:
+        raise ValueError(f"Unsupported file type '{suffix}' (expected .csv, .xlsx or .parquet)")
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def _records(df: pd.DataFrame) -> list:
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, pd.DataFrame):
+        return _records(value)
+    return str(value)
+
+
+def build_report(df: pd.DataFrame, column_map, today: pd.Timestamp, source: str = None) -> dict:
+    """All headless outputs as frames/dicts keyed by output name."""
+    dataset = register_dataset(df, column_map, source=source)
+    trend = compute_monthly_trend(dataset, today)
+    trend = trend.rename_axis("Month").reset_index().assign(Month=lambda t: t["Month"].astype(str))
+    validations = run_validations(dataset)
+    # The Discrepancies Report rules read every mapped column; skipped when some are not mapped
+    discrepancies = [] if missing_fields(column_map) else run_discrepancy_checks(
+        dataset, today, pick_column(df.columns, *EXTRA_COLUMNS))["results"]
+    return {
+        "as_of": today.date().isoformat(),
+        "rows": dataset.n_rows,
+        "kpis": asdict(compute_kpis(dataset, today)),
+        "monthly_trend": trend,
+        "properties": compute_property_metrics(dataset, today),
+        "towers": compute_property_rollups(dataset, today, "tower"),
+        "types": compute_property_rollups(dataset, today, "type"),
+        "validations": validations["results"],
+        "discrepancies": discrepancies,
+    }
+
+
+def write_json(report: dict, out: Path = None) -> None:
+    text = json.dumps(report, default=_json_default, indent=2, ensure_ascii=False)
+    if out is None:
+        sys.stdout.write(text + "\n")
+    else:
+        out.write_text(text, encoding="utf-8")
+
+
+def _write_results(results: list, out: Path, name: str, prefix: str) -> None:
+    """<name>.csv summary; details go to <prefix>_<type>[_<check>].csv."""
+    summary = []
+    for r in results:
+        summary.append({"type": r["type"], "count": r["count"], "message": r["message"]})
+        details = r["details"]
+        if isinstance(details, pd.DataFrame):
+            details = {"": details}
+        for key, frame in details.items():
+            if isinstance(frame, pd.DataFrame) and not frame.empty:
+                frame.to_csv(out / f"{prefix}_{r['type']}{'_' + key if key else ''}.csv", index=False)
+    pd.DataFrame(summary, columns=["type", "count", "message"]).to_csv(out / f"{name}.csv", index=False)
+
+
+def write_csv(report: dict, out: Path) -> None:
+    """One CSV per output; validation and discrepancy details go to validation_/discrepancy_<type>[_<check>].csv."""
+    out.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame([{"as_of": report["as_of"], "rows": report["rows"], **report["kpis"]}]).to_csv(out / "kpis.csv", index=False)
+    report["monthly_trend"].to_csv(out / "monthly_trend.csv", index=False)
+    for name in ("properties", "towers", "types"):
+        report[name].to_csv(out / f"{name}.csv", index=False)
+
+    _write_results(report["validations"], out, "validations", "validation")
+    _write_results(report["discrepancies"], out, "discrepancies", "discrepancy")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compute collection KPIs from a milestone export without the dashboard.")
+    parser.add_argument("path", type=Path, help="CSV, XLSX or Parquet export")
+    parser.add_argument("--today", help="Calculate as of this date (default: today)")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument("--out", type=Path, help="JSON file or CSV directory (default: JSON to stdout, CSV to ./kpi_export)")
+    parser.add_argument(
+        "--column", action="append", default=[], metavar="FIELD=HEADER",
+        help=f"Override a column mapping; fields: {', '.join(COLUMN_CANDIDATES)}",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # One-shot run: nothing to reuse between calls
+    set_cache_backend(None)
+
+    # Headers named in --column overrides are read even if they are not mapping candidates
+    df = read_table(args.path, keep=[o.partition("=")[2] for o in args.column])
+    column_map = resolve_column_map(df.columns)
+    for override in args.column:
+        field_name, _, header = override.partition("=")
+        if field_name not in COLUMN_CANDIDATES or header not in df.columns:
+            print(f"Invalid --column '{override}': unknown field or header not in file", file=sys.stderr)
+            return 2
+        column_map = replace(column_map, **{field_name: header})
+
+    missing = [f for f in missing_fields(column_map) if f in REQUIRED_FIELDS]
+    if missing:
+        hints = "; ".join(f"{f} (tried: {', '.join(COLUMN_CANDIDATES[f][1])})" for f in missing)
+        print(f"Missing required columns: {hints}. Map them with --column FIELD=HEADER.", file=sys.stderr)
+        return 2
+
+    today = pd.to_datetime(args.today or "today").normalize()
+    # Same source key as a dashboard upload of this file, so remembered date formats are shared
+    report = build_report(df, column_map, today, source=f"upload:{args.path.name}")
+    if args.format == "json":
+        write_json(report, args.out)
+    else:
+        write_csv(report, args.out or Path("kpi_export"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
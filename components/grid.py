@@ -0,0 +1,98 @@
+import io
+import math
+import pandas as pd
+import streamlit as st
+from services.grid import ColumnFilter, GridQuery, filter_kind, page_rows, select_rows, write_csv
+
+PAGE_SIZES = (50, 100, 500)
+
+
+def render_grid(frame: pd.DataFrame, key: str, search_columns=(), labels=None, file_name: str = "table.csv"):
+    """
+    Paginated table: search (over search_columns), column filters and sort run on the server and only
+    the current page goes to the browser; the CSV download is built in chunks when it is clicked.
+    frame should be the same object on every rerun (a cached result) and labels renames its columns
+    for display. Call it inside a fragment, such as a lazy_expander body, so its widgets rerun just it.
+    """
+    labels = labels or {}
+    shown = {col: str(labels.get(col, col)) for col in frame.columns}
+    by_label = {label: col for col, label in shown.items()}
+    search_columns = tuple(c for c in search_columns if c in frame.columns)
+
+    top = st.columns([3, 2, 1, 1])
+    search = ""
+    if search_columns:
+        search = top[0].text_input(
+            "Search", key=f"{key}_search", placeholder=f"Search {', '.join(shown[c] for c in search_columns)}",
+        )
+    sort_label = top[1].selectbox("Sort by", ["(table order)", *by_label], key=f"{key}_sort")
+    descending = top[2].selectbox("Order", ["Ascending", "Descending"], key=f"{key}_order") == "Descending"
+    page_size = top[3].selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+
+    filters = tuple(
+        f for f in (_column_filter(frame, by_label[label], label, f"{key}_filter_{label}")
+                    for label in st.multiselect("Filter columns", list(by_label), key=f"{key}_filters"))
+        if f is not None
+    )
+    query = GridQuery(
+        search=search,
+        search_columns=search_columns,
+        filters=filters,
+        sort_by=by_label.get(sort_label),
+        ascending=not descending,
+    )
+    positions = select_rows(frame, query)
+
+    n_pages = max(1, math.ceil(len(positions) / page_size))
+    page_key = f"{key}_page"
+    # A narrower query can leave the remembered page past the end
+    st.session_state[page_key] = min(st.session_state.get(page_key, 1), n_pages)
+    bottom = st.columns([1, 3, 2])
+    page = bottom[0].number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, step=1, key=page_key)
+    start = (page - 1) * page_size
+    bottom[1].caption(
+        f"Rows {min(start + 1, len(positions)):,}–{min(start + page_size, len(positions)):,} of {len(positions):,}"
+        + (f" (filtered from {len(frame):,})" if len(positions) != len(frame) else "")
+    )
+    with bottom[2]:
+        st.download_button(
+            f"📥 Download {len(positions):,} rows (CSV)",
+            data=lambda: _csv_bytes(frame.rename(columns=shown), positions),
+            file_name=file_name, mime="text/csv", key=f"{key}_csv", on_click="ignore",
+        )
+    st.dataframe(page_rows(frame, positions, page - 1, page_size).rename(columns=shown), use_container_width=True)
+
+
+def _column_filter(frame: pd.DataFrame, column: str, label: str, key: str):
+    """Draw the filter control for one column; None while it keeps every row."""
+    kind, choices = filter_kind(frame, column)
+    if kind == "values":
+        values = st.multiselect(label, choices, key=key)
+        return ColumnFilter(column, values=tuple(values)) if values else None
+    if kind == "text":
+        text = st.text_input(f"{label} contains", key=key)
+        return ColumnFilter(column, contains=text) if text else None
+    low, high = choices
+    if pd.isna(low):
+        return None
+    if kind == "date":
+        picked = st.date_input(label, value=(low.date(), high.date()), key=key)
+        if len(picked) != 2 or tuple(picked) == (low.date(), high.date()):
+            return None
+        return ColumnFilter(column, low=pd.Timestamp(picked[0]), high=pd.Timestamp(picked[1]) + pd.Timedelta(days=1) - pd.Timedelta(1))
+    left, right = st.columns(2)
+    lo = left.number_input(f"{label} from", value=float(low), key=f"{key}_low")
+    hi = right.number_input(f"{label} to", value=float(high), key=f"{key}_high")
+    if lo <= low and hi >= high:
+        return None
+    return ColumnFilter(column, low=lo if lo > low else None, high=hi if hi < high else None)
+
+
+def _csv_bytes(frame: pd.DataFrame, positions) -> bytes:
+    """
+    The selected rows as CSV for the download button, which holds the whole file in memory anyway.
+    Written in chunks, so no full-size str is built next to the bytes as with to_csv().encode().
+    """
+    buffer = io.BytesIO()
+    write_csv(frame, buffer, positions)
+    return buffer.getvalue()
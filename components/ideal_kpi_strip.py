@@ -3,8 +3,8 @@ import streamlit as st
 import plotly.express as px
 
 from utils.helper import to_cr
-from services.compute import preprocess_df
-from utils.types import ColumnMapping
+from services.dataset import Dataset
+from services.compute import get_asof_index, get_booking_facts
 
 
 def _fmt_count(n: int) -> str:
@@ -14,42 +14,36 @@ def _fmt_count(n: int) -> str:
         return str(n)
 
 
-def render_ideal_kpi_strip(df, today, column_map: ColumnMapping):
+def render_ideal_kpi_strip(dataset: Dataset, today):
     """
     Render an additional KPI strip based on docs/ideal_metrics definitions, directly below the
     existing KPI strip. This does not modify or remove the original KPI strip.
     """
     # Normalize inputs
     today = pd.to_datetime(today).normalize()
-    d = preprocess_df(df, column_map)
+    d = dataset.frame
+    column_map = dataset.column_map
 
     # Column aliases
     bid = column_map.application_booking_id
     book_date = column_map.booking_col
     reg_date = column_map.reg_date_col
-    agreement_col = column_map.total_agreement_col
-    other_charges = column_map.other_charges
-    tax_col = column_map.tax_col
-    amount_due_col = column_map.amount_due_col
-    actual_payment_col = column_map.actual_payment_col
-    demand_gen_col = column_map.demand_gen_col
 
     # ---------------- Top Multi Bar Chart ----------------
     # Compute key totals for the overview chart
-    booking_summary_top = d.groupby(bid).agg({
-        agreement_col: 'first',
-        other_charges: 'first',
-    }).reset_index() if bid in d.columns else pd.DataFrame()
-    av_total_top = booking_summary_top[agreement_col].fillna(0).sum() if not booking_summary_top.empty else 0.0
-    corpus_total_top = booking_summary_top[other_charges].fillna(0).sum() if not booking_summary_top.empty else 0.0
+    # Per-booking first agreement/corpus values come from the cached booking fact table
+    _, booking_facts = get_booking_facts(dataset)
+    av_total_top = booking_facts['agreement_first'].fillna(0).sum() if not booking_facts.empty else 0.0
+    corpus_total_top = booking_facts['corpus_first'].fillna(0).sum() if not booking_facts.empty else 0.0
     amount_ac_top = av_total_top + corpus_total_top
 
-    demand_mask_top = d[demand_gen_col].notna() & (d[demand_gen_col] < today) if demand_gen_col in d.columns else pd.Series(False, index=d.index)
-    due_total_top = d.loc[demand_mask_top, amount_due_col].fillna(0).sum() if amount_due_col in d.columns else 0.0
-    tax_on_demand_top = d.loc[demand_mask_top, tax_col].fillna(0).sum() if tax_col in d.columns else 0.0
+    # Sums over rows with demand generated before today, from the as-of index
+    demand_totals = get_asof_index(dataset).demand_totals(today)
+    due_total_top = demand_totals["amount_due"]
+    tax_on_demand_top = demand_totals["tax"]
     demand_wo_tax_top = due_total_top - tax_on_demand_top
 
-    collection_total_top = d.loc[demand_mask_top, column_map.payment_received_col].fillna(0).sum() if column_map.payment_received_col in d.columns else 0.0
+    collection_total_top = demand_totals["payment"]
 
     chart_df = pd.DataFrame({
         'Metric': ['Amount (Agreement + Corpus)', 'Demand (Without Tax)', 'Collection'],
@@ -74,8 +68,6 @@ def render_ideal_kpi_strip(df, today, column_map: ColumnMapping):
 
     st.divider()
 
-    demand_gen_col = column_map.demand_gen_col
-
     # ---------------- Row 1 ----------------
     st.markdown("#### Property Unit Metrics")
     r1 = st.columns(5)
@@ -106,12 +98,8 @@ def render_ideal_kpi_strip(df, today, column_map: ColumnMapping):
     # ---------------- Row 2 ----------------
     st.markdown("#### Property Sales Metrics")
     r2 = st.columns(3)
-    booking_summary = d.groupby(bid).agg({
-        agreement_col: 'first',
-        other_charges: 'first',
-    }).reset_index() if bid in d.columns else pd.DataFrame()
-    total_agreement_value = booking_summary[agreement_col].fillna(0).sum() if not booking_summary.empty else 0.0
-    total_corpus_maint_bookings = booking_summary[other_charges].fillna(0).sum() if not booking_summary.empty else 0.0
+    total_agreement_value = av_total_top
+    total_corpus_maint_bookings = corpus_total_top
     # Total Amount (Agreement + Corpus), excludes tax per requirement
     total_amount_ac = total_agreement_value + total_corpus_maint_bookings
 
@@ -127,9 +115,8 @@ def render_ideal_kpi_strip(df, today, column_map: ColumnMapping):
     # ---------------- Row 3 ----------------
     st.markdown("#### Property Demand Metrics")
     r3 = st.columns(3)
-    demand_mask = d[demand_gen_col].notna() & (d[demand_gen_col] < today) if demand_gen_col in d.columns else pd.Series(False, index=d.index)
-    total_due = d.loc[demand_mask, amount_due_col].fillna(0).sum() if amount_due_col in d.columns else 0.0
-    total_tax_on_demand = d.loc[demand_mask, tax_col].fillna(0).sum() if tax_col in d.columns else 0.0
+    total_due = demand_totals["amount_due"]
+    total_tax_on_demand = demand_totals["tax"]
     total_demand_generated_without_tax = total_due - total_tax_on_demand
 
     with r3[0]:
@@ -145,7 +132,7 @@ def render_ideal_kpi_strip(df, today, column_map: ColumnMapping):
     st.markdown("#### Property Collection Metrics")
     r4 = st.columns(3)
     # total collection where demand generated
-    total_collection_demand = d.loc[demand_mask, column_map.payment_received_col].fillna(0).sum() if column_map.payment_received_col in d.columns else 0.0
+    total_collection_demand = demand_totals["payment"]
     # % collected from demand due (guard against divide-by-zero)
     pct_collected = (total_collection_demand / total_due * 100.0) if total_due else 0.0
     # total collection without corpus (agreement/corpus from row 2, deduped per booking)
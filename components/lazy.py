@@ -0,0 +1,17 @@
+import streamlit as st
+
+
+def lazy_expander(label: str, key: str, render, *args, **kwargs):
+    """
+    Collapsed expander whose body render(*args, **kwargs) runs only while it is open, so a closed
+    section costs nothing on a rerun. It runs as a fragment: opening or closing it, or using a widget
+    inside it, reruns this section alone instead of the whole page.
+    """
+    _lazy_section(label, key, render, args, kwargs)
+
+
+@st.fragment
+def _lazy_section(label, key, render, args, kwargs):
+    with st.expander(label, key=key, on_change="rerun") as section:
+        if section.open:
+            render(*args, **kwargs)
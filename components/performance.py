@@ -0,0 +1,45 @@
+import pandas as pd
+import streamlit as st
+from services.profiling import Profile, log_profile, profile_log_path, start_profile, stop_profile
+
+
+def start_run_profile():
+    """
+    Sidebar "Performance" toggle. When on, starts profiling this rerun and returns the sidebar slot
+    the panel is drawn into by finish_run_profile; returns None when off (nothing is recorded).
+    """
+    stop_profile()  # left running on this thread if the previous rerun raised
+    st.sidebar.markdown("### ⏱️ Performance")
+    if not st.sidebar.checkbox("Show performance panel", value=False, key="perf_panel",
+                               help="Time every service call and dashboard section of each rerun."):
+        return None
+    trace_memory = st.sidebar.checkbox("Trace memory (slower)", value=False, key="perf_memory")
+    start_profile("rerun", trace_memory=trace_memory)
+    return st.sidebar.container()
+
+
+def finish_run_profile(slot) -> None:
+    """Stop the rerun's profile, draw its per-stage table into slot and append it to the JSON-lines log."""
+    profile = stop_profile()
+    if slot is None or profile is None:
+        return
+    log_profile(profile, source=st.session_state.get("data_source_key"), view=st.session_state.get("view"))
+    with slot:
+        render_performance_panel(profile)
+
+
+def render_performance_panel(profile: Profile) -> None:
+    hits = sum(r.cache == "hit" for r in profile.records)
+    misses = sum(r.cache == "miss" for r in profile.records)
+    st.caption(f"Rerun: {profile.total_ms:,.0f} ms · {len(profile.records)} stages · "
+               f"cache {hits} hit / {misses} miss")
+    table = pd.DataFrame({
+        "Stage": ["· " * r.depth + r.name for r in profile.records],
+        "ms": [r.ms for r in profile.records],
+        "Cache": [r.cache or "" for r in profile.records],
+        "Rows": pd.array([r.rows for r in profile.records], dtype="Int64"),
+    })
+    if profile.trace_memory:
+        table["Mem (MB)"] = [r.mem_mb for r in profile.records]
+    st.dataframe(table, use_container_width=True, hide_index=True)
+    st.caption(f"Logged to {profile_log_path()}")
@@ -0,0 +1,37 @@
+import streamlit as st
+from services.portfolio import ProjectSummary, portfolio_table
+from components.monthly_trend import render_monthly_trend
+
+
+def render_portfolio(summaries: list):
+    """Portfolio roll-up across projects, with drill-down into one project's KPIs, trend and properties."""
+    st.subheader("🗂️ Portfolio Overview")
+    table = portfolio_table(summaries)
+    st.dataframe(table, use_container_width=True, hide_index=True)
+    for s in summaries:
+        if s.error:
+            st.warning(f"⚠️ {s.name}: {s.error}")
+
+    ok = [s for s in summaries if s.error is None]
+    if not ok:
+        return
+    st.markdown("---")
+    names = [s.name for s in ok]
+    selected: ProjectSummary = ok[names.index(st.selectbox("Drill down into project", names, key="portfolio_project"))]
+    st.markdown(f"### 🏢 {selected.name}")
+
+    k = selected.kpis
+    r1 = st.columns(4)
+    r1[0].metric("Total Units", f"{k.total_units:,}")
+    r1[1].metric("Registered", f"{k.units_registered:,}")
+    r1[2].metric("Value of Units", f"₹{k.value_of_units_cr:,.2f} Cr")
+    r1[3].metric("Corpus + Maintenance", f"₹{k.total_corpus_maintenance_cr:,.2f} Cr")
+    r2 = st.columns(4)
+    r2[0].metric("Demand Generated", f"₹{k.total_demand_generated_cr:,.2f} Cr")
+    r2[1].metric("Collected", f"₹{k.total_collection_cr:,.2f} Cr")
+    r2[2].metric("Yet to be Collected", f"₹{k.amount_yet_to_be_collected_cr:,.2f} Cr")
+    r2[3].metric("Tax on Collections", f"₹{k.tax_on_collections_cr:,.2f} Cr")
+
+    render_monthly_trend(selected.trend)
+    with st.expander(f"🏠 Per-Property Metrics ({len(selected.properties)} properties)", expanded=False):
+        st.dataframe(selected.properties, use_container_width=True, hide_index=True)
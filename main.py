@@ -5,15 +5,30 @@ import os
 import sys
 from salesforce.connect import connect_to_salesforce
 from salesforce.report import get_salesforce_report
+from salesforce.partition import fetch_report_partitioned
+from salesforce.snapshot import describe_age, load_snapshot, refresh_snapshot, snapshot_info
 from utils.helper import render_svg
-from components.dashboard import render_dashboard
-from components.check import check
+from components.dashboard import keep_sidebar_state, render_dashboard, warm_dashboard
+from components.check import check, warm_check
+from components.portfolio import render_portfolio
+from components.performance import finish_run_profile, start_run_profile
 from utils.helper import get_column
+from utils.columns import needed_columns
+from services.dataset import fingerprint_frame
+from services.caching import set_cache_backend
+from services.ingest import read_export
+from services.portfolio import Project, compute_portfolio
+from services.profiling import stage
 
 
+VIEWS = ["📊 Collection Dashboard", "🔍 Discrepancies Report"]
+
 # Page configuration
 st.set_page_config(page_title="Tribeca Collection Dashboard", layout="wide", page_icon='assets/logo.webp')
 
+# Service-layer results go to Streamlit's resource cache (in-process, shared across sessions, no pickling)
+set_cache_backend(lambda func: st.cache_resource(ttl=900, max_entries=32, show_spinner=False)(func))
+
 # Initialize session state
 if 'data' not in st.session_state:
     st.session_state.data = None
@@ -26,6 +41,9 @@ today = pd.to_datetime(st.sidebar.date_input(
     key="global_today"
 )).normalize()
 
+# Optional per-stage timings of this rerun (service calls, cache hits/misses, dashboard sections)
+perf_slot = start_run_profile()
+
 # Add freshness indicator
 if st.session_state.data is not None:
     st.sidebar.success(f"📊 Data loaded at {pd.Timestamp.now().strftime('%H:%M')}")
@@ -48,19 +66,81 @@ if "data" not in st.session_state:
 # -------------------- SINGLE SOURCE SELECTION (TOP) --------------------
 st.sidebar.header("📁 Data Source")
 
-data_source = st.sidebar.radio("Select data source:", ["📡 Salesforce Report", "📄 Upload CSV"])
+data_source = st.sidebar.radio("Select data source:", ["📡 Salesforce Report", "📄 Upload CSV", "🗂️ Portfolio"])
 
 
 # Only show one upload/input UI depending on selection
 if data_source == "📡 Salesforce Report":
     report_id = st.sidebar.text_input("Enter Salesforce Report ID:", key="report_id")
-    if report_id and st.session_state.data is None:
+    # Partitioned modes run the report once per slice in parallel, past the API's 2000-row cap
+    fetch_modes = {"Standard": None, "Partitioned by Tower": "tower", "Partitioned by booking year": "booking_year"}
+    fetch_mode = st.sidebar.selectbox("Fetch mode", list(fetch_modes), key="fetch_mode")
+    typed = st.sidebar.checkbox(
+        "Typed cell values", value=True, key="typed_fetch",
+        help="Read amounts and dates as typed values instead of re-parsing their display labels.",
+    )
+    pruned = st.sidebar.checkbox(
+        "Only needed columns", value=True, key="pruned_fetch",
+        help="Ask Salesforce for just the columns the dashboard reads, instead of every column in the report.",
+    )
+    columns = needed_columns() if pruned else None
+    run_async = st.sidebar.checkbox(
+        "Run asynchronously", value=False, key="async_fetch",
+        help="Run the report in the background on Salesforce and poll until it finishes, "
+             "for reports that time out or come back truncated when run directly.",
+    )
+    refresh = force = False
+    if report_id:
+        info = snapshot_info(report_id)
+        if info is not None:
+            now = pd.Timestamp.now()
+            st.sidebar.caption(
+                f"🗂️ Snapshot from {describe_age(now - info['fetched_at'])} · {info['rows']:,} rows"
+                f" · last checked {describe_age(now - info['checked_at'])}"
+            )
+            col_check, col_force = st.sidebar.columns(2)
+            refresh = col_check.button("🔄 Check for updates", key="snapshot_refresh")
+            force = col_force.button("⏬ Force refresh", key="snapshot_force")
+    if report_id and (st.session_state.data is None or refresh or force):
         try:
-            with st.spinner("Fetching Salesforce report..."):
+            snapshot = None if (refresh or force) else load_snapshot(report_id)
+            if snapshot is None:
                 sf = connect_to_salesforce()
-                df = get_salesforce_report(sf, report_id)
-            if not df.empty:
-                st.session_state.data = df
+                by = fetch_modes[fetch_mode]
+                mode = f"{'async:' if run_async else ''}{by or 'standard'}" \
+                       f"{':typed' if typed else ''}{':pruned' if pruned else ''}"
+                if by or run_async:
+                    # Partitions (or report instances) complete one by one; show progress instead of a spinner
+                    progress_bar = st.sidebar.empty()
+
+                    def show_progress(p):
+                        progress_bar.progress(
+                            p.parts_done / max(p.parts_total, 1),
+                            text=f"⏳ {p.rows:,} rows · {p.parts_done}/{p.parts_total} runs · {p.seconds:.0f}s",
+                        )
+
+                    # Pages are parsed as they download (when ijson is installed) to keep peak memory low
+                    fetch = lambda: fetch_report_partitioned(sf, report_id, by=by, typed=typed, stream=True,
+                                                             columns=columns, run_async=run_async, progress=show_progress)
+                    snapshot, refetched = refresh_snapshot(sf, report_id, fetch, mode=mode, force=force)
+                    progress_bar.empty()
+                else:
+                    with st.spinner("Fetching Salesforce report..."):
+                        fetch = lambda: get_salesforce_report(sf, report_id, typed=typed, stream=True, columns=columns)
+                        snapshot, refetched = refresh_snapshot(sf, report_id, fetch, mode=mode, force=force)
+                if snapshot is not None and not refetched:
+                    st.sidebar.info("Report unchanged since the snapshot; kept it.")
+                elif snapshot is not None:
+                    fetch_info = snapshot.frame.attrs.get("fetch", {})
+                    http = fetch_info.get("http", {})
+                    st.sidebar.caption(
+                        f"⏱️ Fetched in {fetch_info.get('seconds', 0):.1f}s · {http.get('requests', 0)} requests"
+                        f" · {http.get('retries', 0)} retries · {http.get('reauthentications', 0)} re-logins"
+                    )
+            if snapshot is not None:
+                st.session_state.data = snapshot.frame
+                st.session_state.data_fingerprint = snapshot.fingerprint
+                st.session_state.data_source_key = f"salesforce:{report_id}"
                 st.success("✅ Report loaded successfully!")
             else:
                 st.warning("⚠️ Report is empty.")
@@ -71,15 +151,43 @@ elif data_source == "📄 Upload CSV":
     uploaded_file = st.sidebar.file_uploader("Upload Main Project File", type=["csv", "xlsx"])
     if uploaded_file and st.session_state.data is None:
         try:
-            if uploaded_file.name.endswith(".csv"):
-                df = pd.read_csv(uploaded_file, encoding="ISO-8859-1")
-            else:
-                df = pd.read_excel(uploaded_file)
+            # Only the columns the dashboard reads, through the fastest installed reader
+            df = read_export(uploaded_file, uploaded_file.name)
+            info = df.attrs["ingest"]
+            st.sidebar.caption(
+                f"⏱️ Read {info['rows']:,} rows × {info['columns']}/{info['columns_total']} columns"
+                f" in {info['seconds']:.1f}s ({info['engine']})"
+            )
             st.session_state.data = df
+            st.session_state.data_fingerprint = fingerprint_frame(df)
+            st.session_state.data_source_key = f"upload:{uploaded_file.name}"
             st.success("✅ File uploaded successfully!")
         except Exception as e:
             st.error(f"❌ Failed to read file: {e}")
 
+elif data_source == "🗂️ Portfolio":
+    # One project per uploaded export or Salesforce report (from its snapshot when there is one)
+    project_files = st.sidebar.file_uploader(
+        "Project files", type=["csv", "xlsx"], accept_multiple_files=True, key="portfolio_files",
+    )
+    report_ids = [r.strip() for r in st.sidebar.text_area(
+        "Salesforce Report IDs (one per line)", key="portfolio_reports").splitlines() if r.strip()]
+    check_reports = bool(report_ids) and st.sidebar.button("🔄 Check reports for updates", key="portfolio_refresh")
+    projects = [Project(Path(f.name).stem, f.getvalue(), file_name=f.name) for f in project_files or []]
+    sf = None
+    for rid in report_ids:
+        snapshot = None if check_reports else load_snapshot(rid)
+        if snapshot is None:
+            try:
+                sf = sf or connect_to_salesforce()
+                with st.spinner(f"Fetching Salesforce report {rid}..."):
+                    fetch = lambda: get_salesforce_report(sf, rid, typed=True, stream=True, columns=needed_columns())
+                    snapshot, _ = refresh_snapshot(sf, rid, fetch, mode="standard:typed:pruned")
+            except Exception as e:
+                st.sidebar.error(f"❌ Failed to load Salesforce report {rid}: {e}")
+        if snapshot is not None:
+            projects.append(Project(f"Report {rid}", snapshot.frame, fingerprint=snapshot.fingerprint))
+
 # -------------------- TABS SECTION (Use loaded data) --------------------
 if st.session_state.data is not None:
     df = st.session_state.data
@@ -109,18 +217,44 @@ if st.session_state.data is not None:
     st.session_state.column_map = colmap
 
 # ------------------ TABS SECTION ------------------
-tab1, tab2 = st.tabs(["Collection Dashboard", "Discrepancies Report"])
+if data_source == "🗂️ Portfolio":
+    st.title("Portfolio")
+    if projects:
+        # Projects are summarized in parallel worker processes; unchanged ones come from memory
+        progress_bar = st.empty()
+        with stage("portfolio: compute_portfolio"):
+            summaries = compute_portfolio(
+                projects, today,
+                progress=lambda done, total: progress_bar.progress(done / total, text=f"⏳ {done}/{total} projects"),
+            )
+        progress_bar.empty()
+        with stage("portfolio: render"):
+            render_portfolio(summaries)
+    else:
+        st.info("ℹ️ Please upload project files or enter report IDs to proceed.")
+    finish_run_profile(perf_slot)
+    st.stop()
+
+# Only the selected view computes and renders on a rerun (st.tabs would run both and hide one on the
+# client); the other view's services are then warmed on a background thread for a fast switch.
+keep_sidebar_state()
+view = st.radio("View", VIEWS, horizontal=True, key="view", label_visibility="collapsed")
 
-with tab1:
+if view == VIEWS[0]:
     st.title("Collection Dashboard")
     if st.session_state.data is not None:
-        render_dashboard(st.session_state.data, today)
+        with stage("view: dashboard"):
+            dataset = render_dashboard(st.session_state.data, today)
+        warm_check(st.session_state.data, dataset, today)
     else:
         st.info("ℹ️ Please upload a file or enter a report ID to proceed.")
-
-with tab2:
+else:
     st.title("Discrepancies Report")
     if st.session_state.data is not None:
-        check(st.session_state.data, today)
+        with stage("view: discrepancies"):
+            dataset = check(st.session_state.data, today)
+        warm_dashboard(dataset, today)
     else:
-        st.info("ℹ️ Please upload a file or enter a report ID to proceed.")
\ No newline at end of file
+        st.info("ℹ️ Please upload a file or enter a report ID to proceed.")
+
+finish_run_profile(perf_slot)
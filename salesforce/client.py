@@ -0,0 +1,165 @@
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# ---------- Salesforce REST client ----------
+# One keep-alive connection pool per org connection. Expired sessions (401) are re-authenticated once
+# through the login callable; throttling (429), server errors (5xx) and dropped connections are retried
+# with exponential backoff and jitter, honouring Retry-After. Every request is timed.
+POOL_SIZE = 8
+REQUEST_TIMEOUT = 120
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+_METRICS_KEPT = 1000
+
+
+class ReportFetchError(RuntimeError):
+    """A report could not be fetched completely."""
+
+
+class SalesforceRequestError(ReportFetchError):
+    """A request still failed after its retries (connection errors, throttling or server errors)."""
+
+
+@dataclass(frozen=True)
+class RequestMetric:
+    started: float           # time.perf_counter() when the request was first sent
+    method: str
+    path: str
+    status: Optional[int]    # None when the connection failed
+    seconds: float           # wall time including retries and backoff
+    attempts: int
+    reauthenticated: bool
+
+
+class SalesforceClient:
+    """
+    Pooled, self-healing stand-in for a simple_salesforce connection: exposes the same session_id and
+    base_url, plus request()/get()/post() that add the bearer token and retry. login returns a fresh
+    simple_salesforce.Salesforce (or anything with session_id and base_url); without it a 401 is final.
+    """
+
+    def __init__(
+        self,
+        login: Callable[[], Any] = None,
+        sf: Any = None,
+        pool_size: int = POOL_SIZE,
+        max_retries: int = MAX_RETRIES,
+        backoff: float = BACKOFF_SECONDS,
+        timeout: float = REQUEST_TIMEOUT,
+    ):
+        if sf is None and login is None:
+            raise ValueError("SalesforceClient needs a login callable or a connected sf")
+        self._login = login
+        self._sf = sf if sf is not None else login()
+        self._auth_lock = threading.Lock()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.reauthentications = 0
+        self.metrics: "deque[RequestMetric]" = deque(maxlen=_METRICS_KEPT)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @property
+    def session_id(self) -> str:
+        return self._sf.session_id
+
+    @property
+    def base_url(self) -> str:
+        return self._sf.base_url
+
+    def _reauthenticate(self, stale_token: str) -> bool:
+        """Log in again unless another thread already replaced stale_token; False if there is no login."""
+        with self._auth_lock:
+            if self._sf.session_id != stale_token:
+                return True
+            if self._login is None:
+                return False
+            self._sf = self._login()
+            self.reauthentications += 1
+            return True
+
+    def _delay(self, attempt: int, response: requests.Response = None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), MAX_BACKOFF_SECONDS)
+        return min(self.backoff * 2 ** attempt, MAX_BACKOFF_SECONDS) * random.uniform(0.5, 1.0)
+
+    def request(self, method: str, url: str, stream: bool = False, **kwargs) -> requests.Response:
+        """
+        Send a request with the current token, retrying as described above. Returns the final response
+        (the caller checks its status); raises SalesforceRequestError if the connection keeps failing.
+        """
+        started = time.perf_counter()
+        extra_headers = kwargs.pop("headers", {})
+        attempt, reauthenticated = 0, False
+        while True:
+            token = self.session_id
+            headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json", **extra_headers}
+            try:
+                response = self.session.request(method, url, headers=headers, timeout=self.timeout,
+                                                stream=stream, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    self._record(method, url, None, started, attempt + 1, reauthenticated)
+                    raise SalesforceRequestError(f"{method} {urlparse(url).path} failed after {attempt + 1} attempts: {e}") from e
+                time.sleep(self._delay(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code == 401 and not reauthenticated:
+                response.close()
+                reauthenticated = True
+                if self._reauthenticate(token):
+                    continue
+            elif response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = self._delay(attempt, response)
+                response.close()
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            self._record(method, url, response.status_code, started, attempt + 1, reauthenticated)
+            return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def _record(self, method, url, status, started, attempts, reauthenticated) -> None:
+        self.metrics.append(RequestMetric(
+            started, method, urlparse(url).path, status, time.perf_counter() - started, attempts, reauthenticated))
+
+    def metrics_summary(self, since: float = 0.0) -> Dict[str, float]:
+        """Totals over the recorded requests, optionally only those sent after time.perf_counter() `since`."""
+        recent: List[RequestMetric] = [m for m in list(self.metrics) if m.started >= since]
+        return {
+            "requests": len(recent),
+            "retries": sum(m.attempts - 1 for m in recent),
+            "reauthentications": sum(m.reauthenticated for m in recent),
+            "failed": sum(m.status is None or m.status >= 400 for m in recent),
+            "seconds": sum(m.seconds for m in recent),
+            "slowest_seconds": max((m.seconds for m in recent), default=0.0),
+        }
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def as_client(sf) -> SalesforceClient:
+    """sf itself if it already is a SalesforceClient, else a client around that connection (no re-login)."""
+    return sf if isinstance(sf, SalesforceClient) else SalesforceClient(sf=sf)
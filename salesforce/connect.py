@@ -1,18 +1,26 @@
 import streamlit as st
 from simple_salesforce import Salesforce, SalesforceAuthenticationFailed
 from requests.exceptions import RequestException
+from salesforce.client import SalesforceClient
 
 @st.cache_resource(show_spinner=False)
 def connect_to_salesforce():
+    """
+    Pooled client for the org in st.secrets. It logs in again by itself when the session expires,
+    so caching it for the life of the process is safe.
+    """
     try:
-        creds = st.secrets["salesforce"]
-        sf = Salesforce(
-            username=creds["username"],
-            password=creds["password"],
-            security_token=creds["security_token"],
-            domain=creds.get("domain", "login")
-        )
-        return sf
+        creds = dict(st.secrets["salesforce"])
+
+        def login():
+            return Salesforce(
+                username=creds["username"],
+                password=creds["password"],
+                security_token=creds["security_token"],
+                domain=creds.get("domain", "login")
+            )
+
+        return SalesforceClient(login)
     except SalesforceAuthenticationFailed:
         st.error("❌ Invalid Salesforce credentials or token.")
         st.stop()
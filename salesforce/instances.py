@@ -0,0 +1,68 @@
+import time
+from salesforce.client import ReportFetchError, SalesforceClient
+from salesforce.report import PAGE_ERRORS, read_page
+
+
+# ---------- Asynchronous report runs ----------
+# POST analytics/reports/<id>/instances queues a run of the report (with an optional reportMetadata
+# override) and returns its instance id; GET .../instances/<instance id> reports New or Running until
+# the run ends, then Success with the full result (or Error). Unlike a synchronous run, the request
+# that starts it cannot time out while the report is computed, so heavy reports and slices that are
+# slow to run still complete. Polling backs off from POLL_SECONDS to MAX_POLL_SECONDS.
+POLL_SECONDS = 0.5
+MAX_POLL_SECONDS = 10.0
+INSTANCE_TIMEOUT = 900.0
+_RUNNING = ("New", "Running")
+
+
+def _instances_url(client: SalesforceClient, report_id: str) -> str:
+    return f"{client.base_url}analytics/reports/{report_id}/instances"
+
+
+def start_instance(client: SalesforceClient, report_id: str, metadata: dict = None) -> str:
+    """Queue an asynchronous run with detail rows; returns the instance id."""
+    body = {"reportMetadata": metadata} if metadata is not None else None
+    response = client.post(f"{_instances_url(client, report_id)}?includeDetails=true", json=body)
+    if response.status_code not in (200, 201):
+        raise ReportFetchError(f"Could not start report instance: {response.status_code} - {response.text[:200]}")
+    return response.json()["id"]
+
+
+def run_instance(
+    client: SalesforceClient,
+    report_id: str,
+    metadata: dict,
+    decode,
+    stream: bool = False,
+    poll: float = POLL_SECONDS,
+    timeout: float = INSTANCE_TIMEOUT,
+):
+    """
+    Run the report as an instance and wait for it: (top-level fields, decode(rows)) of the finished
+    result, as partition._run_details returns for a synchronous run. Raises ReportFetchError if the
+    instance ends in Error or is still running after timeout seconds.
+    """
+    instance_id = start_instance(client, report_id, metadata)
+    url = f"{_instances_url(client, report_id)}/{instance_id}"
+    deadline = time.monotonic() + timeout
+    delay = poll
+    while True:
+        # The poll that sees Success carries the result, so it is read (and streamed) like a page
+        with client.get(url, stream=stream) as response:
+            if response.status_code != 200:
+                raise ReportFetchError(f"Instance {instance_id}: {response.status_code} - {response.text[:200]}")
+            try:
+                data, rows = read_page(response, stream)
+                decoded = decode(rows)
+            except PAGE_ERRORS as e:
+                raise ReportFetchError(f"Instance {instance_id}: unreadable result: {e}") from e
+        status = data.get("attributes", {}).get("status")
+        if status == "Success":
+            return data, decoded
+        if status not in _RUNNING:
+            error = data.get("attributes", {}).get("errorMessage") or status
+            raise ReportFetchError(f"Instance {instance_id} ended with {error}")
+        if time.monotonic() + delay > deadline:
+            raise ReportFetchError(f"Instance {instance_id} still {status} after {timeout:.0f}s")
+        time.sleep(delay)
+        delay = min(delay * 2, MAX_POLL_SECONDS)
@@ -0,0 +1,268 @@
+import copy
+import datetime as dt
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+import pandas as pd
+from utils.columns import COLUMN_CANDIDATES
+from salesforce.client import ReportFetchError, SalesforceClient, as_client
+from salesforce.instances import run_instance
+from salesforce.report import PAGE_ERRORS, TypedColumns, describe_report, label_rows, prune_columns, read_page
+
+
+# ---------- Partitioned report fetch ----------
+# The synchronous Analytics API returns at most 2000 detail rows per run (allData=false beyond that).
+# A partitioned fetch runs the report once per slice (by Tower or booking-date range) with an extra
+# filter injected into its reportMetadata, in parallel over the client's connection pool. Rows are
+# merged in partition order, so the result does not depend on which request finishes first.
+# With run_async each partition runs as a report instance instead (see salesforce.instances).
+MAX_WORKERS = 4
+PROGRESS_SECONDS = 1.0
+
+
+class ReportTruncatedError(ReportFetchError):
+    """Some partition still hit the row cap after splitting as far as it goes."""
+
+
+@dataclass
+class Partition:
+    """One slice of the report: extra filters ANDed onto the report's own, plus the booking-date range it covers."""
+    label: str
+    filters: List[dict]
+    date_range: Optional[Tuple[dt.date, dt.date]] = None   # [start, end) when sliced by booking date
+    splittable: bool = True
+    children: List["Partition"] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class FetchProgress:
+    """Passed to a fetch's progress callback while partitions complete (and every PROGRESS_SECONDS)."""
+    parts_done: int
+    parts_total: int
+    rows: int        # rows in completed, untruncated partitions
+    seconds: float
+
+
+def _report_url(client: SalesforceClient, report_id: str) -> str:
+    return f"{client.base_url}analytics/reports/{report_id}"
+
+
+def column_api_name(describe: dict, field_name: str) -> str:
+    """API name of the detail column whose label matches the ColumnMapping field's candidates."""
+    info = describe.get("reportExtendedMetadata", {}).get("detailColumnInfo", {})
+    by_label = {v.get("label", "").strip(): k for k, v in info.items()}
+    for candidate in COLUMN_CANDIDATES[field_name][1]:
+        if candidate in by_label:
+            return by_label[candidate]
+    raise ReportFetchError(f"Report has no column for {COLUMN_CANDIDATES[field_name][0]}; cannot partition by it")
+
+
+def _with_filters(metadata: dict, filters: List[dict]) -> dict:
+    """Copy of reportMetadata with filters ANDed onto the existing ones (boolean filter logic preserved)."""
+    meta = copy.deepcopy(metadata)
+    existing = meta.get("reportFilters") or []
+    meta["reportFilters"] = existing + filters
+    logic = meta.get("reportBooleanFilter")
+    if logic and filters:
+        added = " AND ".join(str(i) for i in range(len(existing) + 1, len(existing) + len(filters) + 1))
+        meta["reportBooleanFilter"] = f"({logic}) AND {added}"
+    return meta
+
+
+def _quote(value: str) -> str:
+    # Commas separate alternatives in filter values; quote values that contain one
+    return f'"{value}"' if "," in value else value
+
+
+def _run(client: SalesforceClient, report_id: str, metadata: dict, include_details: bool = True) -> dict:
+    url = f"{_report_url(client, report_id)}?includeDetails={'true' if include_details else 'false'}"
+    response = client.post(url, json={"reportMetadata": metadata})
+    if response.status_code != 200:
+        raise ReportFetchError(f"{response.status_code} - {response.text[:200]}")
+    return response.json()
+
+
+def _run_details(client: SalesforceClient, report_id: str, metadata: dict, decode, stream: bool):
+    """Run with detail rows and decode them in this worker: (top-level fields, decode(rows))."""
+    url = f"{_report_url(client, report_id)}?includeDetails=true"
+    with client.post(url, json={"reportMetadata": metadata}, stream=stream) as response:
+        if response.status_code != 200:
+            raise ReportFetchError(f"{response.status_code} - {response.text[:200]}")
+        try:
+            data, rows = read_page(response, stream)
+            decoded = decode(rows)
+        except PAGE_ERRORS as e:
+            raise ReportFetchError(f"Unreadable report page: {e}") from e
+    return data, decoded
+
+
+def discover_groups(client: SalesforceClient, report_id: str, metadata: dict, column: str, granularity: str = "None") -> List[str]:
+    """Distinct values of a column (or date buckets at the given granularity) from one summary run without details."""
+    meta = copy.deepcopy(metadata)
+    meta["reportFormat"] = "SUMMARY"
+    meta["groupingsDown"] = [{"name": column, "sortOrder": "Asc", "dateGranularity": granularity}]
+    meta["groupingsAcross"] = []
+    data = _run(client, report_id, meta, include_details=False)
+    groupings = data.get("groupingsDown", {}).get("groupings", [])
+    return [str(g.get("value") if g.get("value") is not None else g.get("label", "")) for g in groupings]
+
+
+def tower_partitions(towers: List[str], column: str) -> List[Partition]:
+    """One partition per tower plus a remainder (other / blank towers) so no row is lost."""
+    towers = [t for t in towers if t not in ("", "None", "-")]
+    parts = [Partition(f"Tower {t}", [{"column": column, "operator": "equals", "value": _quote(t)}]) for t in towers]
+    rest = [{"column": column, "operator": "notEqual", "value": ",".join(_quote(t) for t in towers)}] if towers else []
+    parts.append(Partition("Tower (other/blank)", rest))
+    return parts
+
+
+def _date_filters(column: str, start: dt.date, end: dt.date) -> List[dict]:
+    return [
+        {"column": column, "operator": "greaterOrEqual", "value": start.isoformat()},
+        {"column": column, "operator": "lessThan", "value": end.isoformat()},
+    ]
+
+
+def booking_year_partitions(years: List[str], column: str, base_filters: List[dict] = None, label: str = "") -> List[Partition]:
+    """One partition per booking year, one for dates outside those years, and one for blank booking dates."""
+    base_filters = base_filters or []
+    found = sorted({int(y[:4]) for y in years if y[:4].isdigit()})
+    parts = [
+        Partition(
+            f"{label}Booking {y}",
+            base_filters + _date_filters(column, dt.date(y, 1, 1), dt.date(y + 1, 1, 1)),
+            (dt.date(y, 1, 1), dt.date(y + 1, 1, 1)),
+        )
+        for y in found
+    ]
+    if found:
+        # Normally empty: only rows added outside the discovered years since discovery land here
+        parts.append(Partition(f"{label}Booking before {found[0]}", base_filters + [
+            {"column": column, "operator": "lessThan", "value": dt.date(found[0], 1, 1).isoformat()}], splittable=False))
+        parts.append(Partition(f"{label}Booking after {found[-1]}", base_filters + [
+            {"column": column, "operator": "greaterOrEqual", "value": dt.date(found[-1] + 1, 1, 1).isoformat()}], splittable=False))
+    parts.append(Partition(
+        f"{label}Booking date blank", base_filters + [{"column": column, "operator": "equals", "value": ""}], splittable=False))
+    return parts
+
+
+def fetch_report_partitioned(
+    sf, report_id: str, by: Optional[str] = "tower", max_workers: int = MAX_WORKERS, typed: bool = False, stream: bool = False,
+    columns: Optional[List[str]] = None, run_async: bool = False, progress: Callable[[FetchProgress], None] = None,
+) -> pd.DataFrame:
+    """
+    Fetch every detail row of a report by running it in partitions concurrently.
+    by="tower" slices by the Tower column, by="booking_year" by booking-date year, by=None runs the
+    whole report as one partition. Partitions that still come back truncated are split by booking
+    date (years, then halves of the range) and re-run. run_async runs every partition as a polled
+    report instance. progress, if given, is called from the calling thread with a FetchProgress.
+    Raises ReportFetchError if any partition fails and ReportTruncatedError if a single day still
+    exceeds the row cap. typed, stream and columns work as in get_salesforce_report; each worker
+    decodes its own pages. sf may be a SalesforceClient (retries, re-login) or a plain connection.
+    Fetch details are kept in df.attrs["fetch"].
+    """
+    client = as_client(sf)
+    started = time.perf_counter()
+    # Partition filters may name columns pruned from the run: filters do not need to be displayed
+    describe = prune_columns(describe_report(client, report_id), columns)
+    metadata = describe.get("reportMetadata", {})
+    date_col = column_api_name(describe, "booking_col")
+    # Partitions run with the describe's own detail columns, so it fixes labels and types up front
+    info = describe.get("reportExtendedMetadata", {}).get("detailColumnInfo", {})
+    labels = [info.get(c, {}).get("label", c) for c in metadata.get("detailColumns", [])]
+    decoder = TypedColumns(describe) if typed else None
+    decode = decoder.decode_rows if typed else label_rows
+
+    if by == "tower":
+        tower_col = column_api_name(describe, "tower_col")
+        roots = tower_partitions(discover_groups(client, report_id, metadata, tower_col), tower_col)
+    elif by == "booking_year":
+        roots = booking_year_partitions(discover_groups(client, report_id, metadata, date_col, "Year"), date_col)
+    elif by is None:
+        roots = [Partition("Report", [])]
+    else:
+        raise ValueError(f"Unknown partitioning '{by}' (expected 'tower', 'booking_year' or None)")
+    run = run_instance if run_async else _run_details
+
+    def split(p: Partition) -> List[Partition]:
+        if not p.splittable:
+            return []
+        if p.date_range is None:
+            years = discover_groups(client, report_id, _with_filters(metadata, p.filters), date_col, "Year")
+            return booking_year_partitions(years, date_col, p.filters, f"{p.label} / ")
+        start, end = p.date_range
+        if (end - start).days <= 1:
+            return []
+        mid = start + (end - start) // 2
+        base = p.filters[:-2]  # drop this range's own two filters
+        return [
+            Partition(f"{p.label} [{start}..{mid})", base + _date_filters(date_col, start, mid), (start, mid)),
+            Partition(f"{p.label} [{mid}..{end})", base + _date_filters(date_col, mid, end), (mid, end)),
+        ]
+
+    rows, failed, truncated = {}, [], []
+    n_requests = n_done = n_rows = 0
+    pending = list(roots)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending:
+            futures = [
+                (p, pool.submit(run, client, report_id, _with_filters(metadata, p.filters), decode, stream))
+                for p in pending
+            ]
+            n_requests += len(futures)
+            pending = []
+            waiting = {f for _, f in futures}
+            while waiting:
+                done, waiting = wait(waiting, timeout=PROGRESS_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    n_done += 1
+                    if future.exception() is None and future.result()[0].get("allData", True):
+                        decoded = future.result()[1]
+                        n_rows += (len(decoded[0]) if decoded else 0) if typed else len(decoded)
+                if progress is not None:
+                    progress(FetchProgress(n_done, n_requests, n_rows, time.perf_counter() - started))
+            for p, future in futures:
+                try:
+                    data, decoded = future.result()
+                except ReportFetchError as e:
+                    failed.append(f"{p.label}: {e}")
+                    continue
+                if data.get("allData", True):
+                    # Pages were decoded in the worker, so only the decoded rows are kept, not the JSON
+                    rows[id(p)] = [decoded] if typed else decoded
+                    continue
+                try:
+                    p.children = split(p)
+                except ReportFetchError as e:
+                    failed.append(f"{p.label}: {e}")
+                    continue
+                if p.children:
+                    pending.extend(p.children)
+                else:
+                    truncated.append(p.label)
+
+    if failed:
+        raise ReportFetchError(f"{len(failed)} partition(s) failed: " + "; ".join(failed))
+    if truncated:
+        raise ReportTruncatedError("Still truncated after splitting: " + ", ".join(truncated))
+
+    def ordered(parts):
+        for p in parts:
+            if p.children:
+                yield from ordered(p.children)
+            else:
+                yield from rows.get(id(p), [])
+
+    if typed:
+        df = decoder.frame(list(ordered(roots)))
+    else:
+        df = pd.DataFrame(list(ordered(roots)), columns=labels)
+    df.attrs["fetch"] = {
+        "mode": f"{'async' if run_async else 'partitioned'}:{by or 'report'}"
+                f"{':typed' if typed else ''}{':pruned' if columns is not None else ''}",
+        "requests": n_requests,
+        "seconds": time.perf_counter() - started,
+        "http": client.metrics_summary(since=started),
+    }
+    return df
@@ -41,61 +41,268 @@
 #         return pd.DataFrame()
 
 
-import requests
+import threading
+import time
+from typing import Iterable, Optional
+import urllib3
+import numpy as np
 import pandas as pd
-import streamlit as st
+from salesforce.client import ReportFetchError, as_client
 
-def get_salesforce_report(sf, report_id):
-    try:
-        headers = {
-            'Authorization': f"Bearer {sf.session_id}",
-            'Content-Type': 'application/json'
-        }
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+except ImportError:  # optional: without it every page is decoded whole with response.json()
+    ijson = None
 
-        base_url = f"{sf.base_url}analytics/reports/{report_id}?includeDetails=true"
-        all_rows = []
-        first_response = requests.get(base_url, headers=headers)
+# What decoding a page can raise: malformed JSON, or the connection dropping mid-body while streaming
+PAGE_ERRORS = (ValueError, urllib3.exceptions.HTTPError) + ((ijson.JSONError,) if ijson is not None else ())
 
-        if first_response.status_code != 200:
-            st.error(f"❌ Initial report fetch failed: {first_response.status_code} - {first_response.text}")
-            return pd.DataFrame()
+# ---------- Column pruning ----------
+# Reports carry far more detail columns than the dashboard reads. Runs can POST a reportMetadata
+# override listing only the needed ones; labels are matched to API names through the report's
+# describe, which rarely changes and is cached per org and report.
+DESCRIBE_MAX_AGE = 900
+_describe_cache = {}
+_describe_lock = threading.Lock()
 
-        # Parse first page
-        response_data = first_response.json()
-        all_rows += extract_rows(response_data)
 
-        # Extract column labels
-        column_metadata = response_data.get("reportMetadata", {}).get("detailColumns", [])
-        column_info = response_data.get("reportExtendedMetadata", {}).get("detailColumnInfo", {})
-        column_labels = [column_info.get(col, {}).get("label", col) for col in column_metadata]
+def describe_report(client, report_id, max_age=DESCRIBE_MAX_AGE):
+    """The report's describe (reportMetadata + detailColumnInfo), reused for max_age seconds. Do not mutate it."""
+    key = (client.base_url, report_id)
+    with _describe_lock:
+        hit = _describe_cache.get(key)
+    if hit is not None and time.monotonic() - hit[0] < max_age:
+        return hit[1]
+    response = client.get(f"{client.base_url}analytics/reports/{report_id}/describe")
+    if response.status_code != 200:
+        raise ReportFetchError(f"Report describe failed: {response.status_code} - {response.text[:200]}")
+    describe = response.json()
+    with _describe_lock:
+        _describe_cache[key] = (time.monotonic(), describe)
+    return describe
 
-        # Handle pagination
-        next_page_url = response_data.get("nextPageUrl")
-        while next_page_url:
-            paged_url = f"{sf.base_url.rstrip('/')}{next_page_url}"
-            response = requests.get(paged_url, headers=headers)
-            if response.status_code != 200:
-                st.warning(f"⚠️ Pagination fetch failed: {response.status_code} - {response.text}")
-                break
 
-            response_data = response.json()
-            all_rows += extract_rows(response_data)
-            next_page_url = response_data.get("nextPageUrl")
+def prune_columns(describe, labels: Optional[Iterable[str]]):
+    """
+    Copy of describe whose reportMetadata keeps only the detail columns labelled with one of labels,
+    in the report's order. labels=None, or no column matching at all, keeps every column.
+    """
+    if labels is None:
+        return describe
+    wanted = {label.strip() for label in labels}
+    metadata = describe.get("reportMetadata", {})
+    info = describe.get("reportExtendedMetadata", {}).get("detailColumnInfo", {})
+    kept = [c for c in metadata.get("detailColumns", []) if info.get(c, {}).get("label", c).strip() in wanted]
+    if not kept:
+        return describe
+    return {**describe, "reportMetadata": {**metadata, "detailColumns": kept}}
 
-        return pd.DataFrame(all_rows, columns=column_labels)
 
-    except Exception as e:
-        st.error(f"❌ Error fetching Salesforce report: {e}")
-        return pd.DataFrame()
+def get_salesforce_report(sf, report_id, typed=False, stream=False, columns=None):
+    """
+    Fetch a report's detail rows. typed=True decodes each cell's typed value straight into
+    float/datetime/categorical columns (see TypedColumns) instead of keeping display labels.
+    stream=True parses each page incrementally while it downloads (see StreamedPage; needs ijson).
+    columns (labels, e.g. utils.columns.needed_columns()) runs the report with only those detail
+    columns; None keeps the report's own. sf may be a SalesforceClient (retries, re-login) or a
+    plain connection. Any page that still fails after retries raises ReportFetchError rather than
+    returning partial data.
+    """
+    client = as_client(sf)
+    started = time.perf_counter()
+    stream = stream and ijson is not None
 
-def extract_rows(response_data):
-    """Extracts data rows from a Salesforce report response"""
-    rows = []
-    fact_map = response_data.get("factMap", {})
-    for key, section in fact_map.items():
+    typed_columns = None
+    request = {}
+    if columns is not None or (typed and stream):
+        describe = prune_columns(describe_report(client, report_id), columns)
+        if columns is not None:
+            # Every page is requested with the same override so its rows keep the pruned layout
+            request = {"json": {"reportMetadata": describe["reportMetadata"]}}
+        if typed and stream:
+            # A streamed page lists its rows before its metadata, so column types come from describe
+            typed_columns = TypedColumns(describe)
+
+    base_url = f"{client.base_url}analytics/reports/{report_id}?includeDetails=true"
+    all_rows = []
+    pages = []
+    column_labels = []
+    next_page_url = None
+    page = 0
+    while page == 0 or next_page_url:
+        url = base_url if page == 0 else f"{client.base_url.rstrip('/')}{next_page_url}"
+        with client.request("POST" if request else "GET", url, stream=stream, **request) as response:
+            if response.status_code != 200:
+                what = "Initial report fetch" if page == 0 else f"Report page {page + 1}"
+                raise ReportFetchError(f"{what} failed: {response.status_code} - {response.text[:200]}")
+            try:
+                response_data, rows = read_page(response, stream)
+                if typed:
+                    typed_columns = typed_columns or TypedColumns(response_data)
+                    pages.append(typed_columns.decode_rows(rows))
+                else:
+                    all_rows += label_rows(rows)
+            except PAGE_ERRORS as e:
+                raise ReportFetchError(f"Unreadable report page {page + 1}: {e}") from e
+
+        if page == 0:
+            # Extract column labels
+            column_metadata = response_data.get("reportMetadata", {}).get("detailColumns", [])
+            column_info = response_data.get("reportExtendedMetadata", {}).get("detailColumnInfo", {})
+            column_labels = [column_info.get(col, {}).get("label", col) for col in column_metadata]
+        next_page_url = response_data.get("nextPageUrl")
+        page += 1
+
+    df = typed_columns.frame(pages) if typed else pd.DataFrame(all_rows, columns=column_labels)
+    df.attrs["fetch"] = {
+        "mode": f"standard{':typed' if typed else ''}{':pruned' if columns is not None else ''}",
+        "requests": page,
+        "seconds": time.perf_counter() - started,
+        "http": client.metrics_summary(since=started),
+    }
+    return df
+
+def detail_rows(response_data):
+    """Yields each detail row's dataCells from a decoded report response"""
+    for key, section in response_data.get("factMap", {}).items():
         if key == "T!T":
             continue
         for row in section.get("rows", []):
-            row_data = [cell.get("label", '') for cell in row.get("dataCells", [])]
-            rows.append(row_data)
-    return rows
+            yield row.get("dataCells", [])
+
+def label_rows(rows):
+    """Display labels of each row of dataCells"""
+    return [[cell.get("label", '') for cell in cells] for cells in rows]
+
+def extract_rows(response_data):
+    """Extracts data rows from a Salesforce report response"""
+    return label_rows(detail_rows(response_data))
+
+
+# ---------- Streaming decode ----------
+def read_page(response, stream=False):
+    """
+    (top-level fields, detail rows) of one report response. When streamed, rows are parsed from the
+    (gzip-decoded) body as they are iterated, and the returned dict is complete once they are exhausted.
+    """
+    if stream and ijson is not None:
+        response.raw.decode_content = True
+        page = StreamedPage(response.raw)
+        return page.data, page.rows()
+    data = response.json()
+    return data, detail_rows(data)
+
+
+class StreamedPage:
+    """
+    One report response parsed incrementally from a byte stream, without building the whole page.
+    rows() yields each detail row's dataCells as soon as it is parsed; every other top-level field
+    (allData, nextPageUrl, reportMetadata, ...) lands in .data, complete once rows() is exhausted.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.data = {}
+
+    def rows(self):
+        builder, target = None, None
+        for prefix, event, value in ijson.parse(self.raw, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == target and event in ("end_map", "end_array"):
+                    if target.startswith("factMap."):
+                        yield builder.value.get("dataCells", [])
+                    else:
+                        self.data[target] = builder.value
+                    builder = None
+            elif event in ("start_map", "start_array"):
+                is_row = prefix.startswith("factMap.") and prefix.endswith(".rows.item")
+                if is_row or (prefix and "." not in prefix and prefix != "factMap"):
+                    builder, target = ObjectBuilder(), prefix
+                    builder.event(event, value)
+            elif prefix and "." not in prefix and event not in ("map_key", "end_map", "end_array"):
+                self.data[prefix] = value
+
+
+# ---------- Typed extraction ----------
+# Report dataTypes decoded from each cell's "value" instead of its display label; anything else
+# (string, picklist, id, reference, email, ...) is kept as its label in a categorical column.
+_NUMERIC_TYPES = {"currency", "double", "int", "percent", "boolean"}
+_DATE_TYPES = {"date"}
+_DATETIME_TYPES = {"datetime"}
+_TYPED = _NUMERIC_TYPES | _DATE_TYPES | _DATETIME_TYPES
+_CHUNK_ROWS = 2000
+
+
+class TypedColumns:
+    """
+    Decoder for report pages into per-column typed arrays, using the column dataTypes in
+    reportExtendedMetadata.detailColumnInfo (of a run or a describe): currency/number/percent/checkbox
+    -> float64, date/datetime -> datetime64, text -> categorical codes against one shared dictionary
+    per column. Decode each page as it arrives and drop the JSON; frame() concatenates the pages in
+    order. Pages may be decoded from several threads.
+    """
+
+    def __init__(self, response_data):
+        detail = response_data.get("reportMetadata", {}).get("detailColumns", [])
+        info = response_data.get("reportExtendedMetadata", {}).get("detailColumnInfo", {})
+        self.labels = [info.get(c, {}).get("label", c) for c in detail]
+        self.kinds = [info.get(c, {}).get("dataType", "string") for c in detail]
+        self._categories = [{} for _ in detail]
+        self._lock = threading.Lock()
+
+    def decode(self, response_data):
+        """One decoded response as a list of arrays, one per column."""
+        return self.decode_rows(detail_rows(response_data))
+
+    def decode_rows(self, rows):
+        """
+        Rows of dataCells (e.g. from StreamedPage.rows()) as a list of arrays, one per column.
+        Cell values are buffered as Python objects for at most _CHUNK_ROWS rows at a time.
+        """
+        text = [kind not in _TYPED for kind in self.kinds]
+        chunks = []
+        columns = [[] for _ in self.kinds]
+        for n, cells in enumerate(rows, 1):
+            for j, cell in enumerate(cells):
+                value = cell.get("value")
+                columns[j].append(cell.get("label", "") if text[j] and value is not None else value)
+            if n % _CHUNK_ROWS == 0:
+                chunks.append(self._to_arrays(columns))
+                columns = [[] for _ in self.kinds]
+        chunks.append(self._to_arrays(columns))
+        return [np.concatenate([chunk[j] for chunk in chunks]) for j in range(len(self.kinds))]
+
+    def _to_arrays(self, columns):
+        # Text codes come from dictionaries shared by every page
+        with self._lock:
+            return [self._to_array(j, values) for j, values in enumerate(columns)]
+
+    def _to_array(self, j, values):
+        kind = self.kinds[j]
+        if kind in _NUMERIC_TYPES:
+            if kind == "currency":
+                values = [v.get("amount") if isinstance(v, dict) else v for v in values]
+            return np.array(values, dtype="float64")
+        if kind in _DATE_TYPES:
+            return np.array(values, dtype="datetime64[us]")
+        if kind in _DATETIME_TYPES:
+            return pd.to_datetime(pd.Series(values, dtype=object), utc=True, format="ISO8601") \
+                .dt.tz_localize(None).to_numpy(dtype="datetime64[us]")
+        lookup = self._categories[j]
+        return np.fromiter(
+            (-1 if v is None else lookup.setdefault(v, len(lookup)) for v in values),
+            dtype="int32", count=len(values),
+        )
+
+    def frame(self, pages):
+        data = {}
+        for j, label in enumerate(self.labels):
+            parts = [page[j] for page in pages]
+            column = np.concatenate(parts) if parts else np.array([])
+            if self.kinds[j] in _TYPED:
+                data[label] = column
+            else:
+                data[label] = pd.Categorical.from_codes(column.astype("int32"), categories=list(self._categories[j]))
+        return pd.DataFrame(data, columns=self.labels)
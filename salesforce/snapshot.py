@@ -0,0 +1,158 @@
+import json
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+import pandas as pd
+from salesforce.client import ReportFetchError, as_client
+from services.dataset import fingerprint_frame
+from utils.paths import cache_dir
+
+
+# ---------- Local report snapshots ----------
+# Each fetched report is kept as <report id>.parquet plus a <report id>.json sidecar (fetch time, fetch
+# mode, content fingerprint and the report's change signature), so a new session loads it from disk
+# instead of re-downloading. A refresh compares the signature first and re-fetches only when it moved.
+_SNAPSHOT_DIR = "snapshots"
+
+
+@dataclass
+class Snapshot:
+    report_id: str
+    frame: pd.DataFrame
+    fetched_at: pd.Timestamp
+    checked_at: pd.Timestamp
+    fingerprint: str
+    mode: str
+    signature: Optional[dict]
+
+    def age(self, now: pd.Timestamp = None) -> pd.Timedelta:
+        return (now or pd.Timestamp.now()) - self.fetched_at
+
+
+def _paths(report_id: str):
+    base = cache_dir(_SNAPSHOT_DIR)
+    safe = "".join(ch for ch in report_id if ch.isalnum())
+    return base / f"{safe}.parquet", base / f"{safe}.json"
+
+
+def report_signature(sf, report_id: str) -> Optional[dict]:
+    """
+    Cheap change marker for a report: the definition's LastModifiedDate and the grand-total aggregates
+    of a run without detail rows (these move when the underlying records do). None if unavailable.
+    """
+    client = as_client(sf)
+    signature = {}
+    try:
+        response = client.get(f"{client.base_url}sobjects/Report/{report_id}?fields=LastModifiedDate")
+        if response.status_code == 200:
+            signature["last_modified"] = response.json().get("LastModifiedDate")
+        response = client.get(f"{client.base_url}analytics/reports/{report_id}?includeDetails=false")
+        if response.status_code == 200:
+            totals = response.json().get("factMap", {}).get("T!T", {}).get("aggregates", [])
+            signature["totals"] = [a.get("value") for a in totals]
+    except (ReportFetchError, ValueError):
+        return None
+    return signature if "totals" in signature else None
+
+
+def snapshot_info(report_id: str) -> Optional[dict]:
+    """Sidecar metadata of the report's snapshot (no frame read); None if there is none."""
+    _, meta_path = _paths(report_id)
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if meta.get("fingerprint") is None or not _paths(report_id)[0].exists():
+        return None
+    meta["fetched_at"] = pd.Timestamp(meta["fetched_at"])
+    meta["checked_at"] = pd.Timestamp(meta.get("checked_at", meta["fetched_at"]))
+    return meta
+
+
+def load_snapshot(report_id: str) -> Optional[Snapshot]:
+    meta = snapshot_info(report_id)
+    if meta is None:
+        return None
+    try:
+        frame = pd.read_parquet(_paths(report_id)[0])
+    except (OSError, ValueError, ImportError):
+        return None
+    return Snapshot(
+        report_id=report_id,
+        frame=frame,
+        fetched_at=meta["fetched_at"],
+        checked_at=meta["checked_at"],
+        fingerprint=meta["fingerprint"],
+        mode=meta.get("mode", ""),
+        signature=meta.get("signature"),
+    )
+
+
+def _write_meta(snapshot: Snapshot) -> None:
+    _, meta_path = _paths(snapshot.report_id)
+    tmp = meta_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({
+        "report_id": snapshot.report_id,
+        "fetched_at": snapshot.fetched_at.isoformat(),
+        "checked_at": snapshot.checked_at.isoformat(),
+        "fingerprint": snapshot.fingerprint,
+        "mode": snapshot.mode,
+        "signature": snapshot.signature,
+        "rows": len(snapshot.frame),
+        "columns": list(snapshot.frame.columns),
+    }, indent=1), encoding="utf-8")
+    tmp.replace(meta_path)
+
+
+def save_snapshot(report_id: str, df: pd.DataFrame, signature: Optional[dict], mode: str) -> Snapshot:
+    now = pd.Timestamp.now()
+    snapshot = Snapshot(report_id, df, now, now, fingerprint_frame(df), mode, signature)
+    data_path, _ = _paths(report_id)
+    try:
+        tmp = data_path.with_suffix(".tmp")
+        df.to_parquet(tmp, index=False)
+        tmp.replace(data_path)
+        _write_meta(snapshot)
+    except (OSError, ValueError, ImportError):
+        pass  # read-only deployments (or no pyarrow) just skip the snapshot
+    return snapshot
+
+
+def refresh_snapshot(
+    sf,
+    report_id: str,
+    fetch: Callable[[], pd.DataFrame],
+    mode: str = "",
+    force: bool = False,
+) -> Tuple[Optional[Snapshot], bool]:
+    """
+    Bring the report's snapshot up to date. Unless force is set, an existing snapshot whose signature
+    still matches (and was fetched the same way) is kept without downloading. Returns
+    (snapshot, refetched); the snapshot is None if the fetch came back empty and none existed.
+    """
+    current = load_snapshot(report_id)
+    signature = report_signature(sf, report_id)
+    if current is not None and not force and signature is not None \
+            and signature == current.signature and mode == current.mode:
+        current.checked_at = pd.Timestamp.now()
+        try:
+            _write_meta(current)
+        except OSError:
+            pass
+        return current, False
+
+    df = fetch()
+    if df.empty:
+        return current, False
+    df.columns = df.columns.str.strip()
+    return save_snapshot(report_id, df, signature, mode), True
+
+
+def describe_age(age: pd.Timedelta) -> str:
+    minutes = int(age.total_seconds() // 60)
+    if minutes < 1:
+        return "just now"
+    if minutes < 60:
+        return f"{minutes} min ago"
+    if minutes < 48 * 60:
+        return f"{minutes // 60} h {minutes % 60} min ago"
+    return f"{minutes // (24 * 60)} days ago"
@@ -0,0 +1,81 @@
+import argparse
+import sys
+import time
+from dataclasses import asdict
+import numpy as np
+import pandas as pd
+from streamlit.logger import set_log_level
+from utils.columns import needed_columns, resolve_column_map
+from services.caching import set_cache_backend
+from services.compute import compute_kpis
+from services.dataset import fingerprint_frame, register_dataset
+from salesforce.client import SalesforceClient
+from salesforce.partition import fetch_report_partitioned
+from salesforce.report import get_salesforce_report
+from scripts.mock_salesforce import MockAnalytics
+
+# Whole-report vs column-pruned fetch from the local mock Analytics endpoint, padded with unused
+# columns like the production reports: bytes on the wire, fetch + decode time and frame memory.
+# Both must give the same KPIs, and the describe behind the pruning must be fetched once.
+# Exits 1 if any check fails.
+# Usage: python -m scripts.bench_column_pruning [--rows 20000] [--extra 45]
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=20_000)
+parser.add_argument("--extra", type=int, default=45, help="unused columns added to the mock report")
+args = parser.parse_args()
+set_log_level("error")
+set_cache_backend(None)
+TODAY = pd.Timestamp("2025-06-30")
+failures = []
+
+
+def expect(ok: bool, what: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {what}")
+    if not ok:
+        failures.append(what)
+
+
+def kpis(df: pd.DataFrame) -> dict:
+    dataset = register_dataset(df, resolve_column_map(df.columns), fingerprint=fingerprint_frame(df))
+    return asdict(compute_kpis(dataset, TODAY))
+
+
+with MockAnalytics(rows=args.rows, row_limit=10 ** 9, latency=0.0, per_row=0.0, extra_columns=args.extra) as api:
+    describes = []
+    api.faults.append(lambda r: describes.append(r) if r.path.endswith("/describe") else None)
+    client = SalesforceClient(login=api.login)
+    print(f"Mock report: {len(api.frame):,} rows, {len(api.frame.columns)} columns")
+    print("mode, columns, wire (MB), fetch + decode (s), frame (MB)")
+    frames = {}
+    fetches = {
+        "standard": lambda cols: get_salesforce_report(client, api.report_id, typed=True, stream=True, columns=cols),
+        "partitioned:tower": lambda cols: fetch_report_partitioned(client, api.report_id, typed=True, stream=True,
+                                                                   columns=cols),
+    }
+    for name, fetch in fetches.items():
+        for pruned in (False, True):
+            cols = needed_columns() if pruned else None
+            fetch(cols)  # warm-up
+            api.bytes_sent = 0
+            t0 = time.perf_counter()
+            df = fetch(cols)
+            seconds = time.perf_counter() - t0
+            frames[(name, pruned)] = df
+            size = df.memory_usage(deep=True).sum() / 1e6
+            print(f"{name}{':pruned' if pruned else ''}, {len(df.columns)}, {api.bytes_sent / 1e6:.1f}, "
+                  f"{seconds:.2f}, {size:.1f}")
+
+    print("\nChecks")
+    wanted = [c for c in api.frame.columns if c in set(needed_columns())]
+    truth = kpis(api.frame)
+    for name in fetches:
+        full, pruned = frames[(name, False)], frames[(name, True)]
+        expect(len(full) == len(pruned) == len(api.frame), f"{name}: both return every row")
+        expect(list(pruned.columns) == wanted, f"{name}: pruned frame has only the needed columns, in report order")
+        expect(pruned.equals(full[wanted]), f"{name}: pruned columns are identical to the whole report's")
+        same = all(np.isclose(kpis(pruned)[k], truth[k], rtol=1e-9) for k in truth)
+        expect(same, f"{name}: KPIs match the source records")
+    expect(len(describes) == 1, f"describe fetched once across {2 * len(fetches)} runs ({len(describes)})")
+
+print(f"\n{'All checks passed' if not failures else f'{len(failures)} check(s) failed'}")
+sys.exit(1 if failures else 0)
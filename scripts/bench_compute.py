@@ -0,0 +1,163 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from utils.columns import resolve_column_map
+from services.caching import set_cache_backend
+from services.dataset import fingerprint_frame, preprocess_df, register_dataset
+from services.compute import compute_kpis, compute_monthly_trend, compute_property_metrics, compute_working_data
+from services.validation import run_validations
+from services.discrepancies import run_discrepancy_checks
+from services.ageing import compute_ageing
+from services.tables import compute_outstanding_by_booking, compute_overdue_customers
+from scripts.synthetic import generate_export
+
+# Wall time and peak traced memory of the compute layer on synthetic exports.
+# Usage: python -m scripts.bench_compute                          (10k / 100k / 1M rows)
+#        python -m scripts.bench_compute --sizes 10000,100000 --save bench_baseline.json
+#        python -m scripts.bench_compute --compare bench_baseline.json [--tolerance 0.25] [--skip check]
+# Every compute function runs cold (fresh registry entry, nothing derived yet), as on a new upload.
+# Time and memory come from separate runs; tracemalloc slows Python-heavy code down.
+
+TODAY = pd.Timestamp("2025-06-30")
+MILESTONES = 10
+
+
+def _check(df, column_map, today):
+    # Discrepancies Report; outside `streamlit run` its st.* calls are no-ops
+    from streamlit.logger import set_log_level
+    from components.check import check
+    set_log_level("error")
+    check(df, today)
+
+
+def _cases(raw: pd.DataFrame, column_map, fingerprint: str):
+    """name -> (setup, run): setup returns run's argument, built outside the measurement."""
+    counter = iter(range(1_000_000))
+
+    def fresh():
+        # A new registry key gives a cold dataset without re-timing preprocessing
+        return register_dataset(raw, column_map, fingerprint=f"{fingerprint}-{next(counter)}")
+
+    return {
+        "preprocess_df": (lambda: raw, lambda df: preprocess_df(df, column_map)),
+        "compute_kpis": (fresh, lambda ds: compute_kpis(ds, TODAY)),
+        "compute_working_data": (fresh, lambda ds: compute_working_data(ds, TODAY)),
+        "compute_monthly_trend": (fresh, lambda ds: compute_monthly_trend(ds, TODAY)),
+        "compute_property_metrics": (fresh, lambda ds: compute_property_metrics(ds, TODAY)),
+        "compute_ageing": (fresh, lambda ds: compute_ageing(ds, TODAY, 1000)),
+        "compute_outstanding_by_booking": (fresh, lambda ds: compute_outstanding_by_booking(ds)),
+        "compute_overdue_customers": (fresh, lambda ds: compute_overdue_customers(ds, TODAY, 1000)),
+        "run_validations": (fresh, lambda ds: run_validations(ds)),
+        "run_discrepancy_checks": (fresh, lambda ds: run_discrepancy_checks(ds, TODAY, "Amount Percent")),
+        "check": (lambda: raw.copy(), lambda df: _check(df, column_map, TODAY)),
+    }
+
+
+def measure(setup, run, repeat: int) -> dict:
+    """Best-of-repeat wall time, then peak traced memory of one more run."""
+    seconds = float("inf")
+    for _ in range(repeat):
+        arg = setup()
+        t0 = time.perf_counter()
+        run(arg)
+        seconds = min(seconds, time.perf_counter() - t0)
+
+    arg = setup()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    run(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(seconds, 4), "peak_mb": round(peak / 2**20, 2)}
+
+
+def run_suite(sizes, skip, repeat: int) -> dict:
+    results = {}
+    for rows in sizes:
+        raw = generate_export(max(rows // MILESTONES, 1), MILESTONES, seed=rows)
+        column_map = resolve_column_map(raw.columns)
+        fingerprint = fingerprint_frame(raw)
+        if not results:
+            # Warm-up: imports, remembered date formats and other one-time costs stay out of the numbers
+            for setup, run in _cases(raw, column_map, fingerprint + "-warmup").values():
+                run(setup())
+        print(f"\n{len(raw):,} rows ({raw.memory_usage(deep=True).sum() / 2**20:.0f} MB raw)")
+        results[str(rows)] = {}
+        for name, (setup, run) in _cases(raw, column_map, fingerprint).items():
+            if name in skip:
+                continue
+            r = measure(setup, run, repeat)
+            results[str(rows)][name] = r
+            print(f"  {name:<30} {r['seconds']:>9.3f} s {r['peak_mb']:>10.1f} MB peak")
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float, min_seconds: float) -> list:
+    """Regressions: slower or bigger than baseline by more than tolerance (tiny timings ignored)."""
+    regressions = []
+    print(f"\nvs baseline (tolerance {tolerance:.0%})")
+    for rows, funcs in current.items():
+        for name, r in funcs.items():
+            old = baseline.get(rows, {}).get(name)
+            if old is None:
+                continue
+            dt = r["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+            dm = r["peak_mb"] / old["peak_mb"] if old["peak_mb"] else 1.0
+            slow = dt > 1 + tolerance and r["seconds"] - old["seconds"] > min_seconds
+            big = dm > 1 + tolerance and r["peak_mb"] - old["peak_mb"] > 1.0
+            flag = "REGRESSION" if slow or big else "ok"
+            print(f"  {int(rows):>9,} {name:<30} time x{dt:5.2f}  memory x{dm:5.2f}  {flag}")
+            if slow or big:
+                regressions.append((rows, name))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the compute layer on synthetic exports.")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated row counts")
+    parser.add_argument("--skip", default="", help="Comma-separated functions to skip (e.g. check)")
+    parser.add_argument("--save", type=Path, help="Write results to this JSON baseline")
+    parser.add_argument("--compare", type=Path, help="Compare against a saved baseline; exit 1 on regressions")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per function (best is kept)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown / growth (0.25 = 25%%)")
+    parser.add_argument("--min-seconds", type=float, default=0.01, help="Ignore time regressions smaller than this")
+    args = parser.parse_args(argv)
+
+    # Cold numbers: no result caching between calls
+    set_cache_backend(None)
+    warnings.simplefilter("ignore")
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    results = run_suite(sizes, set(filter(None, args.skip.split(","))), args.repeat)
+
+    if args.save:
+        args.save.write_text(json.dumps({
+            "meta": {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "pandas": pd.__version__,
+                "numpy": np.__version__,
+                "machine": platform.machine(),
+            },
+            "results": results,
+        }, indent=1))
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+        regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+        if regressions:
+            print(f"{len(regressions)} regression(s)")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
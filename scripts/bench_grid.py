@@ -0,0 +1,110 @@
+import argparse
+import sys
+import time
+import tracemalloc
+import pandas as pd
+import pyarrow as pa
+from utils.columns import resolve_column_map
+from services.caching import set_cache_backend
+from services.dataset import fingerprint_frame, register_dataset
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+from services.grid import CSV_CHUNK_ROWS, ColumnFilter, GridQuery, iter_csv, page_rows, select_rows
+from services.tables import compute_working_table
+from components.grid import _csv_bytes
+from scripts.synthetic import generate_export
+
+# The server-side grid on the raw working table (one row per milestone): search, filter, sort and page
+# turns against plain pandas, and the download button's CSV against to_csv().encode(). Checks that the
+# grid selects the same rows, that page turns reuse the query's positions, that a page is a small
+# fraction of the table, and that the download data is accepted by Streamlit, identical and peaks lower
+# (the button keeps the whole file in memory; chunking only avoids the extra str copy). Exits 1 if any check fails.
+# Usage: python -m scripts.bench_grid [--bookings 20000]
+TODAY = pd.Timestamp("2025-06-30")
+PAGE_SIZE = 100
+failures = []
+
+
+def expect(ok: bool, what: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {what}")
+    if not ok:
+        failures.append(what)
+
+
+def _same(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    try:
+        pd.testing.assert_frame_equal(a, b, check_categorical=False)
+        return True
+    except AssertionError:
+        return False
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=20_000, help="x10 milestone rows")
+    args = parser.parse_args()
+
+    set_cache_backend(None)
+    raw = generate_export(args.bookings, messy=True)
+    column_map = resolve_column_map(raw.columns)
+    dataset = register_dataset(raw, column_map, fingerprint=fingerprint_frame(raw))
+    table = compute_working_table(dataset, TODAY)
+    booking, customer, prop = column_map.application_booking_id, column_map.customer_name, column_map.property_name
+    print(f"working table: {len(table):,} rows x {table.shape[1]} columns")
+
+    tower = table[column_map.tower_col].dropna().iloc[0]
+    query = GridQuery(
+        search="0001", search_columns=(booking, customer, prop),
+        filters=(ColumnFilter(column_map.tower_col, values=(tower,)), ColumnFilter(column_map.amount_due_col, low=1.0)),
+        sort_by=column_map.amount_due_col, ascending=False,
+    )
+    t0 = time.perf_counter()
+    positions = select_rows(table, query)
+    t_query = time.perf_counter() - t0
+
+    text = table[[booking, customer, prop]].astype(str).apply(lambda s: s.str.lower().str.contains("0001", regex=False))
+    reference = table[text.any(axis=1) & (table[column_map.tower_col] == tower) & (table[column_map.amount_due_col] >= 1.0)]
+    reference = reference.sort_values(column_map.amount_due_col, ascending=False, kind="stable", na_position="last")
+    expect(_same(page_rows(table, positions, 0, len(table)), reference),
+           f"search + filters + sort select the same {len(reference):,} rows as pandas ({t_query * 1000:.0f} ms)")
+
+    t0 = time.perf_counter()
+    again = select_rows(table, query)
+    page = page_rows(table, again, 1, PAGE_SIZE)
+    t_page = time.perf_counter() - t0
+    expect(again is positions, f"turning a page reuses the query's positions ({t_page * 1000:.2f} ms)")
+    expect(_same(page, reference.iloc[PAGE_SIZE:2 * PAGE_SIZE]), "page 2 is rows 101-200 of the result")
+
+    full = select_rows(table, GridQuery())
+    first = page_rows(table, full, 0, PAGE_SIZE)
+    # What st.dataframe sends: the frame as Arrow
+    share = pa.Table.from_pandas(first).nbytes / pa.Table.from_pandas(table).nbytes
+    expect(share < 0.01, f"a {PAGE_SIZE}-row page is {share:.3%} of the whole table as Arrow")
+
+    in_memory = table.to_csv(index=False).encode("utf-8")
+    expect(b"".join(iter_csv(table)) == in_memory, "chunked CSV is byte-identical to to_csv()")
+    expect(b"".join(iter_csv(table, positions)) == reference.to_csv(index=False).encode("utf-8"),
+           "chunked CSV of a query keeps its rows and order")
+    del in_memory
+
+    # What the download button does with the data the grid hands it
+    data, _ = convert_data_to_bytes_and_infer_mime(_csv_bytes(table, positions), TypeError("unsupported download data"))
+    expect(data == reference.to_csv(index=False).encode("utf-8"), "download data is accepted by Streamlit and matches the query")
+
+    tracemalloc.start()
+    table.to_csv(index=False).encode("utf-8")
+    peak_full = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    tracemalloc.start()
+    convert_data_to_bytes_and_infer_mime(_csv_bytes(table, None), TypeError("unsupported download data"))
+    peak_chunked = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"  CSV download peak: {peak_full / 2**20:.0f} MB with to_csv().encode(), {peak_chunked / 2**20:.0f} MB chunked")
+    if len(table) > 4 * CSV_CHUNK_ROWS:
+        expect(peak_chunked < 0.75 * peak_full, "chunked download peaks lower than to_csv().encode()")
+
+    print(f"\n{'All checks passed' if not failures else f'{len(failures)} check(s) failed'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import argparse
+import sys
+import time
+from dataclasses import asdict
+import numpy as np
+import pandas as pd
+from streamlit.logger import set_log_level
+from utils.columns import needed_columns, resolve_column_map
+from services.caching import set_cache_backend
+from services.compute import compute_kpis
+from services.dataset import fingerprint_frame, register_dataset
+from services.ingest import default_engine, read_export
+from scripts.synthetic import generate_export, pad_columns
+from utils.paths import cache_dir
+
+# Upload ingest: pd.read_csv / pd.read_excel with defaults (what the app did) vs services.ingest.read_export
+# on a messy synthetic export padded with unused columns, each followed by preprocessing. Both must give
+# the same KPIs. Fixture files are written once to the cache dir. Exits 1 if any check fails.
+# Usage: python -m scripts.bench_ingest [--bookings 10000] [--extra 40] [--xlsx-bookings 2000]
+parser = argparse.ArgumentParser()
+parser.add_argument("--bookings", type=int, default=10_000, help="CSV size (x10 milestone rows)")
+parser.add_argument("--xlsx-bookings", type=int, default=2_000, help="XLSX size (x10 milestone rows)")
+parser.add_argument("--extra", type=int, default=40, help="unused columns added to the export")
+args = parser.parse_args()
+set_log_level("error")
+set_cache_backend(None)
+TODAY = pd.Timestamp("2025-06-30")
+failures = []
+
+
+def expect(ok: bool, what: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {what}")
+    if not ok:
+        failures.append(what)
+
+
+def fixture(fmt: str, bookings: int):
+    path = cache_dir("fixtures") / f"export_{bookings}_{args.extra}.{fmt}"
+    if not path.exists():
+        print(f"Writing {path} ...")
+        df = pad_columns(generate_export(bookings, messy=True), args.extra)
+        if fmt == "csv":
+            df.to_csv(path, index=False, encoding="ISO-8859-1", errors="replace")
+        else:
+            df.to_excel(path, index=False)
+    return path
+
+
+def baseline(path):
+    df = pd.read_csv(path, encoding="ISO-8859-1") if path.suffix == ".csv" else pd.read_excel(path)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def preprocess(df: pd.DataFrame, name: str):
+    t0 = time.perf_counter()
+    dataset = register_dataset(df, resolve_column_map(df.columns), fingerprint=fingerprint_frame(df), source=name)
+    return asdict(compute_kpis(dataset, TODAY)), time.perf_counter() - t0
+
+
+print("file, reader, columns, read (s), preprocess + KPIs (s), frame (MB)")
+xlsx_engines = ("openpyxl", "calamine") if default_engine("xlsx") == "calamine" else ("openpyxl",)
+for fmt, bookings, engines in (("csv", args.bookings, ("c", "pyarrow")), ("xlsx", args.xlsx_bookings, xlsx_engines)):
+    path = fixture(fmt, bookings)
+    t0 = time.perf_counter()
+    df = baseline(path)
+    t_read = time.perf_counter() - t0
+    truth, t_pre = preprocess(df, f"bench:{path.name}")
+    all_columns = list(df.columns)
+    print(f"{path.name}, pandas defaults, {len(df.columns)}, {t_read:.2f}, {t_pre:.2f}, "
+          f"{df.memory_usage(deep=True).sum() / 1e6:.1f}")
+    for engine in engines:
+        df = read_export(path, engine=engine)
+        kpis, t_pre = preprocess(df, f"bench:{path.name}")
+        info = df.attrs["ingest"]
+        print(f"{path.name}, read_export {engine}, {info['columns']}/{info['columns_total']}, {info['seconds']:.2f}, "
+              f"{t_pre:.2f}, {df.memory_usage(deep=True).sum() / 1e6:.1f}")
+        expect(list(df.columns) == [c for c in all_columns if c in set(needed_columns())],
+               f"{fmt} {engine}: only the needed columns, in file order")
+        expect(all(np.isclose(kpis[k], truth[k], rtol=1e-9) for k in truth), f"{fmt} {engine}: same KPIs")
+
+# An export with an unrecognised header is read whole, so the sidebar can offer every column
+path = cache_dir("fixtures") / "export_renamed.csv"
+generate_export(50).rename(columns={"Booking Date": "Date of Booking"}).to_csv(path, index=False)
+df = read_export(path)
+expect("Date of Booking" in df.columns and len(df.columns) == df.attrs["ingest"]["columns_total"],
+       "unresolved field: every column is read")
+df = read_export(path.open("rb"), name=path.name, engine="c", keep=["Date of Booking"])
+expect(df.attrs["ingest"]["engine"] == "c" and len(df) == 500, "file objects and explicit engines work")
+
+print(f"\n{'All checks passed' if not failures else f'{len(failures)} check(s) failed'}")
+sys.exit(1 if failures else 0)
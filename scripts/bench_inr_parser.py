@@ -0,0 +1,53 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from utils.currency import parse_inr, parse_inr_with_failures
+from scripts.synthetic import format_inr as inr
+
+# Benchmark the shared INR parser against the old regex approach.
+# Usage: python -m scripts.bench_inr_parser [cells]   (default 1,000,000)
+n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+rng = np.random.default_rng(0)
+
+
+def legacy(series):
+    return pd.to_numeric(series.astype(str).str.replace(r'[₹,]', '', regex=True), errors='coerce')
+
+
+# A few thousand distinct amounts repeated across milestone rows, like a real export
+amounts = np.round(rng.uniform(1e3, 5e7, 5000), 2)
+picked = amounts[rng.integers(0, len(amounts), n)]
+styles = rng.integers(0, 4, n)
+cells = np.empty(n, dtype=object)
+cells[styles == 0] = picked[styles == 0]
+cells[styles == 1] = [f"₹{inr(x)}" for x in picked[styles == 1]]
+cells[styles == 2] = [f"{x:,.2f}" for x in picked[styles == 2]]
+cells[styles == 3] = None
+
+cases = {
+    "mixed ₹/plain/null object column": pd.Series(cells, dtype=object),
+    "all ₹ strings (report labels)": pd.Series([f"₹{inr(x)}" for x in picked], dtype=object),
+    "already numeric float column": pd.Series(picked),
+}
+
+print(f"INR parser benchmark ({n:,} cells)")
+print("case, legacy regex (s), parse_inr (s), speedup")
+for name, series in cases.items():
+    t0 = time.perf_counter()
+    old = legacy(series)
+    t_old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = parse_inr(series)
+    t_new = time.perf_counter() - t0
+
+    # Both must agree wherever the legacy approach could parse the cell
+    ok = old.notna()
+    assert np.allclose(old[ok].to_numpy(dtype='float64'), new[ok].to_numpy()), name
+    print(f"{name}, {t_old:.3f}, {t_new:.3f}, {t_old / t_new:.1f}x")
+
+# Formats the legacy approach cannot read
+extra = pd.Series(["(1,23,456.00)", "₹ 12,34,56,789", "1 000", "abc", None], dtype=object)
+values, failures = parse_inr_with_failures(extra)
+print("negatives / spaces:", values.tolist(), f"failures={failures}")
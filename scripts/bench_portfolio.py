@@ -0,0 +1,82 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from services.portfolio import Project, compute_portfolio, compute_project, portfolio_table
+from scripts.synthetic import generate_export
+from utils.paths import cache_dir
+
+# Portfolio mode: --projects synthetic exports of different sizes summarized one after another in this
+# process, then concurrently on a process pool. Checks that both give the same roll-up, that a second
+# call comes from memory and that changing one project recomputes only that one. The pool can only beat
+# the serial run with more than one CPU. Exits 1 if any check fails.
+# Usage: python -m scripts.bench_portfolio [--projects 4] [--bookings 5000] [--workers 4]
+TODAY = pd.Timestamp("2025-06-30")
+failures = []
+
+
+def expect(ok: bool, what: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {what}")
+    if not ok:
+        failures.append(what)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=4)
+    parser.add_argument("--bookings", type=int, default=5_000, help="largest project (x10 milestone rows)")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    paths = []
+    for i in range(args.projects):
+        bookings = args.bookings * (i + 1) // args.projects
+        path = cache_dir("fixtures") / f"project_{i}_{bookings}.csv"
+        if not path.exists():
+            generate_export(bookings, seed=i).to_csv(path, index=False)
+        paths.append(path)
+    run = int(time.time())
+    projects = [Project(f"P{i}-{run}", str(p)) for i, p in enumerate(paths)]
+    keys = [p.content_key() for p in projects]
+
+    t0 = time.perf_counter()
+    serial = [compute_project(p, k, TODAY) for p, k in zip(projects, keys)]
+    t_serial = time.perf_counter() - t0
+    slowest = max(s.seconds for s in serial)
+    print(f"{args.projects} projects on {os.cpu_count()} CPU(s): serial {t_serial:.2f} s, slowest project {slowest:.2f} s")
+
+    with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Start the workers first: interpreter start-up is paid once per app process, not per portfolio
+        list(pool.map(abs, range(args.workers)))
+        t0 = time.perf_counter()
+        pooled = compute_portfolio(projects, TODAY, executor=pool)
+        t_pool = time.perf_counter() - t0
+        print(f"  process pool x{args.workers}: {t_pool:.2f} s")
+        expect(all(s.error is None for s in pooled), "every project computed")
+        expect(portfolio_table(serial).drop(columns="Compute (s)").equals(portfolio_table(pooled).drop(columns="Compute (s)")),
+               "same roll-up serially and on the pool")
+        if (os.cpu_count() or 1) >= 2:
+            expect(t_pool < 0.75 * t_serial, f"pool faster than one after another ({t_pool:.2f} vs {t_serial:.2f} s)")
+
+        t0 = time.perf_counter()
+        again = compute_portfolio(projects, TODAY, executor=pool)
+        expect(all(a is b for a, b in zip(again, pooled)), f"unchanged projects come from memory ({time.perf_counter() - t0:.3f} s)")
+
+        changed = projects[0].source.replace(".csv", "_changed.csv")
+        generate_export(args.bookings // args.projects, seed=99).to_csv(changed, index=False)
+        edited = [Project(projects[0].name, changed)] + projects[1:]
+        after = compute_portfolio(edited, TODAY, executor=pool)
+        expect(after[0] is not pooled[0] and all(a is b for a, b in zip(after[1:], pooled[1:])),
+               "changing one project recomputes only that one")
+        os.remove(changed)
+
+    print(f"\n{'All checks passed' if not failures else f'{len(failures)} check(s) failed'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    # The pool spawns fresh interpreters that import this module; keep the work under the main guard
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+import pandas as pd
+from utils.columns import resolve_column_map
+from services.profiling import PROFILE_LOG_ENV, active_profile, log_profile, start_profile, stop_profile
+from services.dataset import fingerprint_frame, register_dataset
+from services.compute import compute_kpis, compute_monthly_trend, compute_property_metrics, compute_working_data
+from services.validation import run_validations
+from services.discrepancies import run_discrepancy_checks
+from services.ageing import compute_ageing
+from scripts.synthetic import generate_export
+
+# The dashboard's service calls on a synthetic export, warm (every result cached, as on a rerun that
+# changed nothing), with profiling off and on. Checks that an inactive profiler adds under --max-overhead
+# per call, that a profile records the cold run's misses and the warm run's hits, and that it is appended
+# to the JSON-lines log. Exits 1 if any check fails.
+# Usage: python -m scripts.bench_profiling [--bookings 10000] [--repeat 20] [--max-overhead 0.02]
+TODAY = pd.Timestamp("2025-06-30")
+failures = []
+
+
+def expect(ok: bool, what: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {what}")
+    if not ok:
+        failures.append(what)
+
+
+def rerun(dataset) -> None:
+    run_validations(dataset)
+    compute_working_data(dataset, TODAY)
+    compute_kpis(dataset, TODAY, overdue_threshold=1000)
+    compute_monthly_trend(dataset, TODAY)
+    compute_property_metrics(dataset, TODAY)
+    compute_ageing(dataset, TODAY, 1000)
+    run_discrepancy_checks(dataset, TODAY, "Amount Percent")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-overhead", type=float, default=0.02, help="ms per service call with profiling off")
+    args = parser.parse_args()
+
+    raw = generate_export(args.bookings)
+    column_map = resolve_column_map(raw.columns)
+    fingerprint = f"{fingerprint_frame(raw)}-{time.time()}"
+
+    profile = start_profile("cold")
+    dataset = register_dataset(raw, column_map, fingerprint=fingerprint)
+    rerun(dataset)
+    cold = stop_profile()
+    print(f"{len(raw):,} rows, cold run: {cold.total_ms:,.0f} ms over {len(cold.records)} stages")
+    expect(profile is cold, "stop_profile returns the running profile")
+    misses = {r.name for r in cold.records if r.cache == "miss"}
+    expect({"dataset.register_dataset", "compute.compute_property_metrics", "ageing.compute_ageing"} <= misses,
+           "cold run records preprocessing and cached services as misses")
+    expect(any(r.name.startswith("derived:") for r in cold.records), "derived structures are recorded when built")
+    expect(all(r.rows == len(raw) for r in cold.records if r.name.startswith("compute.")), "stages carry the row count")
+
+    def timed(profiling: bool) -> float:
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            if profiling:
+                start_profile("warm")
+            register_dataset(raw, column_map, fingerprint=fingerprint)
+            rerun(dataset)
+            if profiling:
+                stop_profile()
+        return (time.perf_counter() - t0) * 1000 / args.repeat
+
+    calls = 8
+    timed(False)
+    off = min(timed(False) for _ in range(3))
+    on = min(timed(True) for _ in range(3))
+    print(f"  warm rerun: {off:.3f} ms off, {on:.3f} ms on ({(on - off) / calls * 1000:.1f} µs per call)")
+
+    # With no profile running, each service call pays one thread-local lookup
+    t0 = time.perf_counter()
+    for _ in range(100_000):
+        active_profile()
+    lookup_ms = (time.perf_counter() - t0) * 1000 / 100_000
+    expect(lookup_ms < args.max_overhead, f"inactive profiler check {lookup_ms * 1000:.2f} µs per call")
+
+    start_profile("warm")
+    register_dataset(raw, column_map, fingerprint=fingerprint)
+    rerun(dataset)
+    warm = stop_profile()
+    expect(all(r.cache == "hit" for r in warm.records if r.cache), "warm run is all cache hits")
+    expect(not any(r.name.startswith("derived:") for r in warm.records), "nothing is rebuilt on the warm run")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ[PROFILE_LOG_ENV] = str(Path(tmp) / "profile.jsonl")
+        log_profile(cold, source="bench")
+        log_profile(warm, source="bench")
+        lines = [json.loads(line) for line in Path(os.environ[PROFILE_LOG_ENV]).read_text().splitlines()]
+        expect([line["label"] for line in lines] == ["cold", "warm"] and lines[0]["source"] == "bench",
+               "profiles are appended to the JSON-lines log")
+        expect(len(lines[0]["stages"]) == len(cold.records), "log keeps every stage")
+
+    print(f"\n{'All checks passed' if not failures else f'{len(failures)} check(s) failed'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import argparse
+import sys
+import time
+import pandas as pd
+from streamlit.logger import set_log_level
+from salesforce.partition import ReportFetchError, ReportTruncatedError, fetch_report_partitioned
+from salesforce.report import get_salesforce_report
+from scripts.mock_salesforce import MockAnalytics
+
+# Standard vs partitioned report fetch against the local mock Analytics endpoint, plus the
+# truncation and partial-failure paths. Exits 1 if any check fails.
+# Usage: python -m scripts.bench_report_fetch [--rows 20000] [--latency 0.05] [--workers 4]
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=20_000)
+parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every mock request")
+parser.add_argument("--workers", type=int, default=4)
+args = parser.parse_args()
+set_log_level("error")
+
+failures = []
+
+
+def expect(ok: bool, what: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {what}")
+    if not ok:
+        failures.append(what)
+
+
+def timed(fn, *a, **kw):
+    t0 = time.perf_counter()
+    out = fn(*a, **kw)
+    return out, time.perf_counter() - t0
+
+
+def canonical(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+with MockAnalytics(rows=args.rows, latency=args.latency) as api:
+    total = len(api.frame)
+    print(f"Mock report: {total:,} rows, {api.row_limit:,} row cap, {args.latency * 1000:.0f} ms latency")
+    print("mode, rows, requests, seconds")
+
+    api.requests = 0
+    standard, t = timed(get_salesforce_report, api.sf, api.report_id)
+    print(f"standard (single sync run), {len(standard):,}, {api.requests}, {t:.2f}")
+
+    results = {}
+    for by in ("tower", "booking_year"):
+        for workers in (1, args.workers):
+            api.requests = 0
+            df, t = timed(fetch_report_partitioned, api.sf, api.report_id, by=by, max_workers=workers)
+            results[(by, workers)] = (df, t)
+            print(f"partitioned:{by} x{workers}, {len(df):,}, {api.requests}, {t:.2f}")
+
+    print("\nChecks")
+    expect(len(standard) == api.row_limit, "standard fetch stops at the row cap")
+    reference = canonical(results[("tower", 1)][0])
+    expect(len(reference) == total, "partitioned fetch returns every row")
+    for (by, workers), (df, _) in results.items():
+        expect(list(df.columns) == list(standard.columns), f"{by} x{workers}: same columns as standard fetch")
+        expect(canonical(df).equals(reference), f"{by} x{workers}: same rows as tower x1")
+    again = fetch_report_partitioned(api.sf, api.report_id, by="tower", max_workers=args.workers)
+    expect(again.equals(results[("tower", args.workers)][0]), "row order is deterministic across runs")
+    speedup = results[("tower", 1)][1] / results[("tower", args.workers)][1]
+    expect(speedup > 1.2, f"x{args.workers} workers faster than x1 ({speedup:.1f}x)")
+
+    # One tower's partition keeps failing: the whole fetch must fail, naming the partition
+    tower = api.frame["Tower"].dropna().iloc[0]
+    api.faults.append(lambda r: (500, [{"errorCode": "UNKNOWN_EXCEPTION", "message": "boom"}])
+                      if any(f.get("value") == tower for f in r.filters) else None)
+    try:
+        fetch_report_partitioned(api.sf, api.report_id, by="tower", max_workers=args.workers)
+        expect(False, "failing partition raises ReportFetchError")
+    except ReportTruncatedError:
+        expect(False, "failing partition raises ReportFetchError (got truncation)")
+    except ReportFetchError as e:
+        expect(f"Tower {tower}" in str(e), "failing partition raises ReportFetchError naming it")
+    api.faults.clear()
+
+    # The blank-booking-date partition has no date range left to split; force it to come back truncated
+    api.faults.append(lambda r: (200, {**api.run(r.body["reportMetadata"], True), "allData": False})
+                      if any(f["operator"] == "equals" and f.get("value") == "" for f in r.filters) else None)
+    try:
+        fetch_report_partitioned(api.sf, api.report_id, by="booking_year", max_workers=args.workers)
+        expect(False, "unsplittable truncation raises ReportTruncatedError")
+    except ReportTruncatedError:
+        expect(True, "unsplittable truncation raises ReportTruncatedError")
+
+print(f"\n{'All checks passed' if not failures else f'{len(failures)} check(s) failed'}")
+sys.exit(1 if failures else 0)
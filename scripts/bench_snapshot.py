@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from streamlit.logger import set_log_level
+from salesforce.partition import fetch_report_partitioned
+from salesforce.snapshot import load_snapshot, refresh_snapshot, snapshot_info
+from scripts.mock_salesforce import MockAnalytics
+
+# Report snapshot store against the local mock Analytics endpoint: first fetch, instant reload,
+# unchanged refresh (no download), refresh after the data moved, and force refresh.
+# Uses a throwaway cache directory. Exits 1 if any check fails.
+# Usage: python -m scripts.bench_snapshot [--rows 20000] [--latency 0.05]
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=20_000)
+parser.add_argument("--latency", type=float, default=0.05)
+args = parser.parse_args()
+set_log_level("error")
+os.environ["TRIBECA_CACHE_DIR"] = tempfile.mkdtemp(prefix="tribeca_snapshots_")
+
+failures = []
+
+
+def expect(ok: bool, what: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {what}")
+    if not ok:
+        failures.append(what)
+
+
+with MockAnalytics(rows=args.rows, latency=args.latency) as api:
+    rid = api.report_id
+    fetch = lambda: fetch_report_partitioned(api.sf, rid, by="tower")
+    print(f"Mock report: {len(api.frame):,} rows, {args.latency * 1000:.0f} ms latency")
+    print("step, seconds, requests, refetched")
+
+    def step(name, fn):
+        api.requests = 0
+        t0 = time.perf_counter()
+        out = fn()
+        seconds = time.perf_counter() - t0
+        refetched = out[1] if isinstance(out, tuple) else "-"
+        print(f"{name}, {seconds:.3f}, {api.requests}, {refetched}")
+        return out, seconds
+
+    (first, fetched), t_fetch = step("first fetch", lambda: refresh_snapshot(api.sf, rid, fetch, mode="tower"))
+    loaded, t_load = step("load snapshot", lambda: load_snapshot(rid))
+    (same, refetched_same), _ = step("refresh (unchanged)", lambda: refresh_snapshot(api.sf, rid, fetch, mode="tower"))
+    api.set_frame(api.frame.iloc[:-10])
+    (moved, refetched_moved), _ = step("refresh (data changed)", lambda: refresh_snapshot(api.sf, rid, fetch, mode="tower"))
+    (forced, refetched_forced), _ = step("force refresh", lambda: refresh_snapshot(api.sf, rid, fetch, mode="tower", force=True))
+
+    print("\nChecks")
+    expect(fetched and len(first.frame) == args.rows, "first refresh downloads and stores the report")
+    expect(loaded is not None and loaded.frame.equals(first.frame), "snapshot reloads the same frame")
+    expect(loaded is not None and loaded.fingerprint == first.fingerprint, "stored fingerprint matches")
+    expect(t_load < t_fetch / 5, f"snapshot load is fast ({t_load:.3f}s vs {t_fetch:.3f}s)")
+    expect(not refetched_same and same.fingerprint == first.fingerprint, "unchanged report is not re-downloaded")
+    expect(refetched_moved and len(moved.frame) == len(api.frame), "changed report is re-downloaded")
+    expect(refetched_forced, "force refresh always re-downloads")
+    info = snapshot_info(rid)
+    expect(info is not None and info["rows"] == len(api.frame), "sidecar metadata reflects the latest fetch")
+
+print(f"\n{'All checks passed' if not failures else f'{len(failures)} check(s) failed'}")
+sys.exit(1 if failures else 0)
@@ -0,0 +1,94 @@
+import argparse
+import gzip
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+import pandas as pd
+from salesforce.report import StreamedPage, TypedColumns, detail_rows, label_rows
+from utils.paths import cache_dir
+
+# Peak RSS and decode time of one large report page: whole-body response.json() vs StreamedPage,
+# each into labels or typed columns. The page is recorded once from the local mock Analytics endpoint
+# (gzip body as sent on the wire) and reused; every mode runs in a fresh process so RSS peaks are its own.
+# Usage: python -m scripts.bench_stream_decode [--rows 50000] [--fixture page.json.gz]
+MODES = ["json+labels", "json+typed", "stream+labels", "stream+typed"]
+
+
+def _status_mb(field: str) -> float:
+    # VmHWM (peak RSS) starts fresh at exec, unlike ru_maxrss which a child inherits from its parent
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def record(path: Path, rows: int) -> None:
+    import requests
+    from scripts.mock_salesforce import MockAnalytics
+
+    with MockAnalytics(rows=rows, row_limit=rows, latency=0.0, per_row=0.0) as api:
+        headers = {"Authorization": f"Bearer {api.sf.session_id}", "Accept-Encoding": "gzip"}
+        url = f"{api.base_url}analytics/reports/{api.report_id}"
+        describe = requests.get(f"{url}/describe", headers=headers).json()
+        response = requests.get(f"{url}?includeDetails=true", headers=headers, stream=True)
+        path.write_bytes(response.raw.read(decode_content=False))
+        path.with_suffix(".describe").write_text(json.dumps(describe), encoding="utf-8")
+
+
+def run_mode(mode: str, path: Path) -> dict:
+    """Decode the fixture one way; runs in its own process."""
+    describe = json.loads(path.with_suffix(".describe").read_text(encoding="utf-8"))
+    before = _status_mb("VmRSS")
+    t0 = time.perf_counter()
+    with gzip.open(path, "rb") as body:
+        if mode.startswith("json"):
+            data = json.loads(body.read())  # what response.json() does
+            rows = detail_rows(data)
+        else:
+            rows = StreamedPage(body).rows()
+        if mode.endswith("typed"):
+            decoder = TypedColumns(describe)
+            df = decoder.frame([decoder.decode_rows(rows)])
+        else:
+            info = describe["reportExtendedMetadata"]["detailColumnInfo"]
+            labels = [info[c]["label"] for c in describe["reportMetadata"]["detailColumns"]]
+            df = pd.DataFrame(label_rows(rows), columns=labels)
+    seconds = time.perf_counter() - t0
+    peak = _status_mb("VmHWM")
+    return {
+        "mode": mode,
+        "seconds": seconds,
+        "peak_mb": peak - before,
+        "frame_mb": df.memory_usage(deep=True).sum() / 1e6,
+        "rows": len(df),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--fixture", type=Path, help="recorded page (.json.gz); recorded from the mock if missing")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    fixture = args.fixture or cache_dir("fixtures") / f"report_page_{args.rows}.json.gz"
+
+    if args.child:
+        print(json.dumps(run_mode(args.child, fixture)))
+        sys.exit(0)
+
+    if not fixture.exists():
+        print(f"Recording fixture {fixture} ...")
+        record(fixture, args.rows)
+    raw_mb = len(gzip.decompress(fixture.read_bytes())) / 1e6
+    print(f"Fixture: {fixture} ({fixture.stat().st_size / 1e6:.1f} MB gzip, {raw_mb:.1f} MB JSON)")
+    print("mode, rows, decode (s), peak RSS above baseline (MB), frame (MB)")
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, "-m", "scripts.bench_stream_decode", "--child", mode, "--fixture", str(fixture)],
+            capture_output=True, text=True, check=True,
+        )
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{r['mode']}, {r['rows']:,}, {r['seconds']:.2f}, {r['peak_mb']:.1f}, {r['frame_mb']:.1f}")
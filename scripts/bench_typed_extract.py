@@ -0,0 +1,83 @@
+import argparse
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict
+import numpy as np
+import pandas as pd
+from streamlit.logger import set_log_level
+from utils.columns import resolve_column_map
+from services.caching import set_cache_backend
+from services.compute import compute_kpis, compute_monthly_trend
+from services.dataset import fingerprint_frame, preprocess_df, register_dataset
+from salesforce.partition import fetch_report_partitioned
+from scripts.mock_salesforce import MockAnalytics
+
+# Label vs typed-value extraction of a report from the local mock Analytics endpoint: fetch time,
+# peak traced memory while fetching, frame size and preprocessing time. Both paths must give the
+# KPIs of the mock's source records (labels show blanks as "-", which is read back as blank here).
+# Exits 1 if they disagree.
+# Usage: python -m scripts.bench_typed_extract [--rows 20000]
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=20_000)
+args = parser.parse_args()
+set_log_level("error")
+set_cache_backend(None)
+TODAY = pd.Timestamp("2025-06-30")
+
+failures = []
+
+
+def expect(ok: bool, what: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {what}")
+    if not ok:
+        failures.append(what)
+
+
+with MockAnalytics(rows=args.rows, latency=0.0, per_row=0.0) as api:
+    print(f"Mock report: {len(api.frame):,} rows")
+    print("mode, fetch (s), fetch peak incl. mock server (MB), frame (MB), preprocess (s)")
+    frames, kpis, trends = {}, {}, {}
+
+    def summarize(df):
+        column_map = resolve_column_map(df.columns)
+        dataset = register_dataset(df, column_map, fingerprint=fingerprint_frame(df))
+        return asdict(compute_kpis(dataset, TODAY)), compute_monthly_trend(dataset, TODAY)
+
+    truth_kpis, truth_trend = summarize(api.frame)
+    for typed in (False, True):
+        name = "typed values" if typed else "labels"
+        fetch_report_partitioned(api.sf, api.report_id, typed=typed)  # warm-up
+        t0 = time.perf_counter()
+        df = fetch_report_partitioned(api.sf, api.report_id, typed=typed)
+        t_fetch = time.perf_counter() - t0
+        tracemalloc.start()
+        fetch_report_partitioned(api.sf, api.report_id, typed=typed)
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+        column_map = resolve_column_map(df.columns)
+        t0 = time.perf_counter()
+        preprocess_df(df, column_map)
+        t_pre = time.perf_counter() - t0
+        frames[typed] = df
+        kpis[typed], trends[typed] = summarize(df if typed else df.replace("-", None))
+        size = df.memory_usage(deep=True).sum() / 1e6
+        print(f"{name}, {t_fetch:.2f}, {peak:.1f}, {size:.1f}, {t_pre:.3f}")
+
+    print("\nChecks")
+    typed_df = frames[True]
+    expect(len(typed_df) == len(frames[False]) == len(api.frame), "both paths return every row")
+    expect(list(typed_df.columns) == list(frames[False].columns), "same column labels")
+    amounts = typed_df["Payment Received"]
+    expect(amounts.dtype == np.float64, "currency columns arrive as float64")
+    expect(typed_df["Booking Date"].dtype.kind == "M", "date columns arrive as datetime64")
+    expect(isinstance(typed_df["Tower"].dtype, pd.CategoricalDtype), "text columns arrive as categoricals")
+    for typed, name in ((True, "typed values"), (False, "labels")):
+        same = all(np.isclose(kpis[typed][k], truth_kpis[k], rtol=1e-9) for k in truth_kpis)
+        expect(same, f"{name}: KPIs match the source records")
+        expect(np.allclose(trends[typed].select_dtypes("number"), truth_trend.select_dtypes("number")),
+               f"{name}: monthly trend matches the source records")
+
+print(f"\n{'All checks passed' if not failures else f'{len(failures)} check(s) failed'}")
+sys.exit(1 if failures else 0)
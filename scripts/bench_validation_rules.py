@@ -0,0 +1,82 @@
+import argparse
+import dataclasses
+import sys
+import time
+import numpy as np
+from services.caching import set_cache_backend
+from services.dataset import register_dataset
+from services.validation import RuleContext, ValidationRule, run_rules, validation_rules
+from scripts.synthetic import generate_export
+from utils.columns import resolve_column_map
+
+# Validation rule registry: the built-in rules plus --extra project-style rules (each comparing two
+# declared columns), run one at a time and on the thread pool over the same dataset. Also checks that
+# rules with unmapped columns are skipped and that null masks are shared. Exits 1 if any check fails.
+# Usage: python -m scripts.bench_validation_rules [--bookings 10000] [--extra 24] [--workers 8]
+parser = argparse.ArgumentParser()
+parser.add_argument("--bookings", type=int, default=10_000, help="export size (x10 milestone rows)")
+parser.add_argument("--extra", type=int, default=24, help="project-style rules added to the built-in ones")
+parser.add_argument("--workers", type=int, default=8)
+args = parser.parse_args()
+set_cache_backend(None)
+failures = []
+
+
+def expect(ok: bool, what: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {what}")
+    if not ok:
+        failures.append(what)
+
+
+AMOUNTS = ("amount_due_col", "payment_received_col", "tax_col", "total_agreement_col")
+
+
+def extra_rule(i: int) -> ValidationRule:
+    """Rows where one amount exceeds a multiple of another (a stand-in for per-project rules)."""
+    a, b = AMOUNTS[i % len(AMOUNTS)], AMOUNTS[(i + 1) % len(AMOUNTS)]
+
+    def check(ctx: RuleContext):
+        mask = ctx.notna(a) & ctx.notna(b) & (ctx.values(a) > ctx.values(b) * (1 + i / 10))
+        count = int(mask.sum())
+        return {"type": f"extra_{i}", "count": count, "details": ctx.frame.loc[mask, [ctx.column(a), ctx.column(b)]],
+                "message": f"{count} rows" if count else ""}
+    return ValidationRule(f"extra_{i}", check, (a, b))
+
+
+raw = generate_export(args.bookings, messy=True)
+column_map = resolve_column_map(raw.columns)
+dataset = register_dataset(raw, column_map, fingerprint="bench-validation-rules")
+rules = validation_rules() + [extra_rule(i) for i in range(args.extra)]
+print(f"{len(raw):,} rows, {len(rules)} rules")
+
+runs = {}
+for workers in (1, args.workers):
+    t0 = time.perf_counter()
+    runs[workers] = run_rules(dataset, rules, max_workers=workers)
+    print(f"  {workers} worker(s): {time.perf_counter() - t0:.3f} s, "
+          f"rules {sum(runs[workers]['timings'].values()):.3f} s in total")
+serial, pooled = runs[1], runs[args.workers]
+expect([r["type"] for r in pooled["results"]] == [r.name for r in rules], "results come back in rule order")
+expect(all(a["count"] == b["count"] and a["message"] == b["message"] for a, b in zip(serial["results"], pooled["results"])),
+       "same results one at a time and on the pool")
+expect(set(pooled["timings"]) == {r.name for r in rules}, "every rule is timed")
+slowest = max(pooled["timings"], key=pooled["timings"].get)
+print(f"  slowest rule: {slowest} ({pooled['timings'][slowest] * 1000:.1f} ms)")
+
+# A frame read once per column: reading a column's null mask again would be a second pass
+seen = []
+probe = ValidationRule("probe", lambda ctx: seen.append(ctx.notna_masks) or {"type": "probe", "count": 0, "details": {}, "message": ""},
+                       ("tax_col", "payment_received_col"))
+run_rules(dataset, rules + [probe])
+expect(len(seen[0]) == len({getattr(column_map, f) for r in rules + [probe] for f in r.fields + r.optional}),
+       "one shared null mask per declared column")
+
+unmapped = register_dataset(raw, dataclasses.replace(column_map, tax_col=None), fingerprint="bench-validation-unmapped")
+out = run_rules(unmapped, rules)
+expect("tax_vs_payment" in out["skipped"] and "tax_vs_payment" not in out["timings"],
+       f"rules reading an unmapped column are skipped ({len(out['skipped'])} skipped)")
+expect(np.isin(["currency_parsing", "date_consistency"], [r["type"] for r in out["results"]]).all(),
+       "the other rules still run")
+
+print(f"\n{'All checks passed' if not failures else f'{len(failures)} check(s) failed'}")
+sys.exit(1 if failures else 0)
@@ -0,0 +1,85 @@
+import sys
+import threading
+import time
+import pandas as pd
+from streamlit.logger import set_log_level
+from salesforce.client import ReportFetchError, SalesforceClient
+from salesforce.instances import run_instance
+from salesforce.partition import fetch_report_partitioned
+from salesforce.report import label_rows
+from scripts.mock_salesforce import MockAnalytics
+
+# Asynchronous (report instance) fetches end to end against the local mock Analytics endpoint: the
+# instance lifecycle (New -> Running -> Success), polling backoff, truncated instances split like
+# synchronous partitions, failed and stuck instances, and progress reporting. Exits 1 if any check fails.
+# Usage: python -m scripts.check_async_fetch
+set_log_level("error")
+ROWS = 6000
+failures = []
+
+
+def expect(ok: bool, what: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {what}")
+    if not ok:
+        failures.append(what)
+
+
+def canonical(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+with MockAnalytics(rows=ROWS, row_limit=10 ** 9, latency=0.01, per_row=0.0, instance_seconds=0.6) as api:
+    client = SalesforceClient(login=api.login, backoff=0.01)
+    polls = []
+    api.faults.append(lambda r: polls.append(r.path) if "/instances/" in r.path else None)
+
+    print("Whole report as one instance")
+    updates = []
+    df = fetch_report_partitioned(client, api.report_id, by=None, run_async=True, typed=True,
+                                  progress=lambda p: updates.append((threading.get_ident(), p)))
+    expect(len(df) == len(api.frame), f"all {len(api.frame):,} rows once the instance succeeds")
+    expect(len(api.instances) == 1 and len(polls) >= 2, f"one instance, polled until done ({len(polls)} polls)")
+    expect(df.attrs["fetch"]["mode"] == "async:report:typed", "fetch mode recorded")
+    expect(bool(updates) and all(t == threading.get_ident() for t, _ in updates),
+           "progress reported on the calling thread")
+    last = updates[-1][1] if updates else None
+    expect(last is not None and last.parts_done == last.parts_total == 1 and last.rows == len(api.frame),
+           "final progress covers every row")
+
+    print("Instance past the row cap")
+    api.row_limit = 2000
+    api.instances.clear()
+    df = fetch_report_partitioned(client, api.report_id, by=None, run_async=True)
+    sync = fetch_report_partitioned(client, api.report_id, by="booking_year")
+    expect(len(df) == len(api.frame) and len(api.instances) > 1,
+           f"truncated instance is split into {len(api.instances) - 1} more instances")
+    expect(canonical(df).equals(canonical(sync)), "same rows as the synchronous partitioned fetch")
+
+    print("Concurrent instances by Tower")
+    t0 = time.perf_counter()
+    df = fetch_report_partitioned(client, api.report_id, by="tower", run_async=True, max_workers=4)
+    t4 = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    fetch_report_partitioned(client, api.report_id, by="tower", run_async=True, max_workers=1)
+    t1 = time.perf_counter() - t0
+    expect(canonical(df).equals(canonical(sync)), "same rows as the synchronous fetch")
+    expect(t1 / t4 > 1.5, f"instances run and download in parallel (x4 {t4:.1f}s vs x1 {t1:.1f}s)")
+
+    print("Failed and stuck instances")
+    api.faults.append(lambda r: (200, {"attributes": {"id": "x", "status": "Error", "errorMessage": "Report timed out"}})
+                      if "/instances/" in r.path else None)
+    try:
+        fetch_report_partitioned(client, api.report_id, by=None, run_async=True)
+        expect(False, "instance in Error raises ReportFetchError")
+    except ReportFetchError as e:
+        expect("Report timed out" in str(e), f"instance in Error raises ReportFetchError: {e}")
+    api.faults.pop()
+    api.instance_seconds = 60
+    try:
+        run_instance(client, api.report_id, None, label_rows, timeout=1.0)
+        expect(False, "stuck instance times out")
+    except ReportFetchError as e:
+        expect("still" in str(e), f"stuck instance times out: {e}")
+
+print(f"\n{'All checks passed' if not failures else f'{len(failures)} check(s) failed'}")
+sys.exit(1 if failures else 0)
@@ -0,0 +1,114 @@
+import itertools
+import sys
+from streamlit.logger import set_log_level
+from salesforce.client import ReportFetchError, SalesforceClient
+from salesforce.partition import fetch_report_partitioned
+from salesforce.report import get_salesforce_report
+from scripts.mock_salesforce import MockAnalytics
+
+# SalesforceClient against the local mock Analytics endpoint with injected token expiry, throttling,
+# server errors and dropped connections: loads must complete (or fail loudly), with one re-login per
+# expiry and every request timed. Exits 1 if any check fails.
+# Usage: python -m scripts.check_sf_client
+set_log_level("error")
+ROWS, PAGE = 6000, 1500
+failures = []
+
+
+def expect(ok: bool, what: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {what}")
+    if not ok:
+        failures.append(what)
+
+
+def page_of(r) -> int:
+    return int(r.query.get("page", ["0"])[0])
+
+
+with MockAnalytics(rows=ROWS, row_limit=10 ** 9, page_size=PAGE, latency=0.01, per_row=0.0) as api:
+    pages = -(-ROWS // PAGE)
+
+    def client() -> SalesforceClient:
+        api.faults.clear()
+        return SalesforceClient(login=api.login, backoff=0.01)
+
+    print("Paginated standard fetch")
+    c = client()
+    df = get_salesforce_report(c, api.report_id)
+    expect(len(df) == ROWS and len(c.metrics) == pages, f"{pages} pages, {ROWS:,} rows, one request each")
+    expect(all(m.seconds > 0 and m.status == 200 for m in c.metrics), "every request is timed")
+    expect(df.attrs["fetch"]["http"]["requests"] == pages, "fetch metrics travel with the frame")
+
+    print("Token expiry between pages")
+    c = client()
+    expired = []
+
+    def expire_once(r):
+        if page_of(r) == 2 and not expired:
+            expired.append(r)
+            api.expire_tokens()
+            return 401, [{"errorCode": "INVALID_SESSION_ID", "message": "Session expired or invalid"}]
+        return None
+
+    api.faults.append(expire_once)
+    df = get_salesforce_report(c, api.report_id)
+    expect(len(df) == ROWS, "load completes after re-login")
+    expect(c.reauthentications == 1, "exactly one re-login")
+
+    print("Throttling, server errors and dropped connections")
+    c = client()
+    counter = itertools.count()
+    api.faults.append(lambda r: (429, [{"errorCode": "REQUEST_LIMIT_EXCEEDED"}], {"Retry-After": "0"})
+                      if next(counter) % 3 == 1 else None)
+    df = get_salesforce_report(c, api.report_id)
+    summary = c.metrics_summary()
+    expect(len(df) == ROWS and summary["retries"] > 0, f"throttled load completes ({summary['retries']} retries)")
+    c = client()
+    hits = {"first": 0, "page 1": 0}
+
+    def flaky(r):
+        if hits["first"] == 0:
+            hits["first"] += 1
+            return 503, [{"errorCode": "SERVER_UNAVAILABLE"}]
+        if page_of(r) == 1 and hits["page 1"] < 2:
+            hits["page 1"] += 1
+            return None, None
+        return None
+
+    api.faults.append(flaky)
+    df = get_salesforce_report(c, api.report_id)
+    expect(len(df) == ROWS and c.metrics_summary()["retries"] >= 2, "503 and dropped connections are retried")
+
+    print("Page that keeps failing")
+    c = client()
+    api.faults.append(lambda r: (500, [{"errorCode": "UNKNOWN_EXCEPTION"}]) if page_of(r) == 2 else None)
+    try:
+        get_salesforce_report(c, api.report_id)
+        expect(False, "load fails instead of returning partial data")
+    except ReportFetchError as e:
+        expect("page 3" in str(e), f"load fails loudly: {e}")
+        expect(c.metrics[-1].attempts == c.max_retries + 1, "failed page was retried before giving up")
+
+    print("No login available")
+    api.faults.clear()
+    api.expire_tokens()
+    try:
+        get_salesforce_report(api.sf, api.report_id)
+        expect(False, "plain connection with an expired token fails")
+    except ReportFetchError as e:
+        expect("401" in str(e), "plain connection with an expired token fails with the 401")
+
+    print("Partitioned fetch, 4 workers, token expiry mid-way")
+    logins = api.logins
+    c = client()
+    runs = itertools.count()
+    api.faults.append(lambda r: (api.expire_tokens() or (401, [{"errorCode": "INVALID_SESSION_ID"}]))
+                      if r.method == "POST" and next(runs) == 4 else None)
+    api.row_limit = 2000
+    df = fetch_report_partitioned(c, api.report_id, max_workers=4)
+    expect(len(df) == ROWS, "partitioned load completes")
+    expect(api.logins - logins == 2 and c.reauthentications == 1,
+           f"concurrent 401s trigger a single re-login ({c.reauthentications})")
+
+print(f"\n{'All checks passed' if not failures else f'{len(failures)} check(s) failed'}")
+sys.exit(1 if failures else 0)
@@ -0,0 +1,325 @@
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+from scripts.synthetic import format_inr, generate_export, pad_columns
+
+# Local stand-in for the Salesforce Analytics REST API, for the fetch benchmarks and checks in scripts/.
+# Serves one summary report (grouped by Tower) built from the synthetic generator:
+#   GET  .../analytics/reports/<id>/describe
+#   GET  .../analytics/reports/<id>?includeDetails=true          (report as saved)
+#   POST .../analytics/reports/<id>?includeDetails=true|false    (reportMetadata override: filters, groupings)
+#   GET  .../sobjects/Report/<id>                                 (LastModifiedDate)
+#   POST .../analytics/reports/<id>/instances?includeDetails=true (start an async run, optional override)
+#   GET  .../analytics/reports/<id>/instances/<instance id>       (New -> Running -> Success with the result)
+# With page_size set, runs of the report as a whole (GET, or POST without added filters) are split into
+# pages linked by nextPageUrl; a POST to that URL repeats the override. extra_columns pads the report
+# with unused text/number/date columns, like a real report carrying far more than the dashboard reads.
+# login() issues a fresh session token and expire_tokens() invalidates all issued ones (401 after).
+# An instance stays New, then Running, for instance_seconds after it starts before it returns its result.
+# Detail rows are capped per run like the real sync API (allData=false past the cap). Latency per request,
+# fault injection and request counting make throughput, truncation and failure handling observable.
+#
+#   with MockAnalytics(rows=20_000) as api:
+#       df = get_salesforce_report(api.sf, api.report_id)
+
+API_VERSION = "v59.0"
+CURRENCY_COLUMNS = {
+    "Total Agreement Value", "Other Charges (Corpus+Maintenance)", "Total Amount Due",
+    "Payment Received", "Total Service Tax On PPD",
+}
+DATE_COLUMNS = {
+    "Booking Date", "Agreement Registration Date", "Budgeted Date", "Demand Generation Date", "Actual Payment Date",
+}
+# A fault returns (status, body) or (status, body, headers) to send instead of the normal response,
+# (None, None) to drop the connection without answering, or None to pass
+Fault = Callable[["RequestInfo"], Optional[tuple]]
+
+
+class RequestInfo(SimpleNamespace):
+    """method, path, query, body (parsed JSON or None), filters (list), token"""
+
+
+def _data_type(column: str, series: pd.Series) -> str:
+    if column in CURRENCY_COLUMNS:
+        return "currency"
+    if column in DATE_COLUMNS or pd.api.types.is_datetime64_any_dtype(series):
+        return "date"
+    if pd.api.types.is_numeric_dtype(series):
+        return "double"
+    return "string"
+
+
+class MockAnalytics:
+    def __init__(
+        self,
+        rows: int = 20_000,
+        row_limit: int = 2000,
+        latency: float = 0.05,
+        per_row: float = 20e-6,
+        report_id: str = "00O000000000001",
+        seed: int = 0,
+        compress: bool = True,
+        page_size: int = None,
+        extra_columns: int = 0,
+        instance_seconds: float = 0.5,
+    ):
+        self.report_id = report_id
+        self.row_limit = row_limit
+        self.latency = latency
+        self.per_row = per_row
+        self.compress = compress  # gzip responses for clients that accept it, as Salesforce does
+        self.page_size = page_size
+        self.instance_seconds = instance_seconds
+        self.instances = {}  # instance id -> (started, reportMetadata override)
+        self.faults: List[Fault] = []
+        self.tokens = {"mock-token"}
+        self.logins = 0
+        self.requests = 0
+        self.bytes_sent = 0  # response bodies as sent (after gzip)
+        self.last_modified = "2024-01-01T00:00:00.000+0000"
+        self._lock = threading.Lock()
+        df = generate_export(max(rows // 10, 1), messy=False, seed=seed)
+        self.set_frame(pad_columns(df, extra_columns, seed))
+
+    def set_frame(self, df: pd.DataFrame) -> None:
+        """Replace the report's underlying records (e.g. to simulate new payments)."""
+        self.frame = df.reset_index(drop=True)
+        self.api_names = {c: f"Booking__c.{''.join(ch for ch in c.title() if ch.isalnum())}__c" for c in df.columns}
+        self.by_api = {v: k for k, v in self.api_names.items()}
+        self.types = {c: _data_type(c, df[c]) for c in df.columns}
+        # Pre-rendered cells per column (label + typed value), as the API would send them
+        self.cells = {c: self._render(c, df[c]) for c in df.columns}
+
+    # ---------- Report content ----------
+    def _render(self, column: str, series: pd.Series) -> list:
+        kind = self.types[column]
+        out = []
+        for v in series.tolist():
+            if v is None or (isinstance(v, float) and np.isnan(v)) or v is pd.NaT:
+                out.append({"label": "-", "value": None})
+            elif kind == "currency":
+                out.append({"label": f"₹{format_inr(v)}", "value": {"amount": v, "currency": "INR"}})
+            elif kind == "date":
+                out.append({"label": v.strftime("%d/%m/%Y"), "value": v.strftime("%Y-%m-%d")})
+            elif kind == "double":
+                out.append({"label": f"{v:g}", "value": v})
+            else:
+                out.append({"label": str(v), "value": str(v)})
+        return out
+
+    def metadata(self, columns: List[str] = None) -> dict:
+        columns = columns or [self.api_names[c] for c in self.frame.columns]
+        return {
+            "id": self.report_id,
+            "name": "Milestone Collections",
+            "reportFormat": "SUMMARY",
+            "detailColumns": columns,
+            "groupingsDown": [{"name": self.api_names["Tower"], "sortOrder": "Asc", "dateGranularity": "None"}],
+            "groupingsAcross": [],
+            "reportFilters": [],
+            "reportBooleanFilter": None,
+        }
+
+    def extended_metadata(self) -> dict:
+        return {"detailColumnInfo": {
+            self.api_names[c]: {"label": c, "dataType": self.types[c]} for c in self.frame.columns
+        }}
+
+    def _mask(self, filters: List[dict]) -> np.ndarray:
+        mask = np.ones(len(self.frame), dtype=bool)
+        for f in filters:
+            s = self.frame[self.by_api[f["column"]]]
+            op, raw = f["operator"], f.get("value", "")
+            values = [v.strip('"') for v in raw.split(",")] if raw else []
+            if self.types[self.by_api[f["column"]]] == "date":
+                if op in ("greaterOrEqual", "lessThan"):
+                    bound = pd.Timestamp(raw)
+                    mask &= (s >= bound).to_numpy() if op == "greaterOrEqual" else (s < bound).to_numpy()
+                elif op == "equals" and not values:
+                    mask &= s.isna().to_numpy()
+                continue
+            text = s.astype(object).where(s.notna(), None)
+            if op == "equals":
+                mask &= text.isna().to_numpy() if not values else text.isin(values).to_numpy()
+            elif op == "notEqual":
+                mask &= ~text.isin(values).to_numpy()
+        return mask
+
+    def _aggregates(self, idx: np.ndarray) -> list:
+        received = float(self.frame["Payment Received"].iloc[idx].sum())
+        return [
+            {"label": f"₹{format_inr(received)}", "value": received},
+            {"label": f"{len(idx):,}", "value": len(idx)},
+        ]
+
+    def run(self, metadata: dict, include_details: bool) -> dict:
+        meta = {**self.metadata(), **(metadata or {})}
+        rows_idx = np.flatnonzero(self._mask(meta.get("reportFilters") or []))
+        grouping = (meta.get("groupingsDown") or [{}])[0]
+        group_col = self.by_api.get(grouping.get("name"), "Tower")
+        keys = self.frame[group_col].iloc[rows_idx]
+        if grouping.get("dateGranularity") == "Year":
+            keys = keys.dt.strftime("%Y-01-01")
+        keys = keys.astype(object).where(keys.notna(), "")
+        groups = sorted(pd.unique(keys.to_numpy()), key=str)
+        result = {
+            "attributes": {"reportId": self.report_id},
+            "reportMetadata": meta,
+            "reportExtendedMetadata": self.extended_metadata(),
+            "groupingsDown": {"groupings": [
+                {"key": str(i), "label": str(g)[:4] if grouping.get("dateGranularity") == "Year" else str(g), "value": g}
+                for i, g in enumerate(groups)
+            ]},
+            "allData": True,
+            "factMap": {"T!T": {"aggregates": self._aggregates(rows_idx)}},
+        }
+        if not include_details:
+            return result
+
+        columns = [self.by_api[c] for c in meta["detailColumns"]]
+        returned = 0
+        key_values = keys.to_numpy()
+        for i, g in enumerate(groups):
+            idx = rows_idx[key_values == g]
+            take = idx[: max(self.row_limit - returned, 0)]
+            returned += len(take)
+            result["factMap"][f"{i}!T"] = {
+                "rows": [{"dataCells": [self.cells[c][r] for c in columns]} for r in take],
+                "aggregates": self._aggregates(idx),
+            }
+        result["allData"] = returned == len(rows_idx)
+        return result
+
+    def paginate(self, result: dict, page: int) -> dict:
+        """Keep only this page's detail rows (in factMap order) and link the next page."""
+        start, end, seen = page * self.page_size, (page + 1) * self.page_size, 0
+        fact_map = {}
+        for key, section in result["factMap"].items():
+            rows = section.get("rows")
+            if rows is None:
+                fact_map[key] = section
+                continue
+            fact_map[key] = {**section, "rows": rows[max(start - seen, 0):max(end - seen, 0)]}
+            seen += len(rows)
+        result = {**result, "factMap": fact_map}
+        if end < seen:
+            result["nextPageUrl"] = f"/analytics/reports/{self.report_id}?includeDetails=true&page={page + 1}"
+        return result
+
+    # ---------- Sessions ----------
+    def login(self) -> SimpleNamespace:
+        """A new session, like simple_salesforce.Salesforce(...) after logging in."""
+        with self._lock:
+            self.logins += 1
+            token = f"mock-token-{self.logins}"
+            self.tokens.add(token)
+        return SimpleNamespace(session_id=token, base_url=self.base_url)
+
+    def expire_tokens(self) -> None:
+        with self._lock:
+            self.tokens.clear()
+
+    # ---------- HTTP plumbing ----------
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        with self._lock:
+            self.requests += 1
+        url = urlparse(handler.path)
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = json.loads(handler.rfile.read(length) or b"null") if length else None
+        info = RequestInfo(
+            method=method, path=url.path, query=parse_qs(url.query), body=body,
+            filters=((body or {}).get("reportMetadata") or {}).get("reportFilters") or [],
+            token=(handler.headers.get("Authorization") or "").replace("Bearer ", ""),
+        )
+        status, payload, rows, headers = self._route(info)
+        time.sleep(self.latency + self.per_row * rows)
+        if status is None:
+            handler.close_connection = True
+            return
+        data = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        if self.compress and "gzip" in (handler.headers.get("Accept-Encoding") or ""):
+            data = gzip.compress(data, compresslevel=1)
+            handler.send_header("Content-Encoding", "gzip")
+        handler.send_header("Content-Length", str(len(data)))
+        with self._lock:
+            self.bytes_sent += len(data)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _route(self, info: RequestInfo) -> Tuple[Optional[int], object, int, dict]:
+        if info.token not in self.tokens:
+            return 401, [{"errorCode": "INVALID_SESSION_ID", "message": "Session expired or invalid"}], 0, {}
+        for fault in self.faults:
+            hit = fault(info)
+            if hit is not None:
+                return hit[0], hit[1], 0, (hit[2] if len(hit) > 2 else {})
+        if info.path == f"/services/data/{API_VERSION}/sobjects/Report/{self.report_id}":
+            return 200, {"Id": self.report_id, "LastModifiedDate": self.last_modified}, 0, {}
+        prefix = f"/services/data/{API_VERSION}/analytics/reports/{self.report_id}"
+        if info.path == prefix + "/describe" and info.method == "GET":
+            return 200, {"reportMetadata": self.metadata(), "reportExtendedMetadata": self.extended_metadata()}, 0, {}
+        if info.path == prefix + "/instances" and info.method == "POST":
+            with self._lock:
+                instance_id = f"0LG{len(self.instances) + 1:012d}"
+                self.instances[instance_id] = (time.monotonic(), (info.body or {}).get("reportMetadata"))
+            return 200, {"id": instance_id, "status": "New", "url": f"{info.path}/{instance_id}"}, 0, {}
+        if info.path.startswith(prefix + "/instances/") and info.method == "GET":
+            instance_id = info.path.rsplit("/", 1)[1]
+            if instance_id not in self.instances:
+                return 404, [{"errorCode": "NOT_FOUND", "message": instance_id}], 0, {}
+            started, metadata = self.instances[instance_id]
+            elapsed = time.monotonic() - started
+            attributes = {"id": instance_id, "reportId": self.report_id}
+            if elapsed < self.instance_seconds:
+                status = "New" if elapsed < self.instance_seconds / 3 else "Running"
+                return 200, {"attributes": {**attributes, "status": status}, "allData": False, "factMap": {}}, 0, {}
+            result = {**self.run(metadata, True), "attributes": {**attributes, "status": "Success"}}
+            n = sum(len(v.get("rows", [])) for v in result["factMap"].values())
+            return 200, result, n, {}
+        if info.path == prefix:
+            details = info.query.get("includeDetails", ["false"])[0] == "true"
+            result = self.run((info.body or {}).get("reportMetadata"), details)
+            if details and self.page_size and not info.filters:
+                result = self.paginate(result, int(info.query.get("page", ["0"])[0]))
+            n = sum(len(v.get("rows", [])) for v in result["factMap"].values())
+            return 200, result, n, {}
+        return 404, [{"errorCode": "NOT_FOUND", "message": info.path}], 0, {}
+
+    def __enter__(self) -> "MockAnalytics":
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                api._handle(self, "GET")
+
+            def do_POST(self):
+                api._handle(self, "POST")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.base_url = f"http://{host}:{port}/services/data/{API_VERSION}/"
+        # Quacks like simple_salesforce.Salesforce for the report functions
+        self.sf = SimpleNamespace(session_id="mock-token", base_url=self.base_url)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
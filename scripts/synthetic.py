@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+# Synthetic milestone exports shaped like the Salesforce report / Excel uploads:
+# one row per (booking, milestone), bookings spread over towers, day-first date strings,
+# ₹-formatted amounts mixed with plain numbers, and the usual gaps.
+# Usage: from scripts.synthetic import generate_export; df = generate_export(10_000)
+#        python -m scripts.synthetic 100000 out.csv      (rows, output .csv/.xlsx/.parquet)
+
+START = pd.Timestamp("2020-01-01")
+UNIT_TYPES = np.array(["1BHK", "2BHK", "3BHK", "4BHK", "Villa"])
+
+
+def format_inr(x: float) -> str:
+    """Indian digit grouping: 12345678.5 -> 1,23,45,678.50"""
+    whole, frac = f"{x:.2f}".split('.')
+    sign = '-' if whole.startswith('-') else ''
+    whole = whole.lstrip('-')
+    head, tail = whole[:-3], whole[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    return sign + (','.join(groups + [tail]) if groups else tail) + '.' + frac
+
+
+def _messy_amounts(values: np.ndarray, rng) -> np.ndarray:
+    """Object column: ~30% "₹1,23,456.00", ~20% "1,23,456.00", the rest plain floats; NaN stays blank."""
+    out = values.astype(object)
+    present = ~np.isnan(values)
+    style = rng.random(len(values))
+    for mask, fmt in ((present & (style < 0.3), "₹{}"), (present & (style >= 0.3) & (style < 0.5), "{}")):
+        codes, uniques = pd.factorize(values[mask])
+        labels = np.array([fmt.format(format_inr(v)) for v in uniques], dtype=object)
+        out[mask] = labels[codes]
+    return out
+
+
+def _date_strings(days: np.ndarray, fmt: str = "%d/%m/%Y") -> np.ndarray:
+    """Day offsets from START (NaN = missing) -> day-first strings, formatting each distinct day once."""
+    out = np.full(len(days), None, dtype=object)
+    present = ~np.isnan(days)
+    codes, uniques = pd.factorize(days[present])
+    labels = (START + pd.to_timedelta(uniques, unit="D")).strftime(fmt).to_numpy(dtype=object)
+    out[present] = labels[codes]
+    return out
+
+
+def _dates(days: np.ndarray) -> pd.Series:
+    return pd.Series(START + pd.to_timedelta(days, unit="D"))
+
+
+def generate_export(
+    n_bookings: int,
+    n_milestones: int = 10,
+    n_towers: int = 6,
+    seed: int = 0,
+    messy: bool = True,
+) -> pd.DataFrame:
+    """
+    n_bookings * n_milestones rows. messy=True writes dates as dd/mm/YYYY strings and amounts as a
+    mix of ₹ strings and numbers (like raw exports); messy=False gives clean datetimes and floats.
+    """
+    rng = np.random.default_rng(seed)
+    nb, nm = n_bookings, n_milestones
+    n = nb * nm
+
+    # ---------- Booking level ----------
+    b = np.arange(nb)
+    tower = b % n_towers
+    booking_id = np.char.add("BK-", np.char.zfill(b.astype(str), 7)).astype(object)
+    booking_id[rng.random(nb) < 0.01] = None
+    property_name = np.char.add(np.char.add("T", tower.astype(str)), np.char.add("-", np.char.zfill((b // n_towers).astype(str), 5))).astype(object)
+    property_name[rng.random(nb) < 0.01] = None
+    customer = np.char.add("Customer ", b.astype(str)).astype(object)
+    unit_type = UNIT_TYPES[rng.integers(0, len(UNIT_TYPES), nb)]
+    active = np.where(rng.random(nb) < 0.95, "Active", "Inactive")
+
+    booking_day = rng.integers(0, 1500, nb).astype(float)
+    reg_day = np.where(rng.random(nb) < 0.6, booking_day + rng.integers(-20, 200, nb), np.nan)
+    agreement = rng.integers(40, 400, nb) * 1e5
+    other_charges = np.where(rng.random(nb) < 0.9, rng.integers(1, 6, nb) * 1e5, np.nan)
+
+    # ---------- Milestone level ----------
+    rep = lambda a: np.repeat(a, nm)
+    m = np.tile(np.arange(nm), nb)
+    budget_day = rep(booking_day) + m * 120 + rng.integers(0, 90, n)
+    asof_day = (pd.Timestamp("2025-06-30") - START).days
+    raised = (budget_day < asof_day) & (rng.random(n) < 0.85)
+    demand_day = np.where(raised, budget_day + rng.integers(-10, 30, n), np.nan)
+
+    due = np.round(rep(agreement) / nm + rng.normal(0, 1000, n), 2)
+    due[rng.random(n) < 0.03] = np.nan
+    tax = np.round(due * 0.05, 2)
+    paid = raised & (rng.random(n) < 0.8)
+    payment = np.where(paid, np.round(due * rng.choice([0.0, 0.5, 1.0, 1.05], n), 2), np.nan)
+    over_taxed = paid & (rng.random(n) < 0.03)
+    tax[over_taxed] = payment[over_taxed] + 10
+    payment_day = np.where(paid, demand_day + rng.integers(-40, 60, n), np.nan)
+    completed = np.where(raised, 1, (rng.random(n) < 0.2).astype(int))
+
+    if messy:
+        dates = _date_strings
+        money = lambda v: _messy_amounts(v, rng)
+    else:
+        dates = _dates
+        money = lambda v: v
+
+    return pd.DataFrame({
+        "Application / Booking ID": rep(booking_id),
+        "Unit/Property Name (Application / Booking ID)": rep(property_name),
+        "Customer Name": rep(customer),
+        "Tower": rep(np.char.add("T", tower.astype(str))),
+        "Type": rep(unit_type),
+        "Active": rep(active),
+        "Milestone Name": np.char.add("Milestone ", (m + 1).astype(str)),
+        "Is Milestone Completed": completed,
+        "Amount Percent": np.full(n, round(100.0 / nm, 4)),
+        "Booking Date": dates(rep(booking_day)),
+        "Agreement Registration Date": dates(rep(reg_day)),
+        "Budgeted Date": dates(budget_day),
+        "Demand Generation Date": dates(demand_day),
+        "Actual Payment Date": dates(payment_day),
+        "Total Agreement Value": money(rep(agreement)),
+        "Other Charges (Corpus+Maintenance)": money(rep(other_charges)),
+        "Total Amount Due": money(due),
+        "Payment Received": money(payment),
+        "Total Service Tax On PPD": money(tax),
+    })
+
+
+def pad_columns(df: pd.DataFrame, n: int, seed: int = 0) -> pd.DataFrame:
+    """df plus n unused "Custom Field <i>" columns (text, number, date in turn), like a full export or report."""
+    rng = np.random.default_rng(seed)
+    extra = {}
+    for i in range(n):
+        name = f"Custom Field {i + 1}"
+        if i % 3 == 0:
+            extra[name] = rng.choice(["Alpha", "Beta", "Gamma", "Delta", None], len(df))
+        elif i % 3 == 1:
+            extra[name] = rng.integers(0, 100_000, len(df)).astype(float)
+        else:
+            extra[name] = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 2000, len(df)), unit="D")
+    return pd.concat([df, pd.DataFrame(extra, index=df.index)], axis=1) if extra else df
+
+
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    out = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(f"synthetic_{rows}.csv")
+    df = generate_export(max(rows // 10, 1))
+    if out.suffix == ".parquet":
+        df.astype({c: str for c in df.columns if df[c].dtype == object}).to_parquet(out, index=False)
+    elif out.suffix == ".xlsx":
+        df.to_excel(out, index=False)
+    else:
+        df.to_csv(out, index=False)
+    print(f"Wrote {len(df):,} rows to {out}")
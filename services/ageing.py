@@ -0,0 +1,129 @@
+import re
+from typing import Dict, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from services.caching import cached
+from services.compute import get_booking_facts
+from services.dataset import Dataset, derived
+
+
+# ---------- Ageing Analysis ----------
+# Bucket edges are the first day of every bucket after the first: with edges (30, 61, 91) ages below
+# 30 days fall in bucket 0, 30-60 in bucket 1, 61-90 in bucket 2 and the rest (or unknown ages) in the
+# last one, as utils.formatting.bucket did per row. Dates are kept as int64 nanoseconds once per
+# dataset, so a new as-of date is a subtraction and new edges a searchsorted over the same day counts.
+DEFAULT_AGEING_EDGES: Tuple[int, ...] = (30, 61, 91)
+DEFAULT_AGEING_LABELS = ('< 30 Days', '31 - 60 Days', '61 - 90 Days', '> 90 Days')
+# A demand is overdue this many days after it was raised
+OVERDUE_GRACE_DAYS = 15
+_DAY_NS = 86_400 * 10**9
+_NAT = np.iinfo(np.int64).min
+
+
+def parse_edges(text: str) -> Tuple[int, ...]:
+    """Bucket edges from text such as "0/15/30/60/90/180" or "30, 61, 91"; raises ValueError unless strictly increasing."""
+    edges = tuple(int(part) for part in re.split(r"[\s,/;]+", text.strip()) if part)
+    if not edges or any(b <= a for a, b in zip(edges, edges[1:])):
+        raise ValueError(f"Bucket edges must be increasing whole numbers of days, got '{text}'")
+    return edges
+
+
+def ageing_labels(edges: Sequence[int]) -> Tuple[str, ...]:
+    """One label per bucket: "< e0 Days", "e0 - e1-1 Days", ..., "> en-1 Days"."""
+    edges = tuple(edges)
+    if edges == DEFAULT_AGEING_EDGES:
+        return DEFAULT_AGEING_LABELS
+    middle = [f'{a} - {b - 1} Days' for a, b in zip(edges, edges[1:])]
+    return (f'< {edges[0]} Days', *middle, f'> {edges[-1] - 1} Days')
+
+
+def bucket_days(days: np.ndarray, edges: Sequence[int]) -> np.ndarray:
+    """Bucket index per age in days (float, NaN when unknown); unknown ages go to the last bucket."""
+    out = np.searchsorted(np.asarray(edges, dtype='float64'), days, side='right')
+    out[np.isnan(days)] = len(edges)
+    return out
+
+
+def _date_ns(s: pd.Series) -> np.ndarray:
+    return s.to_numpy(dtype='datetime64[ns]').view('int64')
+
+
+def _days_between(later, earlier: np.ndarray) -> np.ndarray:
+    """Whole days from earlier to later (floored, like Timedelta.days); NaN where either date is missing."""
+    missing = (later == _NAT) | (earlier == _NAT)
+    days = np.floor_divide(later - earlier, _DAY_NS).astype('float64')
+    days[missing] = np.nan
+    return days
+
+
+def _ageing_base(dataset: Dataset) -> dict:
+    """Date-independent inputs of the three panels: row subsets, booking codes and dates as int64 ns."""
+    d = dataset.frame
+    cm = dataset.column_map
+    codes, facts = get_booking_facts(dataset)
+    booking_ns = _date_ns(d[cm.booking_col])
+    registered = d[cm.reg_date_col].notna().to_numpy()
+    unreg = np.flatnonzero((codes >= 0) & ~registered)
+    reg = np.flatnonzero((codes >= 0) & registered)
+    raised = np.flatnonzero(d[cm.demand_gen_col].notna().to_numpy())
+    overdue = facts['Amount Overdue'].to_numpy(dtype='float64')
+    return {
+        "unreg_codes": codes[unreg],
+        "unreg_booking_ns": booking_ns[unreg],
+        "reg_codes": codes[reg],
+        "tat_days": _days_between(_date_ns(d[cm.reg_date_col])[reg], booking_ns[reg]),
+        "raised_codes": codes[raised],
+        "raised_demand_ns": _date_ns(d[cm.demand_gen_col])[raised],
+        # The booking's overdue rollup on each raised row (0 without a booking), as attach_booking_rollups gives
+        "raised_overdue": np.where(codes[raised] >= 0, overdue[np.maximum(codes[raised], 0)], 0.0),
+        "n_bookings": len(facts),
+    }
+
+
+def _distinct_per_bucket(codes: np.ndarray, buckets: np.ndarray, n_buckets: int, n_bookings: int) -> np.ndarray:
+    """Distinct bookings per bucket (rows without a booking are not counted): one scatter into a booking x bucket grid."""
+    booked = codes >= 0
+    seen = np.zeros((n_bookings, n_buckets), dtype=bool)
+    seen[codes[booked], buckets[booked]] = True
+    return seen.sum(axis=0)
+
+
+@cached
+def compute_ageing(
+    dataset: Dataset,
+    today: pd.Timestamp,
+    overdue_threshold: float = 0.0,
+    edges: Tuple[int, ...] = DEFAULT_AGEING_EDGES,
+) -> Dict[str, pd.DataFrame]:
+    """
+    The three Ageing Analysis panels as of today (cached per dataset, as-of date, threshold and edges):
+    "unregistered" (bookings without registration by days since booking), "registration_tat" (registered
+    bookings by booking-to-registration days) and "overdue" (overdue amount in ₹ Cr and bookings by days
+    past the demand date plus OVERDUE_GRACE_DAYS, on bookings whose overdue exceeds overdue_threshold).
+    """
+    today_ns = pd.to_datetime(today).normalize().as_unit('ns').value
+    edges = tuple(edges)
+    labels = list(ageing_labels(edges))
+    n = len(labels)
+    base = derived(dataset, 'ageing_base', lambda d: _ageing_base(dataset))
+
+    unreg_days = _days_between(today_ns, base["unreg_booking_ns"])
+    unregistered = pd.DataFrame({
+        'Ageing Bucket': labels,
+        'User Count': _distinct_per_bucket(base["unreg_codes"], bucket_days(unreg_days, edges), n, base["n_bookings"]),
+    })
+    registration_tat = pd.DataFrame({
+        'TAT Bucket': labels,
+        'User Count': _distinct_per_bucket(base["reg_codes"], bucket_days(base["tat_days"], edges), n, base["n_bookings"]),
+    })
+
+    over = base["raised_overdue"] > overdue_threshold
+    # Raised rows always have a demand date
+    due_ns = base["raised_demand_ns"][over] + OVERDUE_GRACE_DAYS * _DAY_NS
+    overdue_buckets = bucket_days(_days_between(today_ns, due_ns), edges)
+    overdue = pd.DataFrame({
+        'Overdue Bucket': labels,
+        'Overdue Amt (Cr)': np.bincount(overdue_buckets, weights=base["raised_overdue"][over], minlength=n) / 1e7,
+        'User Count': _distinct_per_bucket(base["raised_codes"][over], overdue_buckets, n, base["n_bookings"]),
+    })
+    return {"unregistered": unregistered, "registration_tat": registration_tat, "overdue": overdue}
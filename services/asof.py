@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from utils.types import ColumnMapping
+
+
+def _to_days(values) -> np.ndarray:
+    """Normalized datetimes -> int64 day numbers (preprocessing normalizes every date column to midnight)."""
+    return np.asarray(values, dtype='datetime64[D]').astype('int64')
+
+
+class PrefixIndex:
+    """
+    Rows sorted by (group, date) with cumulative sums of value columns. Sums of rows dated before or
+    through an as-of date come from one vectorized binary search plus prefix-sum differences,
+    i.e. O(groups * log n) per as-of date instead of a pass over the frame.
+    """
+
+    def __init__(self, dates, values: np.ndarray, groups: np.ndarray = None, n_groups: int = 1):
+        days = _to_days(dates)
+        values = np.asarray(values, dtype='float64')
+        # One value column may come as a 1-D array; an empty subset must still be (0, k)
+        values = np.nan_to_num(values[:, None] if values.ndim == 1 else values)
+        groups = np.zeros(len(days), dtype='int64') if groups is None else np.asarray(groups, dtype='int64')
+
+        self._dmin = int(days.min()) if len(days) else 0
+        # Span leaves one unused slot per group so clipped needles never collide with a neighbour
+        self._span = (int(days.max()) - self._dmin + 2) if len(days) else 2
+        self._n_groups = n_groups
+
+        keys = groups * self._span + (days - self._dmin)
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]
+        self._cum = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values[order], axis=0)])
+        self._group_base = np.arange(n_groups, dtype='int64') * self._span
+        self._starts = np.searchsorted(self._keys, self._group_base, side='left')
+        self._ends = np.searchsorted(self._keys, self._group_base + self._span, side='left')
+
+    def _upto(self, today, side: str) -> np.ndarray:
+        day = int(_to_days([pd.Timestamp(today).normalize()])[0])
+        rel = np.clip(day - self._dmin, -1, self._span - 1)
+        k = np.searchsorted(self._keys, self._group_base + rel, side=side)
+        return self._cum[k] - self._cum[self._starts]
+
+    def before(self, today) -> np.ndarray:
+        """Per-group sums over rows dated strictly before today; shape (n_groups, n_values)."""
+        return self._upto(today, 'left')
+
+    def through(self, today) -> np.ndarray:
+        """Per-group sums over rows dated on or before today."""
+        return self._upto(today, 'right')
+
+    def total(self) -> np.ndarray:
+        """Per-group sums over all indexed rows."""
+        return self._cum[self._ends] - self._cum[self._starts]
+
+    def after(self, today) -> np.ndarray:
+        """Per-group sums over rows dated strictly after today."""
+        return self.total() - self.through(today)
+
+
+@dataclass
+class AsOfIndex:
+    """Everything that depends on the as-of date, pre-sorted once per dataset."""
+    # Rows with a demand date; amount due, tax, payment received
+    demand: PrefixIndex
+    # Same rows restricted to bookings with / without a registered row
+    demand_reg: PrefixIndex
+    demand_unreg: PrefixIndex
+    # Rows with a budgeted date and no demand yet; amount due
+    pending: PrefixIndex
+    pending_reg: PrefixIndex
+    pending_unreg: PrefixIndex
+    # Amount due grouped by booking code / property code
+    demand_by_booking: PrefixIndex
+    pending_by_booking: PrefixIndex
+    demand_by_property: PrefixIndex
+    pending_by_property: PrefixIndex
+    property_labels: pd.Index
+
+    def demand_totals(self, today) -> dict:
+        """Amount due, tax and payment received on rows whose demand was generated before today."""
+        amt, tax, pay = self.demand.before(today)[0]
+        return {"amount_due": amt, "tax": tax, "payment": pay}
+
+    def working_due(self, today) -> dict:
+        """Demand buckets for the working totals (all rows, registered and unregistered bookings)."""
+        return {
+            "total_due": self.demand.before(today)[0, 0],
+            "reg_due": self.demand_reg.before(today)[0, 0],
+            "unreg_due": self.demand_unreg.before(today)[0, 0],
+            "total_due_n": self.pending.through(today)[0, 0],
+            "reg_due_n": self.pending_reg.through(today)[0, 0],
+            "unreg_due_n": self.pending_unreg.through(today)[0, 0],
+            "total_due_nn": self.pending.after(today)[0, 0],
+            "reg_due_nn": self.pending_reg.after(today)[0, 0],
+            "unreg_due_nn": self.pending_unreg.after(today)[0, 0],
+        }
+
+    def booking_asof(self, today) -> pd.DataFrame:
+        """Date-dependent per-booking rollups, positionally aligned with the booking codes."""
+        return pd.DataFrame({
+            'Total Demand Generated Till Date': self.demand_by_booking.before(today)[:, 0],
+            'Budget Passed, Demand Not Generated': self.pending_by_booking.through(today)[:, 0],
+            'Expected Future Demand': self.pending_by_booking.after(today)[:, 0],
+        })
+
+    def property_asof(self, today) -> pd.DataFrame:
+        """Date-dependent per-property sums indexed by property name."""
+        return pd.DataFrame({
+            'Total Demand Generated': self.demand_by_property.before(today)[:, 0],
+            'Expected Future Demand': self.pending_by_property.after(today)[:, 0],
+            'Budget Passed, Demand Not Generated': self.pending_by_property.through(today)[:, 0],
+        }, index=self.property_labels)
+
+
+def build_asof_index(
+    d: pd.DataFrame,
+    column_map: ColumnMapping,
+    booking_codes: np.ndarray,
+    booking_registered: np.ndarray,
+    booking_unregistered: np.ndarray,
+) -> AsOfIndex:
+    """
+    Build the as-of index for a preprocessed frame. booking_codes maps rows to bookings (-1 for rows
+    without a booking ID); the two flag arrays mark bookings with registered / unregistered rows.
+    """
+    demand_date = d[column_map.demand_gen_col]
+    budget_date = d[column_map.budgeted_date_col]
+    amt = d[column_map.amount_due_col].to_numpy(dtype='float64', na_value=np.nan)
+    tax = d[column_map.tax_col].to_numpy(dtype='float64', na_value=np.nan)
+    pay = d[column_map.payment_received_col].to_numpy(dtype='float64', na_value=np.nan)
+
+    raised = demand_date.notna().to_numpy()
+    pending = (budget_date.notna() & demand_date.isna()).to_numpy()
+
+    booked = booking_codes >= 0
+    n_bookings = len(booking_registered)
+    row_reg = np.zeros(len(d), dtype=bool)
+    row_unreg = np.zeros(len(d), dtype=bool)
+    row_reg[booked] = booking_registered[booking_codes[booked]]
+    row_unreg[booked] = booking_unregistered[booking_codes[booked]]
+
+    prop_codes, prop_labels = pd.factorize(d[column_map.property_name], sort=True)
+    has_prop = prop_codes >= 0
+
+    demand_values = np.column_stack([amt, tax, pay])
+    demand_dates = demand_date.to_numpy()
+    budget_dates = budget_date.to_numpy()
+
+    def _subset(dates, values, mask, groups=None, n_groups=1):
+        return PrefixIndex(
+            dates[mask], values[mask],
+            groups=None if groups is None else groups[mask],
+            n_groups=n_groups,
+        )
+
+    return AsOfIndex(
+        demand=_subset(demand_dates, demand_values, raised),
+        demand_reg=_subset(demand_dates, amt, raised & row_reg),
+        demand_unreg=_subset(demand_dates, amt, raised & row_unreg),
+        pending=_subset(budget_dates, amt, pending),
+        pending_reg=_subset(budget_dates, amt, pending & row_reg),
+        pending_unreg=_subset(budget_dates, amt, pending & row_unreg),
+        demand_by_booking=_subset(demand_dates, amt, raised & booked, booking_codes, n_bookings),
+        pending_by_booking=_subset(budget_dates, amt, pending & booked, booking_codes, n_bookings),
+        demand_by_property=_subset(demand_dates, amt, raised & has_prop, prop_codes, len(prop_labels)),
+        pending_by_property=_subset(budget_dates, amt, pending & has_prop, prop_codes, len(prop_labels)),
+        property_labels=pd.Index(np.asarray(prop_labels), name=column_map.property_name),
+    )
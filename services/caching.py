@@ -0,0 +1,62 @@
+import functools
+import threading
+from typing import Callable, Dict, Optional
+from services.profiling import active_profile, mark_cache, rows_of, stage
+
+
+# ---------- Pluggable result cache ----------
+# Service entry points are decorated with @cached. The backend is a decorator factory
+# (func -> cached func) chosen at runtime: an in-process LRU by default, Streamlit's resource cache
+# inside the app, or no caching for one-shot runs. The services themselves never import Streamlit.
+# While a profile is active each call is recorded as a stage, marked "miss" when the backend ran func.
+Backend = Callable[[Callable], Callable]
+
+
+def lru_backend(maxsize: int = 32) -> Backend:
+    """In-process LRU keyed on the call arguments (Dataset handles hash by key)."""
+    return lambda func: functools.lru_cache(maxsize=maxsize)(func)
+
+
+def no_cache(func: Callable) -> Callable:
+    return func
+
+
+_backend: Backend = lru_backend()
+_bound: Dict[Callable, Callable] = {}
+_lock = threading.Lock()
+
+
+def set_cache_backend(backend: Optional[Backend]) -> None:
+    """Swap the cache backend for every @cached function; None disables caching."""
+    global _backend
+    with _lock:
+        _backend = backend or no_cache
+        _bound.clear()
+
+
+def cached(func: Callable) -> Callable:
+    """Cache func's results with the current backend. Cached results are shared; treat them as read-only."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        impl = _bound.get(func)
+        if impl is None:
+            with _lock:
+                impl = _bound.get(func)
+                if impl is None:
+                    impl = _bound[func] = _backend(_reporting_miss(func))
+        if active_profile() is None:
+            return impl(*args, **kwargs)
+        with stage(label, rows=rows_of(args)) as record:
+            record.cache = "hit"
+            return impl(*args, **kwargs)
+    label = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+    return wrapper
+
+
+def _reporting_miss(func: Callable) -> Callable:
+    """func as handed to the backend: runs only on a cache miss, which it reports to the profile."""
+    @functools.wraps(func)
+    def compute(*args, **kwargs):
+        mark_cache("miss")
+        return func(*args, **kwargs)
+    return compute
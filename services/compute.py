@@ -1,28 +1,14 @@
+import numpy as np
 import pandas as pd
-import streamlit as st
-from typing import Union
 from utils.types import KPIMetrics, ColumnMapping
-from utils.helper import to_cr
-
-
-# ---------- Internal utilities (date/tax/filter standardization) ----------
-def _parse_and_normalize_dates(df: pd.DataFrame, column_map: ColumnMapping) -> pd.DataFrame:
-    """Parse date columns with dayfirst=True and normalize to midnight."""
-    d = df.copy()
-    date_cols = [
-        column_map.booking_col,
-        column_map.reg_date_col,
-        column_map.actual_payment_col,
-        column_map.budgeted_date_col,
-        column_map.demand_gen_col,
-    ]
-    for c in date_cols:
-        if c and c in d.columns:
-            d[c] = pd.to_datetime(d[c], errors='coerce', dayfirst=True)
-            d[c] = d[c].dt.normalize()
-    return d
+from services.dataset import Dataset, derived
+from services.asof import AsOfIndex, build_asof_index
+from services.caching import cached
+from services.profiling import profiled
+from utils.formatting import to_cr
 
 
+# ---------- Internal utilities (tax/filter standardization) ----------
 def _net_payment(series_payment: pd.Series, series_tax: pd.Series) -> pd.Series:
     """Compute net payment after tax with lower bound at 0."""
     return (series_payment.fillna(0) - series_tax.fillna(0)).clip(lower=0)
@@ -40,48 +26,15 @@ def _expected_future_demand_mask(d: pd.DataFrame, column_map: ColumnMapping, tod
     return d[column_map.budgeted_date_col].notna() & (d[column_map.budgeted_date_col] > today) & (d[column_map.demand_gen_col].isna())
 
 
-# ---------- Public preprocessing helper ----------
-@st.cache_data(ttl=900)
-def preprocess_df(df: pd.DataFrame, column_map: ColumnMapping) -> pd.DataFrame:
-    """Standardize dates and numeric fields across the app."""
-    d = _parse_and_normalize_dates(df, column_map)
-    # Ensure numeric for amounts that are commonly used
-    num_cols = [
-        column_map.total_agreement_col,
-        column_map.other_charges,
-        column_map.amount_due_col,
-        column_map.payment_received_col,
-        column_map.tax_col,
-    ]
-    for c in num_cols:
-        if c and c in d.columns:
-            # Handle INR-formatted strings like "₹1,23,456" by stripping symbols/commas first
-            d[c] = pd.to_numeric(d[c].astype(str).str.replace(r'[₹,]', '', regex=True), errors='coerce')
-    return d
-
-
-@st.cache_data(ttl=900)
-def compute_kpis(
-    df: pd.DataFrame,
-    today: pd.Timestamp,
-    column_map: ColumnMapping,
-    overdue_threshold: float = 0.0,
-) -> KPIMetrics:
-    """
-    Compute all KPIs for the dashboard header using standardized logic.
-    Returns KPIMetrics dataclass with all 7 metrics.
-    """
-    today = pd.to_datetime(today).normalize()
-    d = preprocess_df(df, column_map)
-
+# ---------- Date-independent bases (computed once per dataset) ----------
+def _kpi_base(d: pd.DataFrame, column_map: ColumnMapping) -> dict:
+    """Parts of the header KPIs that do not depend on the as-of date."""
     # Basic counts
     total_units = len(d[column_map.application_booking_id].dropna().unique())
     units_registered = len(d[d[column_map.reg_date_col].notna()][column_map.application_booking_id].unique())
-    units_unregistered = total_units - units_registered
-    total_units_sold = total_units  # Same as total units for now
 
     # Value calculations per booking
-    booking_summary = d.groupby(column_map.application_booking_id).agg({
+    booking_summary = d.groupby(column_map.application_booking_id, observed=True).agg({
         column_map.total_agreement_col: 'first',
         column_map.other_charges: 'first',
         column_map.amount_due_col: 'sum',
@@ -98,33 +51,16 @@ def compute_kpis(
     # Total Corpus+Maintenance (deduped per unique property)
     # Each row may repeat corpus/maintenance per milestone; we take first value per property
     if column_map.property_name in d.columns and column_map.other_charges in d.columns:
-        property_summary = d.groupby(column_map.property_name).agg({column_map.other_charges: 'first'}).reset_index()
+        property_summary = d.groupby(column_map.property_name, observed=True).agg({column_map.other_charges: 'first'}).reset_index()
         total_corpus_maintenance = property_summary[column_map.other_charges].fillna(0).sum()
     else:
         total_corpus_maintenance = 0.0
 
-    # Total Demand Generated (where demand date < today)
-    total_demand_generated = d.loc[_demand_generated_mask(d, column_map, today), column_map.amount_due_col].sum()
-
-    # Demand Generated + Tax and Tax on Demand
-    demand_tax = d.loc[_demand_generated_mask(d, column_map, today), column_map.tax_col].sum()
-    total_demand_plus_tax = (total_demand_generated or 0) + (demand_tax or 0)
-    tax_on_demand = demand_tax or 0
-
     # Total Collection (Net Payment after tax, per booking)
-    collection_per_booking = booking_summary[[
-        column_map.application_booking_id,
-        column_map.payment_received_col,
-        column_map.tax_col,
-    ]].copy()
-    collection_per_booking['net_payment'] = _net_payment(
-        collection_per_booking[column_map.payment_received_col],
-        collection_per_booking[column_map.tax_col]
+    net_payment = _net_payment(
+        booking_summary[column_map.payment_received_col],
+        booking_summary[column_map.tax_col]
     )
-    total_collection = collection_per_booking['net_payment'].sum()
-
-    # Tax on Collections (gross tax summed)
-    tax_on_collections = collection_per_booking[column_map.tax_col].sum()
 
     # Amount Yet to be Collected
     # Per milestone outstanding = max(Amount Due - Payment Received (gross), 0)
@@ -133,44 +69,95 @@ def compute_kpis(
     pay_gross = d[column_map.payment_received_col].fillna(0)
     outstanding_row = (amt_due - pay_gross).clip(lower=0)
     # Sum across milestones per booking, then across bookings
-    outstanding_per_booking = outstanding_row.groupby(d[column_map.application_booking_id]).sum()
-    amount_yet_to_be_collected = outstanding_per_booking.sum()
+    outstanding_per_booking = outstanding_row.groupby(d[column_map.application_booking_id], observed=True).sum()
+
+    return {
+        "total_units": total_units,
+        "units_registered": units_registered,
+        "value_of_units": value_of_units,
+        "total_corpus_maintenance": total_corpus_maintenance,
+        "total_collection": net_payment.sum(),
+        # Tax on Collections (gross tax summed)
+        "tax_on_collections": booking_summary[column_map.tax_col].sum(),
+        "amount_yet_to_be_collected": outstanding_per_booking.sum(),
+    }
+
+
+def _monthly_base(d: pd.DataFrame, column_map: ColumnMapping):
+    """Expected (by Budgeted Date) and actual net collections (by Payment Date) per month."""
+    budgeted = d[column_map.budgeted_date_col]
+    expected_monthly = (
+        d.loc[budgeted.notna(), column_map.amount_due_col]
+        .groupby(budgeted.dropna().dt.to_period('M')).sum()
+    )
+
+    paid = d[column_map.actual_payment_col].notna()
+    net_payment = _net_payment(d.loc[paid, column_map.payment_received_col], d.loc[paid, column_map.tax_col])
+    actual_monthly = net_payment.groupby(d.loc[paid, column_map.actual_payment_col].dt.to_period('M')).sum()
+    return expected_monthly, actual_monthly
+
+
+def get_asof_index(dataset: Dataset) -> AsOfIndex:
+    """As-of index for the dataset, built once and kept in the dataset registry."""
+    def _build(d):
+        codes, facts = get_booking_facts(dataset)
+        return build_asof_index(
+            d, dataset.column_map, codes,
+            facts['is_registered'].to_numpy(),
+            facts['has_unregistered_rows'].to_numpy(),
+        )
+    return derived(dataset, 'asof_index', _build)
+
+
+@profiled()
+def compute_kpis(
+    dataset: Dataset,
+    today: pd.Timestamp,
+    overdue_threshold: float = 0.0,
+) -> KPIMetrics:
+    """
+    Compute all KPIs for the dashboard header using standardized logic.
+    Returns KPIMetrics dataclass with all 7 metrics. Only the demand totals depend on today;
+    they come from the as-of index, so changing the date costs a binary search.
+    """
+    today = pd.to_datetime(today).normalize()
+    base = derived(dataset, 'kpi_base', lambda d: _kpi_base(d, dataset.column_map))
+
+    total_units = base["total_units"]
+    units_registered = base["units_registered"]
+    units_unregistered = total_units - units_registered
+    total_units_sold = total_units  # Same as total units for now
+
+    # Total Demand Generated (where demand date < today) and tax on it
+    demand = get_asof_index(dataset).demand_totals(today)
+    total_demand_generated = demand["amount_due"]
+    demand_tax = demand["tax"]
+    total_demand_plus_tax = (total_demand_generated or 0) + (demand_tax or 0)
+    tax_on_demand = demand_tax or 0
 
     return KPIMetrics(
         total_units=total_units,
-        value_of_units_cr=to_cr(value_of_units),
+        value_of_units_cr=to_cr(base["value_of_units"]),
         total_units_sold=total_units_sold,
         total_demand_generated_cr=to_cr(total_demand_generated),
         total_demand_plus_tax_cr=to_cr(total_demand_plus_tax),
         tax_on_demand_cr=to_cr(tax_on_demand),
-        total_collection_cr=to_cr(total_collection),
-        tax_on_collections_cr=to_cr(tax_on_collections),
-        amount_yet_to_be_collected_cr=to_cr(amount_yet_to_be_collected),
-        total_corpus_maintenance_cr=to_cr(total_corpus_maintenance),
+        total_collection_cr=to_cr(base["total_collection"]),
+        tax_on_collections_cr=to_cr(base["tax_on_collections"]),
+        amount_yet_to_be_collected_cr=to_cr(base["amount_yet_to_be_collected"]),
+        total_corpus_maintenance_cr=to_cr(base["total_corpus_maintenance"]),
         units_registered=units_registered,
         units_unregistered=units_unregistered,
     )
 
 
-@st.cache_data(ttl=900)
-def compute_monthly_trend(df: pd.DataFrame, today: pd.Timestamp, column_map: ColumnMapping):
+@profiled()
+def compute_monthly_trend(dataset: Dataset, today: pd.Timestamp):
     """Compute 24-month expected vs actual trend data with standardized net payment and dates."""
     today = pd.to_datetime(today).normalize()
-    d = preprocess_df(df, column_map)
-
-    # Expected (by Budgeted Date)
-    expected_df = d[d[column_map.budgeted_date_col].notna()].copy()
-    expected_df['month'] = expected_df[column_map.budgeted_date_col].dt.to_period('M')
-    expected_monthly = expected_df.groupby('month')[column_map.amount_due_col].sum()
-
-    # Actuals (by Payment Date)
-    actual_df = d[d[column_map.actual_payment_col].notna()].copy()
-    actual_df['month'] = actual_df[column_map.actual_payment_col].dt.to_period('M')
-    actual_df['net_payment'] = _net_payment(
-        actual_df[column_map.payment_received_col],
-        actual_df[column_map.tax_col]
+    expected_monthly, actual_monthly = derived(
+        dataset, 'monthly_base', lambda d: _monthly_base(d, dataset.column_map)
     )
-    actual_monthly = actual_df.groupby('month')['net_payment'].sum()
 
     # Combine and calculate misses
     all_months = pd.period_range(start=today - pd.DateOffset(months=24), end=today, freq='M')
@@ -182,137 +169,309 @@ def compute_monthly_trend(df: pd.DataFrame, today: pd.Timestamp, column_map: Col
     return trend_df
 
 
-@st.cache_data(ttl=900)
-def compute_working_data(df: pd.DataFrame, today: pd.Timestamp, column_map: ColumnMapping):
-    """Compute working aggregates used by legacy visualizations from a single, centralized place."""
+# ---------- Per-property metrics ----------
+# Column -> how each property's rows aggregate, for the date-independent part of the table
+_PROPERTY_AGGREGATES = {
+    'agreement': 'sum', 'corpus': 'first', 'collection': 'sum', 'overdue': 'sum',
+    'registered': 'any', 'tower': 'first', 'type': 'first',
+}
+_PROPERTY_CR_COLUMNS = {
+    'agreement': 'Agreement Value (₹ Cr)',
+    'corpus': 'Corpus + Maintenance (₹ Cr)',
+    'value_of_unit': 'Value of Unit (₹ Cr)',
+    'Total Demand Generated': 'Total Demand Generated (₹ Cr)',
+    'collection': 'Total Collection (₹ Cr)',
+    'overdue': 'Amount Overdue (₹ Cr)',
+    'Expected Future Demand': 'Expected Future Demand (₹ Cr)',
+    'Budget Passed, Demand Not Generated': 'Budget Passed, Demand Not Generated (₹ Cr)',
+}
+PROPERTY_ROLLUP_LEVELS = {'tower': 'Tower', 'type': 'Type'}
+
+
+def _property_base(d: pd.DataFrame, column_map: ColumnMapping) -> pd.DataFrame:
+    """
+    Date-independent per-property aggregates in rupees from one grouped pass over the rows, positionally
+    aligned with the as-of index's property labels (both factorize the property column the same way).
+    """
+    amt = d[column_map.amount_due_col]
+    if column_map.payment_received_col in d.columns and column_map.tax_col in d.columns:
+        net_payment = _net_payment(d[column_map.payment_received_col], d[column_map.tax_col])
+    else:
+        net_payment = pd.Series(0.0, index=d.index)
+    raised = d[column_map.demand_gen_col].notna()
+
+    def optional(col):
+        return d[col] if col and col in d.columns else pd.Series(None, index=d.index, dtype=object)
+
+    contrib = pd.DataFrame({
+        'agreement': amt,
+        'corpus': d[column_map.other_charges],
+        'collection': net_payment,
+        # Amount Overdue counts rows whose demand was raised: (due - net), clipped at 0
+        'overdue': (amt - net_payment).clip(lower=0).where(raised),
+        'registered': d[column_map.reg_date_col].notna(),
+        'tower': optional(column_map.tower_col),
+        'type': optional(column_map.type_col),
+    }, index=d.index)
+
+    codes, labels = pd.factorize(d[column_map.property_name], sort=True)
+    keep = codes >= 0
+    base = contrib[keep].groupby(codes[keep], sort=True).agg(_PROPERTY_AGGREGATES)
+    base.index = pd.Index(np.asarray(labels), name=column_map.property_name)
+    return base
+
+
+def _property_frame(dataset: Dataset, today: pd.Timestamp) -> pd.DataFrame:
+    """Per-property aggregates in rupees as of today (date-dependent sums from the as-of index), by property name."""
+    base = derived(dataset, 'property_base', lambda d: _property_base(d, dataset.column_map))
+    frame = base.assign(**get_asof_index(dataset).property_asof(today).set_axis(base.index))
+    frame['value_of_unit'] = frame['agreement'] + frame['corpus'].fillna(0)
+    return frame.sort_index()
+
+
+def _to_cr_columns(frame: pd.DataFrame) -> pd.DataFrame:
+    """The rupee columns of a property/rollup frame in ₹ Cr, with display names (to_cr on whole columns)."""
+    return pd.DataFrame({
+        name: frame[col].astype('float64').fillna(0).to_numpy() / 1e7 for col, name in _PROPERTY_CR_COLUMNS.items()
+    }, index=frame.index)
+
+
+def _has_property_columns(dataset: Dataset) -> bool:
+    prop_col = dataset.column_map.property_name
+    corpus_col = dataset.column_map.other_charges
+    return bool(prop_col and corpus_col and prop_col in dataset.frame.columns and corpus_col in dataset.frame.columns)
+
+
+@cached
+def compute_property_metrics(dataset: Dataset, today: pd.Timestamp) -> pd.DataFrame:
+    """
+    Per-property table (values in ₹ Cr) sorted by Value of Unit: agreement value (sum of dues),
+    corpus + maintenance, demand buckets as of today, net collection, overdue and registration status.
+    Empty when the property or corpus column is not mapped.
+    """
+    if not _has_property_columns(dataset):
+        return pd.DataFrame()
+    frame = _property_frame(dataset, pd.to_datetime(today).normalize())
+
+    metrics_df = _to_cr_columns(frame)
+    metrics_df['Registration Status'] = np.where(frame['registered'].to_numpy(dtype=bool), 'Registered', 'Not Registered')
+    metrics_df = metrics_df.rename_axis('Property').reset_index()
+    # Sort by Value of Unit descending
+    return metrics_df.sort_values(by='Value of Unit (₹ Cr)', ascending=False)
+
+
+@cached
+def compute_property_rollups(dataset: Dataset, today: pd.Timestamp, level: str = 'tower') -> pd.DataFrame:
+    """
+    The per-property table rolled up by Tower (level="tower") or Type (level="type"): ₹ Cr sums over each
+    group's properties plus property counts, sorted by Value of Unit. A property counts towards the
+    tower/type of its first row. Empty when the property, corpus or level column is not mapped.
+    """
+    label = PROPERTY_ROLLUP_LEVELS[level]
+    level_col = getattr(dataset.column_map, f'{level}_col')
+    if not (_has_property_columns(dataset) and level_col and level_col in dataset.frame.columns):
+        return pd.DataFrame()
+    frame = _property_frame(dataset, pd.to_datetime(today).normalize())
+
+    sums = [c for c in _PROPERTY_CR_COLUMNS if c != 'value_of_unit']
+    grouped = frame.groupby(frame[level].astype(object).fillna('(blank)'), sort=True)
+    rollup = grouped[sums].sum()
+    rollup['value_of_unit'] = rollup['agreement'] + rollup['corpus']
+    rollup_df = _to_cr_columns(rollup)
+    rollup_df['Properties'] = grouped.size()
+    rollup_df['Registered Properties'] = grouped['registered'].sum().astype('int64')
+    rollup_df = rollup_df.rename_axis(label).reset_index()
+    return rollup_df.sort_values(by='Value of Unit (₹ Cr)', ascending=False)
+
+
+# ---------- Booking fact table (single grouped pass) ----------
+# Per-booking rollup columns of the booking fact table (the side table rows are joined to on demand)
+BOOKING_ROLLUP_COLUMNS = [
+    'Agreement value',
+    'Total Payment Received',
+    'Total Demand Generated Till Date',
+    'Budget Passed, Demand Not Generated',
+    'Expected Future Demand',
+    'Net payment received (AV)',
+    'Amount Overdue',
+]
+# Rollups that depend on the as-of date; these come from the as-of index
+BOOKING_ASOF_COLUMNS = [
+    'Total Demand Generated Till Date',
+    'Budget Passed, Demand Not Generated',
+    'Expected Future Demand',
+]
+
+
+def build_booking_facts(d: pd.DataFrame, column_map: ColumnMapping):
+    """
+    Factorize the booking ID once and compute every date-independent per-booking aggregate in one
+    grouped pass. Returns (codes, facts): a row -> booking code array (-1 where the booking ID is
+    missing) and a booking-level fact table indexed by booking ID in sorted order.
+    """
+    booking_id = column_map.application_booking_id
+    amt = d[column_map.amount_due_col]
+    net = _net_payment(d[column_map.payment_received_col], d[column_map.tax_col])
+    demand_raised = d[column_map.demand_gen_col].notna()
+    registered = d[column_map.reg_date_col].notna()
+    agreement = d[column_map.total_agreement_col]
+    corpus = d[column_map.other_charges]
+
+    codes, uniques = pd.factorize(d[booking_id], sort=True)
+
+    # Row-level contributions; masked-out rows are NaN so the grouped sum/first skip them
+    sum_cols = [c for c in BOOKING_ROLLUP_COLUMNS if c not in BOOKING_ASOF_COLUMNS]
+    first_cols = [
+        'agreement_first', 'agreement_first_reg', 'agreement_first_unreg',
+        'corpus_first', 'corpus_first_reg', 'corpus_first_unreg',
+    ]
+    contrib = pd.DataFrame({
+        'Agreement value': amt,
+        'Total Payment Received': d[column_map.payment_received_col],
+        'Net payment received (AV)': net.where(demand_raised),
+        'Amount Overdue': (amt - net).where(demand_raised),
+        'agreement_first': agreement,
+        'agreement_first_reg': agreement.where(registered),
+        'agreement_first_unreg': agreement.where(~registered),
+        'corpus_first': corpus,
+        'corpus_first_reg': corpus.where(registered),
+        'corpus_first_unreg': corpus.where(~registered),
+        'is_registered': registered,
+        'has_unregistered_rows': ~registered,
+    }, index=d.index)
+
+    booked = codes >= 0
+    grouped = contrib[booked].groupby(codes[booked], sort=True)
+    facts = pd.concat([
+        grouped[sum_cols].sum(),
+        grouped[first_cols].first(),
+        grouped[['is_registered', 'has_unregistered_rows']].any(),
+    ], axis=1)
+    # Plain labels even when the booking ID column is categorical
+    facts.index = pd.Index(np.asarray(uniques), name=booking_id)
+    return codes, facts
+
+
+def get_booking_facts(dataset: Dataset):
+    """Date-independent (codes, facts) for the dataset, built once and kept in the dataset registry."""
+    return derived(dataset, 'booking_facts', lambda d: build_booking_facts(d, dataset.column_map))
+
+
+@profiled()
+def compute_booking_facts(dataset: Dataset, today: pd.Timestamp) -> pd.DataFrame:
+    """Booking-level fact table as of today: cached date-independent facts plus as-of rollups from the index."""
+    _, facts = get_booking_facts(dataset)
+    asof = get_asof_index(dataset).booking_asof(today)
+    asof.index = facts.index
+    return pd.concat([facts, asof], axis=1)
+
+
+@profiled()
+def compute_working_totals(dataset: Dataset, today: pd.Timestamp) -> dict:
+    """Working totals (units, sales, corpus, demand buckets, collections) as of today."""
+    today = pd.to_datetime(today).normalize()
+    column_map = dataset.column_map
+    _, facts = get_booking_facts(dataset)
+
+    # Booking-level partitions; a booking with both registered and unregistered rows is in both
+    reg = facts[facts['is_registered']]
+    unreg = facts[facts['has_unregistered_rows']]
+
+    totals = {
+        "total_units": derived(dataset, 'property_count', lambda d: d[column_map.property_name].nunique()),
+        "booked_units": len(facts),
+        "reg_units": len(reg),
+        "unreg_units": len(unreg),
+        "total_sales_act": facts['agreement_first'].sum(),
+        "reg_sales_act": reg['agreement_first_reg'].sum(),
+        "unreg_sales_act": unreg['agreement_first_unreg'].sum(),
+        "total_corpus": facts['corpus_first'].sum(),
+        "reg_corpus": reg['corpus_first_reg'].sum(),
+        "unreg_corpus": unreg['corpus_first_unreg'].sum(),
+        "total_sales": facts['Agreement value'].sum(),
+        "reg_sales": reg['Agreement value'].sum(),
+        "unreg_sales": unreg['Agreement value'].sum(),
+    }
+    # Demand buckets from the as-of index
+    totals.update(get_asof_index(dataset).working_due(today))
+    # Collections (no tax)
+    totals.update({
+        "total_collected_notax": facts['Net payment received (AV)'].sum(),
+        "reg_collected_notax": reg['Net payment received (AV)'].sum() if not reg.empty else 0,
+        "unreg_collected_notax": unreg['Net payment received (AV)'].sum() if not unreg.empty else 0,
+    })
+    return totals
+
+
+def _broadcast(codes, values, fill) -> np.ndarray:
+    """Gather per-booking values onto rows by booking code (no merge)."""
+    values = np.asarray(values, dtype='float64')
+    out = np.full(len(codes), fill, dtype='float64')
+    booked = codes >= 0
+    out[booked] = values[codes[booked]]
+    return out
+
+
+@profiled()
+def attach_booking_rollups(data: dict, frame: pd.DataFrame, columns=None) -> pd.DataFrame:
+    """
+    Copy of frame with per-booking rollups from the booking_facts side table joined onto its rows.
+    frame must be a row subset of data["df"] (its index is the row position). Rows without a booking
+    get NaN agreement value and 0 for the remaining rollups.
+    """
+    codes = data["booking_codes"][frame.index.to_numpy()]
+    facts = data["booking_facts"]
+    return frame.assign(**{
+        col: _broadcast(codes, facts[col], np.nan if col == 'Agreement value' else 0.0)
+        for col in (columns or BOOKING_ROLLUP_COLUMNS)
+    })
+
+
+@profiled()
+def compute_working_data(dataset: Dataset, today: pd.Timestamp):
+    """
+    Compute working aggregates used by legacy visualizations from a single, centralized place.
+    Row frames are views/subsets of the shared dataset frame; per-booking rollups stay in the
+    booking-indexed "booking_facts" table (join them onto rows with attach_booking_rollups).
+    """
     _today = pd.to_datetime(today).normalize()
-    d = preprocess_df(df, column_map)
+    column_map = dataset.column_map
+    d = dataset.frame
 
     booking_id = column_map.application_booking_id
     amount_due_col = column_map.amount_due_col
     payment_received_col = column_map.payment_received_col
     tax_col = column_map.tax_col
     reg_date_col = column_map.reg_date_col
-    budgeted_date_col = column_map.budgeted_date_col
     demand_gen_col = column_map.demand_gen_col
-    total_agreement_col = column_map.total_agreement_col
-    other_charges = column_map.other_charges
-    property_name = column_map.property_name
-
-    # Agreement value per booking = sum of dues
-    d['Agreement value'] = d.groupby(booking_id)[amount_due_col].transform('sum')
-
-    # Total Payment Received per booking (gross)
-    filtered_pay_df = d[d[payment_received_col].notnull()].copy()
-    total_pay_per_booking = (
-        filtered_pay_df.groupby(booking_id)[payment_received_col].sum().reset_index()
-        .rename(columns={payment_received_col: 'Total Payment Received'})
-    )
-    d = d.merge(total_pay_per_booking, on=booking_id, how='left')
-    d['Total Payment Received'] = d['Total Payment Received'].fillna(0)
-
-    # Total Demand Generated Till Date (sum dues where demand_gen < today)
-    filtered_due_df = d[_demand_generated_mask(d, column_map, _today)].copy()
-    due_totals = (
-        filtered_due_df.groupby(booking_id)[amount_due_col].sum().reset_index()
-        .rename(columns={amount_due_col: 'Total Demand Generated Till Date'})
-    )
-    d = d.merge(due_totals, on=booking_id, how='left')
-    d['Total Demand Generated Till Date'] = d['Total Demand Generated Till Date'].fillna(0)
-
-    # Budget Passed, Demand Not Generated
-    delayed_demand_df = d[_budget_passed_not_raised_mask(d, column_map, _today)].copy()
-    delayed_totals = (
-        delayed_demand_df.groupby(booking_id)[amount_due_col].sum().reset_index()
-        .rename(columns={amount_due_col: 'Budget Passed, Demand Not Generated'})
-    )
-    d = d.merge(delayed_totals, on=booking_id, how='left')
-    d['Budget Passed, Demand Not Generated'] = d['Budget Passed, Demand Not Generated'].fillna(0)
-
-    # Expected Future Demand
-    future_demand_df = d[_expected_future_demand_mask(d, column_map, _today)].copy()
-    future_total = (
-        future_demand_df.groupby(booking_id)[amount_due_col].sum().reset_index()
-        .rename(columns={amount_due_col: 'Expected Future Demand'})
-    )
-    d = d.merge(future_total, on=booking_id, how='left')
-    d['Expected Future Demand'] = d['Expected Future Demand'].fillna(0)
-
-    # Net payment received (after tax) and Amount Overdue at line level for rows where demand exists
-    filtered = d[d[demand_gen_col].notnull()].copy()
-    filtered['Net payment received (AV)'] = _net_payment(filtered[payment_received_col], filtered[tax_col])
-    filtered['Amount Overdue'] = filtered[amount_due_col] - filtered['Net payment received (AV)']
-
-    # Aggregate overdue & net payment per booking
-    overdue_df = (
-        filtered.groupby(booking_id)[['Net payment received (AV)', 'Amount Overdue']]
-        .sum().reset_index()
-    )
-    d = d.merge(overdue_df, on=booking_id, how='left')
-    d['Amount Overdue'] = d['Amount Overdue'].fillna(0)
-    d['Net payment received (AV)'] = d['Net payment received (AV)'].fillna(0)
 
-    # Registered/Unregistered partitions
-    booked_df = d[d[booking_id].notnull()].copy()
-    reg_df = booked_df[booked_df[reg_date_col].notnull()].copy()
-    unreg_df = booked_df[booked_df[reg_date_col].isnull()].copy()
-
-    # Latest row per booking (by demand then budget date) for some per-booking rollups
-    sort_cols = [booking_id, demand_gen_col, budgeted_date_col]
-    d_sorted = d.sort_values(sort_cols)
-    last_by_booking = d_sorted.groupby(booking_id, as_index=False).last()
-
-    # Aggregate KPIs used by presenter
-    total_units = d[property_name].nunique()
-    booked_units = booked_df[booking_id].nunique()
-    reg_units = reg_df[booking_id].nunique()
-    unreg_units = unreg_df[booking_id].nunique()
-
-    # Agreement totals
-    total_sales_act = booked_df.groupby(booking_id)[total_agreement_col].first().sum()
-    reg_sales_act = reg_df.groupby(booking_id)[total_agreement_col].first().sum()
-    unreg_sales_act = unreg_df.groupby(booking_id)[total_agreement_col].first().sum()
-
-    total_corpus = booked_df.groupby(booking_id)[other_charges].first().sum()
-    reg_corpus = reg_df.groupby(booking_id)[other_charges].first().sum()
-    unreg_corpus = unreg_df.groupby(booking_id)[other_charges].first().sum()
-
-    total_sales = booked_df.groupby(booking_id)['Agreement value'].first().sum()
-    reg_sales = reg_df.groupby(booking_id)['Agreement value'].first().sum()
-    unreg_sales = unreg_df.groupby(booking_id)['Agreement value'].first().sum()
-
-    # Demand buckets
-    total_due = filtered_due_df[amount_due_col].sum()
-    reg_due = reg_df.groupby(booking_id).tail(1)['Total Demand Generated Till Date'].sum()
-    unreg_due = unreg_df.groupby(booking_id).tail(1)['Total Demand Generated Till Date'].sum()
-
-    total_due_n = delayed_demand_df[amount_due_col].sum()
-    reg_due_n = reg_df.groupby(booking_id).tail(1)['Budget Passed, Demand Not Generated'].sum()
-    unreg_due_n = unreg_df.groupby(booking_id).tail(1)['Budget Passed, Demand Not Generated'].sum()
-
-    total_due_nn = future_demand_df[amount_due_col].sum()
-    reg_due_nn = reg_df.groupby(booking_id).tail(1)['Expected Future Demand'].sum()
-    unreg_due_nn = unreg_df.groupby(booking_id).tail(1)['Expected Future Demand'].sum()
+    codes, _ = get_booking_facts(dataset)
+    facts = compute_booking_facts(dataset, _today)
 
-    # Collections (no tax)
-    total_collected_notax = last_by_booking['Net payment received (AV)'].sum()
-    reg_collected_notax = (
-        reg_df.sort_values(sort_cols).groupby(booking_id).last()['Net payment received (AV)'].sum()
-        if not reg_df.empty else 0
-    )
-    unreg_collected_notax = (
-        unreg_df.sort_values(sort_cols).groupby(booking_id).last()['Net payment received (AV)'].sum()
-        if not unreg_df.empty else 0
-    )
+    filtered_due_df = d[_demand_generated_mask(d, column_map, _today)]
+    delayed_demand_df = d[_budget_passed_not_raised_mask(d, column_map, _today)]
+    future_demand_df = d[_expected_future_demand_mask(d, column_map, _today)]
 
-    # Overdue (un-thresholded)
-    overdue_all = d[d['Amount Overdue'] > 0].copy()
+    # Line-level net payment and overdue for rows where demand exists (used for ageing)
+    raised = d[demand_gen_col].notnull()
+    line_net = _net_payment(d.loc[raised, payment_received_col], d.loc[raised, tax_col])
+    copy_df = d[raised].assign(**{
+        'Net payment received (AV)': line_net,
+        'Amount Overdue': d.loc[raised, amount_due_col] - line_net,
+    })
 
-    # For ageing: prepare copies
-    copy_df = filtered.copy()
+    # Registered/Unregistered partitions
+    booked_df = d[d[booking_id].notnull()]
+    reg_df = booked_df[booked_df[reg_date_col].notnull()]
+    unreg_df = booked_df[booked_df[reg_date_col].isnull()]
+
+    # Overdue (un-thresholded): rows of bookings with a positive overdue rollup
+    overdue_all = d[_broadcast(codes, facts['Amount Overdue'], 0.0) > 0]
 
     return {
         "df": d,
+        "booking_codes": codes,
+        "booking_facts": facts,
         "booked_df": booked_df,
         "reg_df": reg_df,
         "unreg_df": unreg_df,
@@ -320,33 +479,6 @@ def compute_working_data(df: pd.DataFrame, today: pd.Timestamp, column_map: Colu
         "delayed_demand_df": delayed_demand_df,
         "future_demand_df": future_demand_df,
         "copy_df": copy_df,
-        "totals": {
-            "total_units": total_units,
-            "booked_units": booked_units,
-            "reg_units": reg_units,
-            "unreg_units": unreg_units,
-            "total_sales_act": total_sales_act,
-            "reg_sales_act": reg_sales_act,
-            "unreg_sales_act": unreg_sales_act,
-            "total_corpus": total_corpus,
-            "reg_corpus": reg_corpus,
-            "unreg_corpus": unreg_corpus,
-            "total_sales": total_sales,
-            "reg_sales": reg_sales,
-            "unreg_sales": unreg_sales,
-            "total_due": total_due,
-            "reg_due": reg_due,
-            "unreg_due": unreg_due,
-            "total_due_n": total_due_n,
-            "reg_due_n": reg_due_n,
-            "unreg_due_n": unreg_due_n,
-            "total_due_nn": total_due_nn,
-            "reg_due_nn": reg_due_nn,
-            "unreg_due_nn": unreg_due_nn,
-            "total_collected_notax": total_collected_notax,
-            "reg_collected_notax": reg_collected_notax,
-            "unreg_collected_notax": unreg_collected_notax,
-        },
+        "totals": compute_working_totals(dataset, _today),
         "overdue_all": overdue_all,
     }
-
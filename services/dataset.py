@@ -0,0 +1,171 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, astuple
+from typing import Any, Callable
+import pandas as pd
+from pandas.api.types import is_object_dtype, is_string_dtype
+from utils.types import ColumnMapping
+from utils.currency import coerce_inr_columns
+from utils.dates import parse_date_columns
+from services.profiling import mark_cache, stage
+
+
+# ---------- Dataset registry ----------
+# Preprocessed frames keyed by content fingerprint + column mapping. Shared across reruns and
+# sessions of this process; least recently used entries are evicted beyond _MAX_DATASETS.
+_MAX_DATASETS = 16
+# Compact mode stores text columns with at most this share of distinct values as categoricals
+_CATEGORICAL_MAX_SHARE = 0.5
+
+
+class _Entry:
+    """Registry slot: the preprocessed frame plus structures derived from it."""
+    __slots__ = ("frame", "derived")
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self.derived = {}
+
+
+_registry: "OrderedDict[str, _Entry]" = OrderedDict()
+_registry_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """Lightweight handle to a preprocessed frame held in the dataset registry."""
+    key: str
+    column_map: ColumnMapping = field(compare=False)
+    n_rows: int = field(default=0, compare=False)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Shared preprocessed frame (no copy); callers must treat it as read-only."""
+        return _lookup(self.key).frame
+
+
+def _lookup(key: str) -> _Entry:
+    with _registry_lock:
+        entry = _registry.get(key)
+        if entry is not None:
+            _registry.move_to_end(key)
+    if entry is None:
+        raise KeyError(f"Dataset {key} is no longer registered; register the raw frame again.")
+    return entry
+
+
+# ---------- Preprocessing (runs once per registered dataset) ----------
+def _parse_and_normalize_dates(df: pd.DataFrame, column_map: ColumnMapping, source: str = None) -> pd.DataFrame:
+    """
+    Parse date columns day-first and normalize to midnight. Each distinct value is parsed once with
+    the column's detected format; formats are remembered per source so reloads skip detection.
+    """
+    # Positional index: a row's label is its position, which per-booking side tables key on
+    d = df.reset_index(drop=True)
+    date_cols = [
+        column_map.booking_col,
+        column_map.reg_date_col,
+        column_map.actual_payment_col,
+        column_map.budgeted_date_col,
+        column_map.demand_gen_col,
+    ]
+    parse_date_columns(d, date_cols, source)
+    return d
+
+
+def _compact_text_columns(d: pd.DataFrame) -> None:
+    """
+    Store low-cardinality text columns (booking IDs, property/customer names, tower, type, milestone,
+    status flags, ...) as categoricals in place: one int8/int16/int32 code per row plus one copy of
+    each distinct string, instead of a Python object per cell.
+    """
+    for c in d.columns:
+        s = d[c]
+        if not (is_object_dtype(s) or is_string_dtype(s)) or isinstance(s.dtype, pd.CategoricalDtype):
+            continue
+        if s.nunique() <= _CATEGORICAL_MAX_SHARE * len(s):
+            d[c] = s.astype('category')
+
+
+def preprocess_df(df: pd.DataFrame, column_map: ColumnMapping, source: str = None, compact: bool = True) -> pd.DataFrame:
+    """Standardize dates and numeric fields across the app; in compact mode also categorize text columns."""
+    d = _parse_and_normalize_dates(df, column_map, source)
+    # Ensure numeric for amounts that are commonly used
+    num_cols = [
+        column_map.total_agreement_col,
+        column_map.other_charges,
+        column_map.amount_due_col,
+        column_map.payment_received_col,
+        column_map.tax_col,
+    ]
+    # Handle INR-formatted strings like "₹1,23,456" or "(5,000)"; numeric columns pass through as-is.
+    # Per-column parse failures travel with the frame for the validation report.
+    d.attrs['inr_parse_failures'] = coerce_inr_columns(d, num_cols)
+    if compact:
+        _compact_text_columns(d)
+    return d
+
+
+# ---------- Public registry API ----------
+def fingerprint_frame(df: pd.DataFrame) -> str:
+    """Content fingerprint of a raw frame (column names, dtypes and cell values). Compute once at ingest."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(list(df.columns)).encode('utf-8'))
+    h.update(repr([str(t) for t in df.dtypes]).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _dataset_key(fingerprint: str, column_map: ColumnMapping, compact: bool) -> str:
+    cm_digest = hashlib.blake2b(repr(astuple(column_map)).encode('utf-8'), digest_size=8).hexdigest()
+    return f"{fingerprint}:{cm_digest}:{'c' if compact else 'w'}"
+
+
+def register_dataset(
+    df: pd.DataFrame,
+    column_map: ColumnMapping,
+    fingerprint: str = None,
+    source: str = None,
+    compact: bool = True,
+) -> Dataset:
+    """
+    Return a handle for df under column_map, parsing and coercing it only if it is not registered yet.
+    Pass the fingerprint computed at ingest to make repeat registrations an O(1) lookup, and the
+    source ("salesforce:<report id>", "upload:<file name>") to reuse its remembered date formats.
+    compact=False keeps text columns as plain object/string columns (same numbers, more memory).
+    """
+    with stage("dataset.register_dataset", rows=len(df)):
+        key = _dataset_key(fingerprint or fingerprint_frame(df), column_map, compact)
+        with _registry_lock:
+            entry = _registry.get(key)
+            if entry is not None:
+                _registry.move_to_end(key)
+                mark_cache("hit")
+                return Dataset(key=key, column_map=column_map, n_rows=len(entry.frame))
+
+        mark_cache("miss")
+        d = preprocess_df(df, column_map, source, compact)
+        with _registry_lock:
+            _registry[key] = _Entry(d)
+            _registry.move_to_end(key)
+            while len(_registry) > _MAX_DATASETS:
+                _registry.popitem(last=False)
+        return Dataset(key=key, column_map=column_map, n_rows=len(d))
+
+
+
+def derived(dataset: Dataset, name: str, build: Callable[[pd.DataFrame], Any]) -> Any:
+    """
+    Memoize a structure derived from the dataset's frame (indexes, date-independent aggregates).
+    build(frame) runs once per dataset; the result is evicted together with the frame.
+    """
+    entry = _lookup(dataset.key)
+    if name not in entry.derived:
+        with stage(f"derived:{name}", rows=dataset.n_rows) as record:
+            if record is not None:
+                record.cache = "miss"
+            value = build(entry.frame)
+        with _registry_lock:
+            entry.derived.setdefault(name, value)
+    return entry.derived[name]
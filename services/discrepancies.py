@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+from services.caching import cached
+from services.compute import get_booking_facts
+from services.dataset import Dataset
+
+
+# ---------- Discrepancy rules (Discrepancies Report) ----------
+# Every rule is a boolean row mask over the shared preprocessed frame (never modified). Null masks
+# and the booking codes are computed once and shared, so all masks come out of one pass; detail
+# frames are built from the flagged rows only. Results use the run_validations shape
+# ("type", "count", "details", "message") plus "rows", the positions of the flagged rows.
+VALUE_MISMATCH_TOLERANCE = 1000
+
+
+def _first_per_group(codes: np.ndarray, values: pd.Series, n_groups: int) -> np.ndarray:
+    """First non-null value per group code (like groupby().first()); None for groups without one."""
+    valid = (codes >= 0) & values.notna().to_numpy()
+    groups, first = np.unique(codes[valid], return_index=True)
+    out = np.full(n_groups, None, dtype=object)
+    out[groups] = values.to_numpy(dtype=object)[np.flatnonzero(valid)[first]]
+    return out
+
+
+def _result(rule: str, mask: np.ndarray, details, count: int, message: str) -> Dict[str, Any]:
+    return {
+        "type": rule,
+        "count": int(count),
+        "rows": np.flatnonzero(mask),
+        "details": details,
+        "message": message if count else "",
+    }
+
+
+@cached
+def run_discrepancy_checks(dataset: Dataset, today: pd.Timestamp, percent_col: Optional[str] = None) -> Dict[str, Any]:
+    """
+    All Discrepancies Report rules over the dataset (cached per dataset, as-of date and percent column).
+    percent_col is the milestone percentage column ("Amount Percent"), which is not part of ColumnMapping;
+    without it the percentage rule is skipped. Returns {"results": [...], "issues": rules with findings}.
+    """
+    d = dataset.frame
+    cm = dataset.column_map
+    today = pd.Timestamp(today)
+    booking, prop, customer = cm.application_booking_id, cm.property_name, cm.customer_name
+
+    # Shared per-column state, computed once
+    notna = {c: d[c].notna().to_numpy() for c in {
+        booking, prop, cm.reg_date_col, cm.demand_gen_col, cm.payment_received_col, cm.booking_col,
+        cm.actual_payment_col, cm.budgeted_date_col,
+    }}
+    pay = d[cm.payment_received_col].to_numpy(dtype="float64", na_value=np.nan)
+    tax = d[cm.tax_col].to_numpy(dtype="float64", na_value=np.nan)
+    booked_on = d[cm.booking_col].to_numpy()
+    no_demand = ~notna[cm.demand_gen_col]
+    paid = pay > 0
+
+    def before_booking(col: str) -> np.ndarray:
+        return notna[col] & notna[cm.booking_col] & (d[col].to_numpy() < booked_on)
+
+    masks = {
+        "invalid_booking": notna[booking] & ~notna[prop],
+        "invalid_registration": notna[cm.reg_date_col] & ~notna[booking],
+        "payment_without_demand": notna[cm.payment_received_col] & paid & no_demand,
+        "milestone_done_no_demand": (d[cm.milestone_status_col] == 1).to_numpy(dtype=bool) & no_demand,
+        "budget_passed_no_demand": (
+            notna[cm.budgeted_date_col] & (d[cm.budgeted_date_col].to_numpy() <= today.to_datetime64()) & no_demand
+        ),
+        "reg_before_booking": before_booking(cm.reg_date_col),
+        "payment_before_booking": before_booking(cm.actual_payment_col),
+        "tax_greater_than_payment": tax > pay,
+    }
+
+    # Per-booking rules reuse the dashboard's booking codes and agreement/other-charges/amount-due rollups
+    codes, facts = get_booking_facts(dataset)
+    n_bookings = len(facts)
+    diff = (facts["agreement_first"] + facts["corpus_first"] - facts["Agreement value"]).to_numpy()
+    mismatched = np.abs(diff) > VALUE_MISMATCH_TOLERANCE
+    masks["booking_value_mismatch"] = (codes >= 0) & mismatched[np.maximum(codes, 0)]
+
+    milestone_codes = d[cm.milestone_name].astype("category").cat.codes.to_numpy()
+    keyed = paid & (codes >= 0) & (milestone_codes >= 0)
+    pair = codes.astype("int64") * (int(milestone_codes.max(initial=-1)) + 1) + milestone_codes
+    pairs, inverse, counts = np.unique(pair[keyed], return_inverse=True, return_counts=True)
+    duplicated = np.zeros(len(d), dtype=bool)
+    duplicated[np.flatnonzero(keyed)] = counts[inverse] > 1
+    masks["duplicate_payments"] = duplicated
+
+    if percent_col is not None:
+        percent = pd.to_numeric(d[percent_col], errors="coerce").fillna(0).to_numpy(dtype="float64")
+        booked = codes >= 0
+        totals = np.bincount(codes[booked], weights=percent[booked], minlength=n_bookings)
+        wrong_total = totals != 100
+        masks["milestone_percentage"] = booked & wrong_total[np.maximum(codes, 0)]
+
+    def rows(rule: str, columns: List[str]) -> pd.DataFrame:
+        return d.loc[masks[rule], columns].drop_duplicates()
+
+    results = []
+    m = masks["invalid_booking"]
+    details = rows("invalid_booking", [customer, booking])
+    results.append(_result("invalid_booking", m, details, len(details), f"{len(details)} invalid Booking found!"))
+
+    m = masks["invalid_registration"]
+    results.append(_result("invalid_registration", m, rows("invalid_registration", [customer]), m.sum(),
+                           f"{int(m.sum())} invalid registrations found!"))
+
+    for rule, columns in (
+        ("payment_without_demand", [prop, booking, customer, cm.payment_received_col]),
+        ("milestone_done_no_demand", [prop, customer, cm.milestone_name]),
+        ("budget_passed_no_demand", [prop, customer, cm.milestone_name, cm.budgeted_date_col]),
+    ):
+        details = rows(rule, columns)
+        noun = "cases" if rule == "payment_without_demand" else "milestones"
+        results.append(_result(rule, masks[rule], details, len(details), f"{len(details)} such {noun} found!"))
+
+    details = facts.loc[mismatched, ["agreement_first", "corpus_first", "Agreement value"]]
+    details = pd.DataFrame({
+        prop: _first_per_group(codes, d[prop], n_bookings)[mismatched],
+        booking: details.index,
+        cm.total_agreement_col: details["agreement_first"].to_numpy(),
+        cm.other_charges: details["corpus_first"].to_numpy(),
+        cm.amount_due_col: details["Agreement value"].to_numpy(),
+        "diff": diff[mismatched],
+    })
+    results.append(_result("booking_value_mismatch", masks["booking_value_mismatch"], details, len(details),
+                           f"{len(details)} entries found with mismatched booking values!"))
+
+    reg = rows("reg_before_booking", [prop, customer, booking, cm.booking_col, cm.reg_date_col])
+    paid_early = rows("payment_before_booking",
+                      [prop, customer, booking, cm.booking_col, cm.actual_payment_col, cm.payment_received_col])
+    results.append(_result(
+        "date_consistency", masks["reg_before_booking"] | masks["payment_before_booking"],
+        {"reg_before_booking": reg, "payment_before_booking": paid_early}, len(reg) + len(paid_early),
+        f"{len(reg)} rows where Registration Date < Booking Date; "
+        f"{len(paid_early)} rows where Payment Date < Booking Date.",
+    ))
+
+    columns = [prop, customer, booking, cm.milestone_name, cm.actual_payment_col, cm.payment_received_col,
+               cm.amount_due_col, cm.tax_col]
+    details = d.loc[duplicated, columns].sort_values([booking, cm.milestone_name, cm.actual_payment_col])
+    results.append(_result(
+        "duplicate_payments", duplicated, details, len(details),
+        f"{len(details)} rows across {int((counts > 1).sum())} milestones with multiple payments found!",
+    ))
+
+    if percent_col is not None:
+        wrong = np.flatnonzero(wrong_total)
+        flagged = masks["milestone_percentage"]
+        # One row per booking and property/customer, with the booking's total (the index is the row position)
+        details = d.loc[flagged, [prop, booking, customer]].drop_duplicates()
+        details[percent_col] = totals[codes[details.index]]
+        results.append(_result("milestone_percentage", flagged, details, len(wrong),
+                               f"{len(wrong)} such bookings found!"))
+
+    details = rows("tax_greater_than_payment", [prop, customer, cm.tax_col, cm.payment_received_col])
+    results.append(_result("tax_greater_than_payment", masks["tax_greater_than_payment"], details, len(details),
+                           f"{len(details)} entries found where tax exceeds payment!"))
+
+    return {"results": results, "issues": sum(1 for r in results if r["count"])}
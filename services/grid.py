@@ -0,0 +1,168 @@
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import IO, Any, Dict, Iterator, Optional, Tuple
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+
+
+# ---------- Server-side table grid ----------
+# Large tables (the working dataset, discrepancy details) stay in this process; the browser gets one
+# page at a time. A GridQuery (search text, column filters, sort) resolves to the row positions it
+# selects, in display order. Positions are kept per table and query, so turning pages is a slice and
+# only a changed query filters or sorts again. Tables are identified by object: pass the same frame
+# (e.g. a cached service result) on every rerun. Entries go when the frame is garbage collected.
+_MAX_QUERIES = 16
+# Columns with at most this many distinct values are filtered by picking values; other text by "contains"
+MAX_FILTER_VALUES = 200
+CSV_CHUNK_ROWS = 50_000
+
+
+@dataclass(frozen=True)
+class ColumnFilter:
+    """Keep rows whose column is one of values, contains the text (case-insensitive) or lies in [low, high]."""
+    column: str
+    values: Tuple[Any, ...] = ()
+    contains: str = ""
+    low: Any = None
+    high: Any = None
+
+
+@dataclass(frozen=True)
+class GridQuery:
+    search: str = ""
+    search_columns: Tuple[str, ...] = ()
+    filters: Tuple[ColumnFilter, ...] = ()
+    sort_by: Optional[str] = None
+    ascending: bool = True
+
+
+class _TableCache:
+    __slots__ = ("positions", "lowered")
+
+    def __init__(self):
+        self.positions: "OrderedDict[GridQuery, np.ndarray]" = OrderedDict()
+        self.lowered: Dict[str, pd.Series] = {}
+
+
+_tables: Dict[int, _TableCache] = {}
+_lock = threading.Lock()
+
+
+def _table_cache(frame: pd.DataFrame) -> _TableCache:
+    with _lock:
+        entry = _tables.get(id(frame))
+        if entry is None:
+            entry = _tables[id(frame)] = _TableCache()
+            weakref.finalize(frame, _tables.pop, id(frame), None)
+        return entry
+
+
+def _contains(frame: pd.DataFrame, column: str, text: str) -> np.ndarray:
+    """Case-insensitive substring match of text on column (categoricals match per category)."""
+    s = frame[column]
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        hit = s.cat.categories.astype(str).str.lower().str.contains(text, regex=False)
+        codes = s.cat.codes.to_numpy()
+        return np.append(np.asarray(hit, dtype=bool), False)[codes]
+    entry = _table_cache(frame)
+    lowered = entry.lowered.get(column)
+    if lowered is None:
+        lowered = entry.lowered[column] = s.astype(str).str.lower().where(s.notna(), "")
+    return lowered.str.contains(text, regex=False).to_numpy(dtype=bool)
+
+
+def _filter_mask(frame: pd.DataFrame, f: ColumnFilter) -> np.ndarray:
+    s = frame[f.column]
+    mask = np.ones(len(frame), dtype=bool)
+    if f.values:
+        mask &= s.isin(f.values).to_numpy(dtype=bool)
+    if f.contains:
+        mask &= _contains(frame, f.column, f.contains.lower())
+    if f.low is not None:
+        mask &= (s >= f.low).to_numpy(dtype=bool, na_value=False)
+    if f.high is not None:
+        mask &= (s <= f.high).to_numpy(dtype=bool, na_value=False)
+    return mask
+
+
+def select_rows(frame: pd.DataFrame, query: GridQuery) -> np.ndarray:
+    """Row positions matching query (search over search_columns, every filter), in its sort order."""
+    entry = _table_cache(frame)
+    with _lock:
+        hit = entry.positions.get(query)
+        if hit is not None:
+            entry.positions.move_to_end(query)
+            return hit
+
+    mask = np.ones(len(frame), dtype=bool)
+    text = query.search.strip().lower()
+    if text and query.search_columns:
+        found = np.zeros(len(frame), dtype=bool)
+        for col in query.search_columns:
+            found |= _contains(frame, col, text)
+        mask &= found
+    for f in query.filters:
+        mask &= _filter_mask(frame, f)
+    positions = np.flatnonzero(mask)
+    if query.sort_by is not None:
+        keys = frame[query.sort_by].iloc[positions].reset_index(drop=True)
+        order = keys.sort_values(ascending=query.ascending, kind="stable", na_position="last").index.to_numpy()
+        positions = positions[order]
+
+    with _lock:
+        entry.positions[query] = positions
+        while len(entry.positions) > _MAX_QUERIES:
+            entry.positions.popitem(last=False)
+    return positions
+
+
+def page_rows(frame: pd.DataFrame, positions: np.ndarray, page: int, page_size: int) -> pd.DataFrame:
+    """
+    Rows of the page (0-based) out of positions. Categorical columns keep only the categories on the
+    page; otherwise every page would carry (and send) all of the table's distinct names.
+    """
+    start = max(page, 0) * page_size
+    rows = frame.iloc[positions[start:start + page_size]]
+    categorical = [c for c, dtype in rows.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    if categorical:
+        rows = rows.assign(**{c: rows[c].cat.remove_unused_categories() for c in categorical})
+    return rows
+
+
+def filter_kind(frame: pd.DataFrame, column: str) -> Tuple[str, Any]:
+    """
+    How column is filtered: ("date", (min, max)), ("number", (min, max)), ("values", sorted distinct
+    values) when there are at most MAX_FILTER_VALUES, otherwise ("text", None) for a contains filter.
+    """
+    s = frame[column]
+    if is_datetime64_any_dtype(s):
+        return "date", (s.min(), s.max())
+    if is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return "number", (s.min(), s.max())
+    distinct = s.dropna().unique()
+    if len(distinct) <= MAX_FILTER_VALUES:
+        return "values", sorted(distinct, key=str)
+    return "text", None
+
+
+def iter_csv(frame: pd.DataFrame, positions: Optional[np.ndarray] = None, chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[bytes]:
+    """The table (or the rows at positions, in that order) as UTF-8 CSV, chunk_rows rows at a time."""
+    n = len(frame) if positions is None else len(positions)
+    if n == 0:
+        yield frame.iloc[:0].to_csv(index=False).encode("utf-8")
+        return
+    for start in range(0, n, chunk_rows):
+        stop = min(start + chunk_rows, n)
+        chunk = frame.iloc[start:stop] if positions is None else frame.iloc[positions[start:stop]]
+        yield chunk.to_csv(index=False, header=start == 0).encode("utf-8")
+
+
+def write_csv(frame: pd.DataFrame, file: IO[bytes], positions: Optional[np.ndarray] = None) -> int:
+    """Write iter_csv's chunks to a binary file; returns the bytes written."""
+    written = 0
+    for chunk in iter_csv(frame, positions):
+        written += file.write(chunk)
+    return written
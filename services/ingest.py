@@ -0,0 +1,164 @@
+import time
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Union
+import pandas as pd
+from utils.columns import COLUMN_CANDIDATES, missing_fields, needed_columns, resolve_column_map
+from services.profiling import profiled
+
+try:
+    import pyarrow.csv  # noqa: F401  (pd.read_csv(engine="pyarrow") needs it)
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+try:
+    import python_calamine  # noqa: F401  (pd.read_excel(engine="calamine") needs it)
+    _HAS_CALAMINE = True
+except ImportError:
+    _HAS_CALAMINE = False
+
+
+# ---------- Upload ingest ----------
+# Exports carry many more columns than the dashboard reads. The header row is read first; when every
+# ColumnMapping field resolves, only the candidate headers (plus EXTRA_COLUMNS) are read, otherwise the
+# whole file is, so the sidebar can offer every column for the fields it has to ask about. Text columns
+# are read as strings, and so are CSV date and amount columns: preprocess_df parses dates and INR amounts
+# once, with no type inference at read time. XLSX cells keep their stored types (dates and numbers are
+# already typed there), as do milestone flags and percentages.
+CSV_ENCODING = "ISO-8859-1"
+CSV_ENGINES = ("pyarrow", "c", "python")
+XLSX_ENGINES = ("calamine", "openpyxl")
+_TEXT_FIELDS = (
+    "property_name", "customer_name", "active_col", "application_booking_id", "tower_col", "type_col",
+    "milestone_name",
+)
+_PARSED_FIELDS = (
+    "booking_col", "reg_date_col", "actual_payment_col", "budgeted_date_col", "demand_gen_col",
+    "amount_due_col", "payment_received_col", "total_agreement_col", "tax_col", "other_charges",
+)
+_TEXT_HEADERS = {c for f in _TEXT_FIELDS for c in COLUMN_CANDIDATES[f][1]}
+_PARSED_HEADERS = {c for f in _PARSED_FIELDS for c in COLUMN_CANDIDATES[f][1]}
+
+Source = Union[str, Path, BinaryIO]
+
+
+def default_engine(fmt: str) -> str:
+    """Fastest installed reader for "csv" or "xlsx"."""
+    if fmt == "csv":
+        return "pyarrow" if _HAS_PYARROW else "c"
+    return "calamine" if _HAS_CALAMINE else "openpyxl"
+
+
+def select_columns(headers: Iterable[str], keep: Iterable[str] = ()) -> List[str]:
+    """
+    Raw headers to read: those whose stripped name is a needed column or in keep, in file order.
+    All headers when some ColumnMapping field has no candidate among them.
+    """
+    headers = list(headers)
+    stripped = [str(h).strip() for h in headers]
+    if missing_fields(resolve_column_map(stripped)):
+        return headers
+    wanted = set(needed_columns()) | {str(k).strip() for k in keep}
+    return [h for h, s in zip(headers, stripped) if s in wanted]
+
+
+def _string_dtypes(columns: Iterable[str], parsed: bool) -> Dict[str, str]:
+    """dtype mapping reading text columns (and with parsed=True, date and amount columns) as strings."""
+    headers = _TEXT_HEADERS | _PARSED_HEADERS if parsed else _TEXT_HEADERS
+    return {c: "str" for c in columns if str(c).strip() in headers}
+
+
+def _rewind(source: Source) -> None:
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def _read_csv(source: Source, engine: str, select: Callable[[List[str]], List[str]]) -> pd.DataFrame:
+    headers = list(pd.read_csv(source, nrows=0, encoding=CSV_ENCODING).columns)
+    _rewind(source)
+    usecols = select(headers)
+    return pd.read_csv(
+        source, encoding=CSV_ENCODING, engine=engine, usecols=usecols, dtype=_string_dtypes(usecols, parsed=True),
+    )
+
+
+def _read_xlsx_calamine(source: Source, select: Callable[[List[str]], List[str]]) -> pd.DataFrame:
+    headers = list(pd.read_excel(source, engine="calamine", nrows=0).columns)
+    _rewind(source)
+    usecols = select(headers)
+    return pd.read_excel(source, engine="calamine", usecols=usecols, dtype=_string_dtypes(usecols, parsed=False))
+
+
+def _read_xlsx_openpyxl(source: Source, select: Callable[[List[str]], List[str]]) -> pd.DataFrame:
+    """
+    First sheet through a read-only (streaming) workbook, keeping only the selected cells of each row.
+    pd.read_excel converts every cell of every column and infers types from them; this skips both.
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        headers = [str(h) if h is not None else "" for h in next(rows, ())]
+        usecols = select(headers)
+        positions = [headers.index(c) for c in usecols]
+        values: List[list] = [[] for _ in usecols]
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            for out, i in zip(values, positions):
+                out.append(row[i] if i < len(row) else None)
+    finally:
+        workbook.close()
+    strings = _string_dtypes(usecols, parsed=False)
+    columns = {
+        c: pd.Series(v, dtype=object).astype(strings[c]) if c in strings else pd.Series(v)
+        for c, v in zip(usecols, values)
+    }
+    return pd.DataFrame(columns, columns=usecols)
+
+
+@profiled()
+def read_export(
+    source: Source, name: Optional[str] = None, engine: str = "auto", keep: Iterable[str] = (),
+) -> pd.DataFrame:
+    """
+    Read a CSV/XLSX export for the dashboard: only the columns it can use (see above) plus keep,
+    with header whitespace stripped. source is a path or a binary file object such as a Streamlit
+    upload; name (default: the path) picks the format by suffix. engine "auto" uses default_engine.
+    Timings and what was read are kept in df.attrs["ingest"].
+    """
+    started = time.perf_counter()
+    suffix = Path(str(name or source)).suffix.lower()
+    fmt = "csv" if suffix == ".csv" else "xlsx" if suffix in (".xlsx", ".xlsm") else None
+    if fmt is None:
+        raise ValueError(f"Unsupported file type '{suffix}' (expected .csv or .xlsx)")
+    engine = default_engine(fmt) if engine == "auto" else engine
+    if engine not in (CSV_ENGINES if fmt == "csv" else XLSX_ENGINES):
+        raise ValueError(f"Engine '{engine}' cannot read .{fmt} files")
+
+    timings = {}
+
+    def select(headers: List[str]) -> List[str]:
+        timings["header_seconds"] = time.perf_counter() - started
+        timings["columns_total"] = len(headers)
+        return select_columns(headers, keep)
+
+    if fmt == "csv":
+        df = _read_csv(source, engine, select)
+    elif engine == "calamine":
+        df = _read_xlsx_calamine(source, select)
+    else:
+        df = _read_xlsx_openpyxl(source, select)
+    df.columns = df.columns.map(lambda c: str(c).strip())
+    seconds = time.perf_counter() - started
+    df.attrs["ingest"] = {
+        "format": fmt,
+        "engine": engine,
+        "rows": len(df),
+        "columns": len(df.columns),
+        "columns_total": timings.get("columns_total", len(df.columns)),
+        "header_seconds": timings.get("header_seconds", 0.0),
+        "read_seconds": seconds - timings.get("header_seconds", 0.0),
+        "seconds": seconds,
+    }
+    return df
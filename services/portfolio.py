@@ -0,0 +1,197 @@
+import atexit
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Union
+import pandas as pd
+from utils.columns import missing_fields, resolve_column_map
+from utils.types import KPIMetrics
+from services.compute import compute_kpis, compute_monthly_trend, compute_property_metrics
+from services.dataset import fingerprint_frame, register_dataset
+from services.ingest import read_export
+
+
+# ---------- Portfolio (several projects at once) ----------
+# Each project is one export or report. Its KPIs, monthly trend and per-property table are computed in
+# a worker process (preprocessing and the pandas work hold the GIL, so threads would not overlap), all
+# projects at once, so a portfolio takes about as long as its slowest project. Results are kept per
+# project content and as-of date: reloading one project recomputes that project only.
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+_MAX_SUMMARIES = 64
+# Fields a project needs for KPIs, trend and the property table
+_REQUIRED = (
+    "booking_col", "reg_date_col", "actual_payment_col", "amount_due_col", "payment_received_col",
+    "total_agreement_col", "budgeted_date_col", "demand_gen_col", "property_name",
+    "application_booking_id", "tax_col", "other_charges",
+)
+
+
+@dataclass(frozen=True)
+class Project:
+    """
+    One project of the portfolio. source is a CSV/XLSX path, the bytes of an uploaded file (file_name
+    then gives the format) or an already loaded frame such as a report snapshot. fingerprint identifies
+    the content; it is derived from the bytes or frame when not given.
+    """
+    name: str
+    source: Union[str, Path, bytes, pd.DataFrame]
+    fingerprint: Optional[str] = None
+    file_name: Optional[str] = None
+
+    def content_key(self) -> str:
+        if self.fingerprint:
+            return self.fingerprint
+        if isinstance(self.source, pd.DataFrame):
+            return fingerprint_frame(self.source)
+        data = self.source if isinstance(self.source, bytes) else Path(self.source).read_bytes()
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@dataclass
+class ProjectSummary:
+    """What the portfolio view shows per project; error is set (and the rest empty) when it failed."""
+    name: str
+    key: str
+    rows: int
+    kpis: Optional[KPIMetrics]
+    trend: Optional[pd.DataFrame]
+    properties: Optional[pd.DataFrame]
+    seconds: float
+    error: Optional[str] = None
+
+
+_summaries: "OrderedDict[tuple, ProjectSummary]" = OrderedDict()
+_summaries_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _load(project: Project) -> pd.DataFrame:
+    source = project.source
+    if isinstance(source, pd.DataFrame):
+        return source
+    if isinstance(source, bytes):
+        return read_export(io.BytesIO(source), name=project.file_name or project.name)
+    return read_export(source)
+
+
+def compute_project(project: Project, key: str, today: pd.Timestamp) -> ProjectSummary:
+    """Load, preprocess and summarize one project (runs in a worker process)."""
+    started = time.perf_counter()
+    try:
+        df = _load(project)
+        column_map = resolve_column_map(df.columns)
+        missing = [f for f in missing_fields(column_map) if f in _REQUIRED]
+        if missing:
+            raise ValueError(f"columns not found for {', '.join(missing)}")
+        dataset = register_dataset(df, column_map, fingerprint=key, source=f"project:{project.name}")
+        return ProjectSummary(
+            name=project.name,
+            key=key,
+            rows=dataset.n_rows,
+            kpis=compute_kpis(dataset, today),
+            trend=compute_monthly_trend(dataset, today),
+            properties=compute_property_metrics(dataset, today),
+            seconds=time.perf_counter() - started,
+        )
+    except Exception as e:
+        return ProjectSummary(project.name, key, 0, None, None, None, time.perf_counter() - started, error=str(e))
+
+
+def _shared_pool() -> ProcessPoolExecutor:
+    """Process pool kept across calls (and Streamlit reruns), so workers start once. Spawned, not forked:
+    the app process runs threads."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def compute_portfolio(
+    projects: Sequence[Project],
+    today: pd.Timestamp,
+    executor: Optional[Executor] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> List[ProjectSummary]:
+    """
+    Summaries for every project as of today, in the given order. Projects already summarized for
+    this content and date come from memory; the rest run concurrently on executor (default: the
+    shared process pool; with one project or one CPU they run in this process). progress(done, total)
+    is called as projects finish.
+    """
+    today = pd.to_datetime(today).normalize()
+    keys = [p.content_key() for p in projects]
+    out: Dict[int, ProjectSummary] = {}
+    todo = []
+    with _summaries_lock:
+        for i, (project, key) in enumerate(zip(projects, keys)):
+            hit = _summaries.get((key, project.name, today))
+            if hit is not None:
+                _summaries.move_to_end((key, project.name, today))
+                out[i] = hit
+            else:
+                todo.append(i)
+
+    def done(i: int, summary: ProjectSummary) -> None:
+        out[i] = summary
+        if summary.error is None:
+            with _summaries_lock:
+                _summaries[(keys[i], projects[i].name, today)] = summary
+                while len(_summaries) > _MAX_SUMMARIES:
+                    _summaries.popitem(last=False)
+        if progress is not None:
+            progress(len(out), len(projects))
+
+    if executor is None and (len(todo) < 2 or MAX_WORKERS < 2):
+        for i in todo:
+            done(i, compute_project(projects[i], keys[i], today))
+    else:
+        pool = executor or _shared_pool()
+        futures = {pool.submit(compute_project, projects[i], keys[i], today): i for i in todo}
+        for future in as_completed(futures):
+            done(futures[future], future.result())
+    return [out[i] for i in range(len(projects))]
+
+
+# KPIMetrics fields shown in the roll-up, with their column names (all additive across projects)
+PORTFOLIO_COLUMNS = {
+    "total_units": "Units",
+    "units_registered": "Registered",
+    "units_unregistered": "Unregistered",
+    "value_of_units_cr": "Value of Units (₹ Cr)",
+    "total_demand_generated_cr": "Demand Generated (₹ Cr)",
+    "total_collection_cr": "Collected (₹ Cr)",
+    "amount_yet_to_be_collected_cr": "Yet to be Collected (₹ Cr)",
+    "total_corpus_maintenance_cr": "Corpus + Maintenance (₹ Cr)",
+}
+
+
+def portfolio_table(summaries: Sequence[ProjectSummary]) -> pd.DataFrame:
+    """Roll-up: one row per project plus a Total row over the projects that computed; errors in an Error column."""
+    rows = []
+    for s in summaries:
+        kpis = asdict(s.kpis) if s.kpis is not None else {}
+        rows.append({
+            "Project": s.name,
+            "Rows": s.rows,
+            **{label: kpis.get(f) for f, label in PORTFOLIO_COLUMNS.items()},
+            "Compute (s)": round(s.seconds, 2),
+            "Error": s.error or "",
+        })
+    table = pd.DataFrame(rows, columns=["Project", "Rows", *PORTFOLIO_COLUMNS.values(), "Compute (s)", "Error"])
+    ok = table["Error"] == ""
+    if ok.any():
+        total = table.loc[ok, ["Rows", *PORTFOLIO_COLUMNS.values()]].sum()
+        table.loc[len(table)] = {"Project": "Total", **total.to_dict(), "Compute (s)": float("nan"), "Error": ""}
+    counts = ["Rows", "Units", "Registered", "Unregistered"]
+    table[counts] = table[counts].astype("Int64")
+    return table if not ok.all() else table.drop(columns="Error")
@@ -0,0 +1,181 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional
+from utils.paths import cache_dir
+
+
+# ---------- Hot-path profiling ----------
+# A Profile collects one record per stage (service call, derived structure, render section) of one
+# run, such as a Streamlit rerun. It is active for the thread that started it only; with none active,
+# stage() and @profiled cost one thread-local lookup. @cached service functions and the dataset
+# registry report themselves, including whether the call was served from cache. Finished profiles can
+# be appended to a JSON-lines log (PROFILE_LOG_ENV overrides its path).
+PROFILE_LOG_ENV = "TRIBECA_PROFILE_LOG"
+_local = threading.local()
+
+
+@dataclass
+class StageRecord:
+    name: str
+    depth: int
+    ms: float = 0.0
+    rows: Optional[int] = None
+    cache: Optional[str] = None      # "hit" / "miss" for cached and derived calls
+    mem_mb: Optional[float] = None   # net traced allocation, with memory tracing on
+
+
+@dataclass
+class Profile:
+    label: str
+    trace_memory: bool = False
+    started: float = field(default_factory=time.time)
+    records: List[StageRecord] = field(default_factory=list)
+    total_ms: float = 0.0
+    _open: List[StageRecord] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "label": self.label,
+            "total_ms": round(self.total_ms, 2),
+            "stages": [{k: v for k, v in asdict(r).items() if v is not None} for r in self.records],
+        }
+
+
+def active_profile() -> Optional[Profile]:
+    return getattr(_local, "profile", None)
+
+
+def start_profile(label: str, trace_memory: bool = False) -> Profile:
+    """Start collecting stages on this thread (replacing any profile already running here)."""
+    profile = Profile(label, trace_memory)
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _local.profile = profile
+    _local.t0 = time.perf_counter()
+    return profile
+
+
+def stop_profile() -> Optional[Profile]:
+    """Stop collecting on this thread and return the finished profile (None if none was running)."""
+    profile = active_profile()
+    if profile is None:
+        return None
+    profile.total_ms = (time.perf_counter() - _local.t0) * 1000
+    # Stages left open by an early return or st.stop() end here
+    while profile._open:
+        _close(profile, profile._open[-1])
+    if profile.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _local.profile = None
+    return profile
+
+
+@contextmanager
+def stage(name: str, rows: Optional[int] = None) -> Iterator[Optional[StageRecord]]:
+    """Time the enclosed block as one stage of the active profile; yields its record (None when off)."""
+    profile = active_profile()
+    if profile is None:
+        yield None
+        return
+    record = _open(profile, name, rows)
+    try:
+        yield record
+    finally:
+        if record in profile._open:
+            _close(profile, record)
+
+
+def _open(profile: Profile, name: str, rows: Optional[int]) -> StageRecord:
+    record = StageRecord(name, len(profile._open), rows=rows)
+    record._t0 = time.perf_counter()
+    record._mem0 = tracemalloc.get_traced_memory()[0] if profile.trace_memory and tracemalloc.is_tracing() else None
+    profile.records.append(record)
+    profile._open.append(record)
+    return record
+
+
+def _close(profile: Profile, record: StageRecord) -> None:
+    """End record and any stage still open inside it."""
+    while profile._open:
+        inner = profile._open.pop()
+        inner.ms = round((time.perf_counter() - inner._t0) * 1000, 3)
+        if inner._mem0 is not None and tracemalloc.is_tracing():
+            inner.mem_mb = round((tracemalloc.get_traced_memory()[0] - inner._mem0) / 2**20, 2)
+        if inner is record:
+            break
+
+
+class Laps:
+    """
+    Consecutive stages through long linear code (a render function): lap(name) ends the previous
+    stage and starts the next one; close() ends the last. No-ops when profiling is off.
+    """
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._current: Optional[StageRecord] = None
+
+    def lap(self, name: str, rows: Optional[int] = None) -> None:
+        self.close()
+        profile = active_profile()
+        if profile is not None:
+            self._current = _open(profile, self.prefix + name, rows)
+
+    def close(self) -> None:
+        profile = active_profile()
+        if self._current is not None and profile is not None and self._current in profile._open:
+            _close(profile, self._current)
+        self._current = None
+
+
+def mark_cache(outcome: str) -> None:
+    """Set the cache outcome ("hit"/"miss") of the innermost open stage, if profiling."""
+    profile = active_profile()
+    if profile is not None and profile._open:
+        profile._open[-1].cache = outcome
+
+
+def rows_of(args) -> Optional[int]:
+    """Row count of the first dataset-like argument (anything with n_rows), for stage records."""
+    for a in args:
+        n = getattr(a, "n_rows", None)
+        if isinstance(n, int):
+            return n
+    return None
+
+
+def profiled(name: Optional[str] = None) -> Callable:
+    """Decorator: record every call of the function as a stage (named after it unless name is given)."""
+    def decorate(func: Callable) -> Callable:
+        label = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if active_profile() is None:
+                return func(*args, **kwargs)
+            with stage(label, rows=rows_of(args)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def profile_log_path() -> Path:
+    return Path(os.environ.get(PROFILE_LOG_ENV) or cache_dir("profiles") / "profile.jsonl")
+
+
+def log_profile(profile: Profile, path: Optional[Path] = None, **extra: Any) -> None:
+    """Append the profile (plus extra fields such as the data source) as one JSON line."""
+    path = path or profile_log_path()
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({**profile.to_dict(), **extra}, default=str) + "\n")
+    except OSError:
+        pass  # read-only deployments skip the log
@@ -0,0 +1,99 @@
+import pandas as pd
+from services.caching import cached
+from services.compute import attach_booking_rollups, compute_working_data
+from services.dataset import Dataset
+from utils.formatting import fmt_inr, to_cr
+
+
+# ---------- Dashboard detail tables ----------
+# Tables the dashboard shows inside collapsed expanders. They are built only when an expander is
+# opened, and cached per dataset (and as-of date and threshold where they depend on them), so
+# reopening one or rerunning the page does not rebuild it.
+
+@cached
+def compute_outstanding_by_booking(dataset: Dataset) -> dict:
+    """
+    Amount Yet to be Collected per booking (sum of positive Amount Due - Payment Received across its
+    milestones), with the booking's first customer and property, largest first. Returns
+    {"table": display frame, "total": outstanding over all bookings}.
+    """
+    column_map = dataset.column_map
+    d = dataset.frame
+    booking_id_col = column_map.application_booking_id
+    amt_col = column_map.amount_due_col
+    pay_col = column_map.payment_received_col
+    cust_col = column_map.customer_name
+    prop_col = column_map.property_name
+
+    cols = [booking_id_col, amt_col, pay_col] + [c for c in [cust_col, prop_col] if c in d.columns]
+    d_ayc = d[cols].copy()
+    d_ayc[pay_col] = d_ayc[pay_col].fillna(0)
+    d_ayc[amt_col] = d_ayc[amt_col].fillna(0)
+    d_ayc['__outstanding_row__'] = (d_ayc[amt_col] - d_ayc[pay_col]).clip(lower=0)
+    # Aggregate per booking, carry representative Property and Customer (first non-null)
+    group_fields = {"__outstanding_row__": 'sum'}
+    show_cols = {'__outstanding_row__': 'Amount Yet to be Collected', booking_id_col: 'Booking ID'}
+    if cust_col in d_ayc.columns:
+        group_fields[cust_col] = 'first'
+        show_cols[cust_col] = 'Customer Name'
+    if prop_col in d_ayc.columns:
+        group_fields[prop_col] = 'first'
+        show_cols[prop_col] = 'Property Name'
+
+    per_booking = (
+        d_ayc.groupby(booking_id_col, observed=True)
+            .agg(group_fields)
+            .reset_index()
+            .rename(columns=show_cols)
+    )
+    total = per_booking['Amount Yet to be Collected'].sum()
+    per_booking['Amount Yet to be Collected (₹)'] = per_booking['Amount Yet to be Collected'].apply(fmt_inr)
+    per_booking['Amount Yet to be Collected (₹ Cr)'] = per_booking['Amount Yet to be Collected'].apply(to_cr)
+    # Prefer showing Booking ID, Customer, Property, and the two display columns
+    display_cols = [c for c in ['Booking ID', 'Customer Name', 'Property Name', 'Amount Yet to be Collected (₹)', 'Amount Yet to be Collected (₹ Cr)'] if c in per_booking.columns]
+    per_booking = per_booking[display_cols].sort_values(by='Amount Yet to be Collected (₹ Cr)', ascending=False)
+    return {"table": per_booking, "total": total}
+
+
+@cached
+def compute_overdue_customers(dataset: Dataset, today: pd.Timestamp, overdue_threshold: float = 0.0) -> pd.DataFrame:
+    """Overdue amount in lakhs per (customer, property) over bookings whose overdue exceeds overdue_threshold, largest first."""
+    column_map = dataset.column_map
+    data = compute_working_data(dataset, pd.to_datetime(today).normalize())
+    overdue_customers = attach_booking_rollups(data, data["overdue_all"], ['Amount Overdue'])
+    overdue_customers = overdue_customers[overdue_customers['Amount Overdue'] > overdue_threshold]
+    customer_table = (
+        overdue_customers.groupby([column_map.customer_name, column_map.property_name], observed=True)['Amount Overdue']
+                         .sum()
+                         .reset_index()
+                         .sort_values(by='Amount Overdue', ascending=False)
+    )
+    customer_table['Amount Overdue (Lakhs)'] = customer_table['Amount Overdue'] / 1e5
+    return customer_table.drop(columns=['Amount Overdue'])
+
+
+@cached
+def compute_monthly_due(dataset: Dataset, today: pd.Timestamp) -> pd.DataFrame:
+    """
+    Expected future collection per Budgeted Date month from today's month on: amount due and
+    Expected Due (₹ Cr), indexed by month label ("Jan 2026") in month order.
+    """
+    column_map = dataset.column_map
+    today = pd.to_datetime(today).normalize()
+    amount_due_col = column_map.amount_due_col
+    future_demand_df = compute_working_data(dataset, today)["future_demand_df"].copy()
+    future_demand_df['Due Month'] = pd.to_datetime(future_demand_df[column_map.budgeted_date_col].dt.to_period("M").astype(str), errors='coerce')
+    future_dues = future_demand_df[future_demand_df['Due Month'] >= today.replace(day=1)]
+
+    monthly_due = future_dues.groupby('Due Month')[amount_due_col].sum().reset_index()
+    monthly_due['Expected Due (₹ Cr)'] = monthly_due[amount_due_col].apply(to_cr)
+    monthly_due = monthly_due.rename(columns={'Due Month': 'Month_dt'})
+    monthly_due['Month'] = monthly_due['Month_dt'].dt.strftime('%b %Y')
+    return monthly_due.sort_values(by='Month_dt').set_index('Month')
+
+
+@cached
+def compute_working_table(dataset: Dataset, today: pd.Timestamp) -> pd.DataFrame:
+    """The full working dataset as of today with every per-booking rollup joined onto its rows."""
+    data = compute_working_data(dataset, pd.to_datetime(today).normalize())
+    return attach_booking_rollups(data, data["df"])
@@ -1,63 +1,141 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
 import pandas as pd
-from typing import Dict, Any
-from utils.types import ColumnMapping
-from services.compute import preprocess_df, _net_payment
+from services.caching import cached
+from services.dataset import Dataset
 
 
-def validate_tax_vs_payment(df: pd.DataFrame, column_map: ColumnMapping) -> Dict[str, Any]:
-    d = preprocess_df(df, column_map)
-    pay = d[column_map.payment_received_col]
-    tax = d[column_map.tax_col]
+# ---------- Validation rule registry ----------
+# Each rule is registered with @validation_rule and declares the ColumnMapping fields it reads. The
+# runner skips rules whose fields are unmapped or absent from the frame, computes the null mask of every
+# declared column once, and runs the rules concurrently on a thread pool over the shared, read-only
+# preprocessed frame (the NumPy comparisons and reductions release the GIL). Rules read their columns
+# through RuleContext, so a new rule adds its own comparisons but no extra pass for null checks.
+MAX_WORKERS = min(8, os.cpu_count() or 1)
 
-    mask_applicable = pay.notna() & tax.notna()
-    mask_issue = mask_applicable & (tax > pay)
 
-    issues_df = d.loc[mask_issue, [
+@dataclass(frozen=True)
+class ValidationRule:
+    name: str
+    func: Callable[["RuleContext"], Dict[str, Any]]
+    fields: Tuple[str, ...] = ()
+    optional: Tuple[str, ...] = ()    # read only when mapped
+
+
+@dataclass(frozen=True)
+class RuleContext:
+    """What a rule sees: the shared frame (never modify it), its column mapping and precomputed null masks."""
+    dataset: Dataset
+    notna_masks: Dict[str, np.ndarray]
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        return self.dataset.frame
+
+    @property
+    def column_map(self):
+        return self.dataset.column_map
+
+    def column(self, field: str) -> Optional[str]:
+        """Header mapped to field, or None when it is unmapped or not in the frame."""
+        col = getattr(self.column_map, field, None)
+        return col if col is not None and col in self.frame.columns else None
+
+    def notna(self, field: str) -> np.ndarray:
+        return self.notna_masks[self.column(field)]
+
+    def values(self, field: str) -> np.ndarray:
+        return self.frame[self.column(field)].to_numpy()
+
+
+_RULES: Dict[str, ValidationRule] = {}
+
+
+def validation_rule(name: str, *fields: str, optional: Iterable[str] = ()) -> Callable:
+    """
+    Register func(ctx) -> result dict as rule name. fields are the ColumnMapping fields it needs
+    (the rule is skipped without them); optional ones are read only when mapped.
+    """
+    def register(func: Callable[[RuleContext], Dict[str, Any]]) -> Callable:
+        _RULES[name] = ValidationRule(name, func, tuple(fields), tuple(optional))
+        return func
+    return register
+
+
+def validation_rules() -> List[ValidationRule]:
+    """Registered rules, in registration order."""
+    return list(_RULES.values())
+
+
+@validation_rule("currency_parsing")
+def validate_currency_parsing(ctx: RuleContext) -> Dict[str, Any]:
+    failures = ctx.frame.attrs.get('inr_parse_failures', {})
+    return {
+        "type": "currency_parsing",
+        "count": sum(failures.values()),
+        "details": dict(failures),
+        "message": (
+            "Unparseable amounts treated as blank: " + ", ".join(f"{c} ({n})" for c, n in failures.items())
+            if failures else ""
+        )
+    }
+
+
+@validation_rule("tax_vs_payment", "application_booking_id", "payment_received_col", "tax_col")
+def validate_tax_vs_payment(ctx: RuleContext) -> Dict[str, Any]:
+    column_map = ctx.column_map
+    pay = ctx.values("payment_received_col")
+    tax = ctx.values("tax_col")
+
+    mask_issue = ctx.notna("payment_received_col") & ctx.notna("tax_col") & (tax > pay)
+    count = int(mask_issue.sum())
+
+    issues_df = ctx.frame.loc[mask_issue, [
         column_map.application_booking_id,
         column_map.payment_received_col,
         column_map.tax_col,
-    ]].copy()
+    ]]
 
     result = {
         "type": "tax_vs_payment",
-        "count": int(mask_issue.sum()),
+        "count": count,
         "details": issues_df,
         "message": (
-            f"{int(mask_issue.sum())} rows where Tax > Payment Received. Net payment was capped at 0 for these rows."
-            if mask_issue.any() else ""
+            f"{count} rows where Tax > Payment Received. Net payment was capped at 0 for these rows."
+            if count else ""
         )
     }
     return result
 
 
-def validate_date_consistency(df: pd.DataFrame, column_map: ColumnMapping) -> Dict[str, Any]:
-    d = preprocess_df(df, column_map)
+@validation_rule(
+    "date_consistency", "application_booking_id", "booking_col",
+    optional=("reg_date_col", "actual_payment_col", "demand_gen_col"),
+)
+def validate_date_consistency(ctx: RuleContext) -> Dict[str, Any]:
+    column_map = ctx.column_map
+    booked = ctx.notna("booking_col")
+    booked_on = ctx.values("booking_col")
     msgs = []
     details: Dict[str, pd.DataFrame] = {}
 
-    # Registration earlier than booking
-    if column_map.reg_date_col and column_map.booking_col:
-        mask = d[column_map.reg_date_col].notna() & d[column_map.booking_col].notna() & \
-               (d[column_map.reg_date_col] < d[column_map.booking_col])
-        if mask.any():
-            msgs.append(f"{int(mask.sum())} rows where Registration Date < Booking Date.")
-            details["reg_before_booking"] = d.loc[mask, [column_map.application_booking_id, column_map.booking_col, column_map.reg_date_col]].copy()
-
-    # Payment earlier than booking
-    if column_map.actual_payment_col and column_map.booking_col:
-        mask = d[column_map.actual_payment_col].notna() & d[column_map.booking_col].notna() & \
-               (d[column_map.actual_payment_col] < d[column_map.booking_col])
-        if mask.any():
-            msgs.append(f"{int(mask.sum())} rows where Payment Date < Booking Date.")
-            details["payment_before_booking"] = d.loc[mask, [column_map.application_booking_id, column_map.booking_col, column_map.actual_payment_col]].copy()
-
-    # Demand generated earlier than booking
-    if column_map.demand_gen_col and column_map.booking_col:
-        mask = d[column_map.demand_gen_col].notna() & d[column_map.booking_col].notna() & \
-               (d[column_map.demand_gen_col] < d[column_map.booking_col])
-        if mask.any():
-            msgs.append(f"{int(mask.sum())} rows where Demand Generation Date < Booking Date.")
-            details["demand_before_booking"] = d.loc[mask, [column_map.application_booking_id, column_map.booking_col, column_map.demand_gen_col]].copy()
+    # Registration, payment and demand dates earlier than booking; each check needs its own date column
+    for field, key, label in (
+        ("reg_date_col", "reg_before_booking", "Registration Date"),
+        ("actual_payment_col", "payment_before_booking", "Payment Date"),
+        ("demand_gen_col", "demand_before_booking", "Demand Generation Date"),
+    ):
+        if ctx.column(field) is None:
+            continue
+        mask = ctx.notna(field) & booked & (ctx.values(field) < booked_on)
+        count = int(mask.sum())
+        if count:
+            msgs.append(f"{count} rows where {label} < Booking Date.")
+            details[key] = ctx.frame.loc[mask, [column_map.application_booking_id, column_map.booking_col, getattr(column_map, field)]]
 
     return {
         "type": "date_consistency",
@@ -67,15 +145,44 @@ def validate_date_consistency(df: pd.DataFrame, column_map: ColumnMapping) -> Di
     }
 
 
-def run_validations(df: pd.DataFrame, column_map: ColumnMapping) -> Dict[str, Any]:
-    """Run all validations and return structured results."""
-    results = []
-    results.append(validate_tax_vs_payment(df, column_map))
-    results.append(validate_date_consistency(df, column_map))
+def _timed(rule: ValidationRule, ctx: RuleContext) -> Tuple[Dict[str, Any], float]:
+    t0 = time.perf_counter()
+    result = rule.func(ctx)
+    return result, time.perf_counter() - t0
+
 
-    messages = [r["message"] for r in results if r.get("message")]
+def run_rules(
+    dataset: Dataset, rules: Optional[Iterable[ValidationRule]] = None, max_workers: int = MAX_WORKERS,
+) -> Dict[str, Any]:
+    """
+    Run rules (default: every registered rule) over the dataset and return
+    {"results", "messages", "skipped", "timings"}: results in rule order, the rules skipped for
+    unmapped columns, and seconds per rule run.
+    """
+    rules = validation_rules() if rules is None else list(rules)
+    ctx = RuleContext(dataset, {})
+    runnable = [r for r in rules if all(ctx.column(f) for f in r.fields)]
+    skipped = [r.name for r in rules if r not in runnable]
+    # One null mask per column read by any rule, shared by all of them
+    columns = {ctx.column(f) for r in runnable for f in r.fields + r.optional} - {None}
+    ctx.notna_masks.update({c: dataset.frame[c].notna().to_numpy() for c in columns})
+
+    if max_workers > 1 and len(runnable) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(runnable))) as pool:
+            outcomes = list(pool.map(lambda r: _timed(r, ctx), runnable))
+    else:
+        outcomes = [_timed(r, ctx) for r in runnable]
+
+    results = [result for result, _ in outcomes]
     return {
         "results": results,
-        "messages": messages,
+        "messages": [r["message"] for r in results if r.get("message")],
+        "skipped": skipped,
+        "timings": {r.name: seconds for r, (_, seconds) in zip(runnable, outcomes)},
     }
 
+
+@cached
+def run_validations(dataset: Dataset) -> Dict[str, Any]:
+    """Run all registered validation rules and return structured results (cached per dataset)."""
+    return run_rules(dataset)
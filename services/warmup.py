@@ -0,0 +1,44 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+
+# ---------- Background warm-up ----------
+# A rerun computes and renders only the view on screen. Afterwards the hidden view's service calls
+# run on a daemon thread, so switching views finds their results cached. Warm-ups call services only
+# (never Streamlit elements) and start once per key, e.g. (view, dataset key, as-of date, settings).
+_MAX_KEYS = 64
+_started: "OrderedDict[Hashable, threading.Thread]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def warm_in_background(
+    key: Hashable,
+    func: Callable,
+    *args,
+    prepare_thread: Optional[Callable[[threading.Thread], None]] = None,
+) -> Optional[threading.Thread]:
+    """
+    Run func(*args) on a daemon thread unless key has been warmed (or is warming) already; returns
+    the thread, or None when skipped. prepare_thread(thread) runs before it starts (the app attaches
+    its script context there). Errors are dropped: the view reports them when it runs for real.
+    """
+    with _lock:
+        if key in _started:
+            _started.move_to_end(key)
+            return None
+        thread = threading.Thread(target=_quietly, args=(func, *args), name=f"warmup-{len(_started)}", daemon=True)
+        _started[key] = thread
+        while len(_started) > _MAX_KEYS:
+            _started.popitem(last=False)
+    if prepare_thread is not None:
+        prepare_thread(thread)
+    thread.start()
+    return thread
+
+
+def _quietly(func: Callable, *args) -> None:
+    try:
+        func(*args)
+    except Exception:
+        pass
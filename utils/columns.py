@@ -0,0 +1,70 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from utils.types import ColumnMapping
+
+
+# Header candidates per ColumnMapping field, most preferred first, with the label shown when the
+# user has to pick a column by hand. Shared by the dashboard, the CLI and the scripts.
+COLUMN_CANDIDATES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "booking_col": ("Booking Date", ("Booking Date",)),
+    "reg_date_col": ("Registration Date", ("Agreement Registration Date", "Registration Date")),
+    "actual_payment_col": ("Payment Date", ("Actual Payment Date", "Payment Received Date", "Receipt Date")),
+    "amount_due_col": ("Amount Due", ("Total Amount Due", "Amount Due", "Due Amount")),
+    "payment_received_col": ("Payment Received", ("Payment Received", "Amount Received")),
+    "total_agreement_col": ("Agreement Value", ("Total Agreement Value", "Agreement Value", "Agreement Amount")),
+    "budgeted_date_col": ("Budgeted Date", ("Budgeted Date", "Planned Demand Date")),
+    "demand_gen_col": ("Demand Generation Date", ("Demand Generation Date", "Demand generation date", "Demand Raised Date", "Invoice Date")),
+    "milestone_status_col": ("Milestone Status", ("Is Milestone Completed", "Milestone Completion Status", "Milestone Completed")),
+    "property_name": ("Property Name", ("Unit/Property Name (Application / Booking ID)", "Property Name", "Unit / Property Name")),
+    "customer_name": ("Customer Name", ("Customer Name", "Account Name", "Ledger Name")),
+    "active_col": ("Active Status", ("Active", "Is Active", "Status")),
+    "application_booking_id": ("Booking ID", ("Application / Booking ID", "Booking ID", "Agreement/Booking ID", "Opportunity/Booking ID")),
+    "tax_col": ("Tax Amount", ("Total Service Tax On PPD", "Tax Amount", "GST Amount", "Total Tax")),
+    "tower_col": ("Tower", ("Tower",)),
+    "type_col": ("Type", ("Type",)),
+    "milestone_name": ("Milestone Name", ("Milestone Name",)),
+    "other_charges": ("Other Charges", ("Other Charges (Corpus+Maintenance)", "Corpus+Maintenance", "Corpus Maintenance", "Other Charges")),
+}
+
+# Headers read directly outside ColumnMapping (the Discrepancies Report's Amount Percent)
+EXTRA_COLUMNS: Tuple[str, ...] = ("Amount Percent",)
+
+
+def needed_columns() -> List[str]:
+    """Every header the dashboard can read: all COLUMN_CANDIDATES plus EXTRA_COLUMNS, in that order."""
+    seen = {}
+    for _, candidates in COLUMN_CANDIDATES.values():
+        seen.update(dict.fromkeys(candidates))
+    seen.update(dict.fromkeys(EXTRA_COLUMNS))
+    return list(seen)
+
+
+def pick_column(columns: Iterable[str], *candidates: str) -> Optional[str]:
+    """First candidate present in columns, or None."""
+    present = set(columns)
+    for c in candidates:
+        if c and c in present:
+            return c
+    return None
+
+
+def resolve_column_map(
+    columns: Iterable[str],
+    choose: Optional[Callable[[str, Tuple[str, ...]], Optional[str]]] = None,
+) -> ColumnMapping:
+    """
+    Build a ColumnMapping from the frame's columns using COLUMN_CANDIDATES. Fields with no matching
+    header are None unless choose(label, candidates) supplies one (the dashboard asks in the sidebar).
+    """
+    columns = list(columns)
+    mapping = {}
+    for field_name, (label, candidates) in COLUMN_CANDIDATES.items():
+        if choose is not None:
+            mapping[field_name] = choose(label, candidates)
+        else:
+            mapping[field_name] = pick_column(columns, *candidates)
+    return ColumnMapping(**mapping)
+
+
+def missing_fields(column_map: ColumnMapping) -> List[str]:
+    """ColumnMapping fields that could not be resolved."""
+    return [f for f in COLUMN_CANDIDATES if getattr(column_map, f) is None]
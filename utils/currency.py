@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Tuple
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+
+# Characters dropped before parsing: rupee sign, digit grouping commas (western or lakh/crore,
+# e.g. "1,23,45,678.00") and spaces, including the non-breaking spaces some exports use.
+_INR_STRIP = str.maketrans('', '', '₹, \t\u00a0\u202f')
+# Cell text that means "no value" rather than a parse failure
+_NULL_TOKENS = {'', 'nan', 'none', 'null', 'na', 'n/a', '-', '--'}
+
+
+def parse_inr_with_failures(series: pd.Series) -> Tuple[pd.Series, int]:
+    """
+    Convert an INR-formatted series to float64 and count cells that could not be parsed.
+    Numeric columns pass through untouched. Otherwise each distinct value is parsed once and mapped
+    back through the factorized codes; only values pd.to_numeric rejects are cleaned (symbol strip
+    via translate table, "(1,234)" as negative).
+    """
+    if is_numeric_dtype(series) and not is_bool_dtype(series):
+        return series.astype('float64'), 0
+
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Series(uniques, dtype=object)
+    parsed = pd.to_numeric(uniques, errors='coerce').to_numpy(dtype='float64', na_value=np.nan, copy=True)
+    failed = np.zeros(len(uniques), dtype=bool)
+
+    pending = np.isnan(parsed)
+    if pending.any():
+        cleaned = uniques[pending].astype(str).str.translate(_INR_STRIP)
+        negative = cleaned.str.startswith('(') & cleaned.str.endswith(')')
+        cleaned = cleaned.where(~negative, cleaned.str[1:-1])
+        retry = pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        parsed[pending] = np.where(negative.to_numpy(), -retry, retry)
+        failed[pending] = np.isnan(retry) & ~cleaned.str.lower().isin(_NULL_TOKENS).to_numpy()
+
+    present = codes >= 0
+    values = np.full(len(series), np.nan)
+    values[present] = parsed[codes[present]]
+    return pd.Series(values, index=series.index, name=series.name), int(failed[codes[present]].sum())
+
+
+def parse_inr(series: pd.Series) -> pd.Series:
+    """Convert an INR-formatted series ("₹1,23,456.00", "(500)", 1234.5) to float64; unparseable cells become NaN."""
+    return parse_inr_with_failures(series)[0]
+
+
+def coerce_inr_columns(d: pd.DataFrame, columns: Iterable[str]) -> Dict[str, int]:
+    """Parse the given currency columns of d in place. Returns parse-failure counts for columns that had any."""
+    failures = {}
+    for c in columns:
+        if c and c in d.columns:
+            d[c], n_failed = parse_inr_with_failures(d[c])
+            if n_failed:
+                failures[c] = n_failed
+    return failures
@@ -0,0 +1,128 @@
+import json
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Optional, Tuple
+from pandas.api.types import is_datetime64_any_dtype
+from utils.paths import cache_dir
+
+
+# Day-first layouts tried during detection, most common in our exports first
+_DATE_FORMATS = [
+    '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%d/%m/%y', '%d-%m-%y',
+    '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S', '%d-%m-%Y %H:%M:%S',
+    '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S',
+    '%d-%b-%Y', '%d %b %Y', '%d-%b-%y', '%b %d, %Y',
+]
+_DETECTION_SAMPLE = 500
+
+# Detected formats per source ("salesforce:<report id>", "upload:<file name>"), persisted so later
+# loads of the same source skip detection entirely
+_FORMATS_FILE = "date_formats.json"
+_format_memory: Optional[Dict[str, Dict[str, str]]] = None
+_format_lock = threading.Lock()
+
+
+def _load_format_memory() -> Dict[str, Dict[str, str]]:
+    global _format_memory
+    if _format_memory is None:
+        try:
+            with open(cache_dir() / _FORMATS_FILE, encoding="utf-8") as f:
+                _format_memory = json.load(f)
+        except (OSError, ValueError):
+            _format_memory = {}
+    return _format_memory
+
+
+def remembered_formats(source: Optional[str]) -> Dict[str, str]:
+    """Column -> date format previously detected for this source."""
+    if not source:
+        return {}
+    with _format_lock:
+        return dict(_load_format_memory().get(source, {}))
+
+
+def remember_formats(source: Optional[str], formats: Dict[str, str]) -> None:
+    if not source or not formats:
+        return
+    with _format_lock:
+        memory = _load_format_memory()
+        current = memory.setdefault(source, {})
+        if all(current.get(c) == fmt for c, fmt in formats.items()):
+            return
+        current.update(formats)
+        try:
+            path = cache_dir() / _FORMATS_FILE
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(memory, indent=1), encoding="utf-8")
+            tmp.replace(path)
+        except OSError:
+            pass  # read-only deployments keep the in-process memory only
+
+
+def _parsed_share(sample: pd.Index, fmt: str) -> float:
+    return float(pd.to_datetime(sample, format=fmt, errors='coerce').notna().mean())
+
+
+def detect_date_format(values: pd.Index) -> Optional[str]:
+    """Pick the candidate format that parses (nearly) every sampled distinct value; None if none fits."""
+    sample = pd.Index(values[:_DETECTION_SAMPLE]).astype(str)
+    best, best_share = None, 0.0
+    for fmt in _DATE_FORMATS:
+        share = _parsed_share(sample, fmt)
+        if share > best_share:
+            best, best_share = fmt, share
+            if share == 1.0:
+                break
+    return best if best_share >= 0.9 else None
+
+
+def _parse_uniques(uniques: pd.Index, fmt: Optional[str]) -> pd.DatetimeIndex:
+    if fmt is None:
+        return pd.DatetimeIndex(pd.to_datetime(uniques, errors='coerce', dayfirst=True))
+    parsed = pd.DatetimeIndex(pd.to_datetime(uniques, format=fmt, errors='coerce'))
+    # Stragglers in another layout fall back to day-first inference (only the few failed values)
+    failed = parsed.isna() & pd.notna(uniques)
+    if failed.any():
+        retry = pd.to_datetime(uniques[failed], errors='coerce', dayfirst=True, format='mixed')
+        values = parsed.to_numpy(copy=True)
+        values[failed] = pd.DatetimeIndex(retry).as_unit(parsed.unit).to_numpy()
+        parsed = pd.DatetimeIndex(values)
+    return parsed
+
+
+def parse_dates(series: pd.Series, fmt: Optional[str] = None) -> Tuple[pd.Series, Optional[str]]:
+    """
+    Parse a date column day-first, parsing each distinct value once and mapping the results back
+    through the factorized codes. Detects the format when fmt is not given.
+    Returns (datetime series, format used); already-datetime columns pass through.
+    """
+    if is_datetime64_any_dtype(series):
+        return series, None
+
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Index(uniques, dtype=object)
+    # A remembered format that no longer fits (the source changed layout) is re-detected
+    if fmt is not None and len(uniques) and _parsed_share(uniques[:_DETECTION_SAMPLE].astype(str), fmt) < 0.9:
+        fmt = None
+    if fmt is None and len(uniques):
+        fmt = detect_date_format(uniques)
+    parsed = _parse_uniques(uniques, fmt).to_numpy()
+
+    values = np.full(len(series), np.datetime64('NaT'), dtype=parsed.dtype)
+    present = codes >= 0
+    values[present] = parsed[codes[present]]
+    return pd.Series(values, index=series.index, name=series.name), fmt
+
+
+def parse_date_columns(d: pd.DataFrame, columns: Iterable[str], source: Optional[str] = None) -> None:
+    """Parse and normalize the given date columns of d in place, reusing and updating the source's remembered formats."""
+    known = remembered_formats(source)
+    detected = {}
+    for c in columns:
+        if c and c in d.columns:
+            d[c], fmt = parse_dates(d[c], known.get(c))
+            d[c] = d[c].dt.normalize()
+            if fmt:
+                detected[c] = fmt
+    remember_formats(source, detected)
@@ -0,0 +1,32 @@
+import pandas as pd
+
+
+# Display helpers shared by the app, the services and the CLI (no Streamlit dependency)
+def to_cr(amount):
+    """Convert amount to crores"""
+    if amount is None or (isinstance(amount, float) and pd.isna(amount)):
+        return 0.0
+    return float(amount) / 1e7
+
+
+def fmt_inr(amount):
+    """Format amount in INR"""
+    if amount is None or (isinstance(amount, float) and pd.isna(amount)):
+        amount = 0.0
+    return f"₹{float(amount):,.2f}"
+
+
+def bucket(days):
+    """Age bucketing function"""
+    if pd.isna(days): return '> 90 Days'
+    if days < 30: return '< 30 Days'
+    elif days < 61: return '31 - 60 Days'
+    elif days < 91: return '61 - 90 Days'
+    else: return '> 90 Days'
+
+
+def percent(val, total):
+    """Format percentage with INR"""
+    val_cr = (val or 0) / 1e7
+    pct = ((val or 0) / total * 100) if total else 0
+    return f"₹ {val_cr:,.2f} Cr ({pct:.1f}%)"
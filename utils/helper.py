@@ -1,6 +1,9 @@
 import pandas as pd
 import streamlit as st
 import base64
+from utils.currency import parse_inr
+# Formatting helpers live in utils.formatting (Streamlit-free); re-exported for existing imports
+from utils.formatting import to_cr, fmt_inr, bucket, percent
 
 
 def add_discrepancy_block(title, df_block):
@@ -38,39 +41,15 @@ def get_column(df, *candidates, label="", key_prefix="shared"):
     return st.session_state[session_key]
 
 
-def to_cr(amount):
-    """Convert amount to crores"""
-    if amount is None or (isinstance(amount, float) and pd.isna(amount)):
-        return 0.0
-    return float(amount) / 1e7
-
-
-def fmt_inr(amount):
-    """Format amount in INR"""
-    if amount is None or (isinstance(amount, float) and pd.isna(amount)):
-        amount = 0.0
-    return f"₹{float(amount):,.2f}"
+def attach_script_context(thread):
+    """Give a helper thread this session's script context, so Streamlit's caches work there without warnings."""
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    add_script_run_ctx(thread, get_script_run_ctx())
 
 
 def _to_numeric_inr(series):
     """Convert INR formatted series to numeric"""
-    return pd.to_numeric(series.astype(str).str.replace(r'[₹,]', '', regex=True), errors='coerce')
-
-
-def bucket(days):
-    """Age bucketing function"""
-    if pd.isna(days): return '> 90 Days'
-    if days < 30: return '< 30 Days'
-    elif days < 61: return '31 - 60 Days'
-    elif days < 91: return '61 - 90 Days'
-    else: return '> 90 Days'
-
-
-def percent(val, total):
-    """Format percentage with INR"""
-    val_cr = (val or 0) / 1e7
-    pct = ((val or 0) / total * 100) if total else 0
-    return f"₹ {val_cr:,.2f} Cr ({pct:.1f}%)"
+    return parse_inr(series)
 
 
 def render_svg(svg_path):
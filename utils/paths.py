@@ -0,0 +1,13 @@
+import os
+from pathlib import Path
+
+
+def cache_dir(*parts: str) -> Path:
+    """
+    Local cache directory for the app (date formats, report snapshots, ...), created on demand.
+    Defaults to ~/.cache/tribeca_dashboard; override with TRIBECA_CACHE_DIR.
+    """
+    base = Path(os.environ.get("TRIBECA_CACHE_DIR", Path.home() / ".cache" / "tribeca_dashboard"))
+    path = base.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path